@@ -0,0 +1,36 @@
+"""ingest_job_queue
+
+Revision ID: 5d2b9e7c41a3
+Revises: 884a7226d176
+Create Date: 2026-10-18 14:02:37.518214
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2b9e7c41a3'
+down_revision: str | Sequence[str] | None = '884a7226d176'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ingest_batches', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('ingest_batches', sa.Column('claimed_by', sa.String(length=200), nullable=True))
+    op.add_column('ingest_batches', sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('ingest_batches', sa.Column('available_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('ingest_batches', sa.Column('last_error', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('ingest_batches', 'last_error')
+    op.drop_column('ingest_batches', 'available_at')
+    op.drop_column('ingest_batches', 'heartbeat_at')
+    op.drop_column('ingest_batches', 'claimed_by')
+    op.drop_column('ingest_batches', 'attempts')
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import cache
 from app.core.database import get_db
 
 router = APIRouter()
@@ -18,5 +19,6 @@ async def health_check(db: AsyncSession = Depends(get_db)):
     return {
         "status": "ok",
         "db": db_status,
+        "cache": {"backend": cache.backend, **cache.stats},
         "version": "0.1.0",
     }
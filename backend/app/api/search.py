@@ -1,16 +1,21 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.core.deps import get_current_user
 from app.models.user import User
 from app.schemas.organization import (
+    CountStrategy,
     OrganizationSearchResult,
     PaginatedResults,
     SearchFilters,
     TypeaheadResult,
 )
-from app.services.search import search_organizations, typeahead
+from app.services.search import (
+    InvalidCursorError,
+    search_organizations,
+    typeahead,
+)
 from app.services.usage import track_event
 
 router = APIRouter(prefix="/api/v1", tags=["search"])
@@ -28,6 +33,14 @@ async def search(
     filing_year: int | None = None,
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = Query(
+        default=None,
+        description="next_cursor of the previous page; takes the place of page",
+    ),
+    count: CountStrategy | None = Query(
+        default=None,
+        description="How total is counted: exact, capped or estimate",
+    ),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -42,8 +55,13 @@ async def search(
         filing_year=filing_year,
         page=page,
         page_size=page_size,
+        cursor=cursor,
+        count=count,
     )
-    results = await search_organizations(db, filters)
+    try:
+        results = await search_organizations(db, filters)
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
     await track_event(db, current_user.id, "search", {"q": q, "total": results.total})
     return results
 
@@ -150,6 +150,12 @@ def search(
     filing_year: int | None = typer.Option(None, "--filing-year"),
     page: int = typer.Option(1, "--page", min=1),
     page_size: int = typer.Option(20, "--page-size", min=1, max=100),
+    cursor: str | None = typer.Option(
+        None, "--cursor", help="Next-page cursor printed by a previous search."
+    ),
+    count: str | None = typer.Option(
+        None, "--count", help="Count totals: exact, capped or estimate."
+    ),
     as_json: bool = typer.Option(
         False, "--json", help="Emit JSON to stdout."
     ),
@@ -166,6 +172,8 @@ def search(
         "filing_year": filing_year,
         "page": page,
         "page_size": page_size,
+        "cursor": cursor,
+        "count": count,
     }
     data = _call(
         ctx, as_json, lambda c: c.get("/api/v1/search", params=params)
@@ -174,10 +182,15 @@ def search(
         _emit_json(data)
     else:
         total = data.get("total", 0)
-        typer.echo(
-            f"{total} result(s), page {data.get('page')}/"
-            f"{data.get('total_pages')}"
-        )
+        if not data.get("total_is_exact", True):
+            total = f"{total:,}+"
+        if cursor:
+            typer.echo(f"{total} result(s)")
+        else:
+            typer.echo(
+                f"{total} result(s), page {data.get('page')}/"
+                f"{data.get('total_pages')}"
+            )
         for item in data.get("items", []):
             rev = item.get("latest_revenue")
             rev_str = f"${rev:,}" if rev is not None else "—"
@@ -185,6 +198,8 @@ def search(
                 f"  {item.get('ein')}  {item.get('name')}  "
                 f"[{item.get('state') or '—'}]  {rev_str}"
             )
+        if data.get("next_cursor"):
+            typer.echo(f"next: --cursor {data['next_cursor']}")
 
 
 @app.command()
@@ -0,0 +1,186 @@
+"""Cache for search results: Redis, with an in-process fallback.
+
+Entries live under ``beacon:search:<namespace>:<digest of key>`` together
+with the cache generation they were computed under. The generation is a
+counter in Redis that ingestion bumps once new filings are loaded (see
+:func:`bump_generation`); an entry from an older generation reads as a
+miss, so nothing has to be deleted. While Redis cannot be reached, entries
+go to a small in-process LRU instead, which only their TTL invalidates,
+and Redis is tried again after ``REDIS_RETRY_SECONDS``.
+"""
+
+import hashlib
+import logging
+import time
+from collections import Counter, OrderedDict
+from collections.abc import Awaitable, Callable
+
+import redis
+import redis.asyncio
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "beacon:search"
+GENERATION_KEY = f"{KEY_PREFIX}:generation"
+
+# Entries kept in-process while Redis is unavailable
+LOCAL_CACHE_SIZE = 1024
+
+# A cache must never be slower than the query it saves: Redis calls time
+# out quickly, and after a failure Redis is left alone for a while
+REDIS_TIMEOUT_SECONDS = 0.25
+REDIS_RETRY_SECONDS = 30
+
+
+def bump_generation(url: str | None = None) -> int | None:
+    """Invalidate every cached search result, from outside the API.
+
+    ``url`` defaults to ``REDIS_URL``. Returns the new generation, or None
+    when no Redis is configured.
+    """
+    url = settings.REDIS_URL if url is None else url
+    if not url:
+        return None
+    client = redis.Redis.from_url(
+        url,
+        socket_timeout=REDIS_TIMEOUT_SECONDS,
+        socket_connect_timeout=REDIS_TIMEOUT_SECONDS,
+    )
+    with client:
+        return client.incr(GENERATION_KEY)
+
+
+class ResultCache:
+    """Search results by key, in Redis when it can be reached.
+
+    ``client`` is a ``redis.asyncio`` client, or None to keep everything
+    in-process. ``stats`` counts hits and misses per namespace, and Redis
+    errors.
+    """
+
+    def __init__(
+        self,
+        client: redis.asyncio.Redis | None,
+        local_size: int = LOCAL_CACHE_SIZE,
+    ):
+        self.client = client
+        self.local_size = local_size
+        self.stats: Counter[str] = Counter()
+        self._local: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._retry_at = 0.0
+
+    @classmethod
+    def from_url(cls, url: str) -> "ResultCache":
+        if not url:
+            return cls(None)
+        client = redis.asyncio.Redis.from_url(
+            url,
+            socket_timeout=REDIS_TIMEOUT_SECONDS,
+            socket_connect_timeout=REDIS_TIMEOUT_SECONDS,
+        )
+        return cls(client)
+
+    @property
+    def backend(self) -> str:
+        return "redis" if self._redis_up() else "local"
+
+    async def cached[T](
+        self,
+        namespace: str,
+        key: str,
+        ttl: int,
+        adapter: TypeAdapter[T],
+        compute: Callable[[], Awaitable[T]],
+    ) -> T:
+        """The value cached for ``key``, or ``compute()``'s, cached for ``ttl``.
+
+        Values are stored as JSON by ``adapter``. A ``ttl`` of 0 turns the
+        cache off for the namespace.
+        """
+        if ttl <= 0:
+            return await compute()
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        entry_key = f"{KEY_PREFIX}:{namespace}:{digest}"
+
+        generation, raw = await self._get(entry_key)
+        if raw is not None:
+            self.stats[f"{namespace}_hits"] += 1
+            return adapter.validate_json(raw)
+        self.stats[f"{namespace}_misses"] += 1
+
+        # Stored under the generation read before computing, so a result
+        # that straddles an invalidation is not served afterwards
+        value = await compute()
+        await self._set(entry_key, generation, adapter.dump_json(value), ttl)
+        return value
+
+    async def invalidate(self) -> None:
+        """Drop every cached result, as ingestion does."""
+        self._local.clear()
+        if self._redis_up():
+            try:
+                await self.client.incr(GENERATION_KEY)
+            except redis.RedisError as exc:
+                self._redis_down(exc)
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+
+    async def _get(self, key: str) -> tuple[int | None, bytes | None]:
+        """(generation, raw value); the generation is None without Redis."""
+        if self._redis_up():
+            try:
+                current, entry = await self.client.mget(GENERATION_KEY, key)
+            except redis.RedisError as exc:
+                self._redis_down(exc)
+            else:
+                generation = int(current or 0)
+                if entry is not None:
+                    written, _, raw = entry.partition(b" ")
+                    if int(written) == generation:
+                        return generation, raw
+                return generation, None
+
+        entry = self._local.get(key)
+        if entry is None:
+            return None, None
+        expires, raw = entry
+        if expires < time.monotonic():
+            del self._local[key]
+            return None, None
+        self._local.move_to_end(key)
+        return None, raw
+
+    async def _set(
+        self, key: str, generation: int | None, raw: bytes, ttl: int
+    ) -> None:
+        if generation is not None:
+            try:
+                await self.client.set(key, b"%d %s" % (generation, raw), ex=ttl)
+                return
+            except redis.RedisError as exc:
+                self._redis_down(exc)
+
+        self._local[key] = (time.monotonic() + ttl, raw)
+        self._local.move_to_end(key)
+        while len(self._local) > self.local_size:
+            self._local.popitem(last=False)
+
+    def _redis_up(self) -> bool:
+        return self.client is not None and time.monotonic() >= self._retry_at
+
+    def _redis_down(self, exc: Exception) -> None:
+        self.stats["redis_errors"] += 1
+        self._retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+        logger.warning(
+            "Redis unavailable, caching in-process for %ds: %s",
+            REDIS_RETRY_SECONDS,
+            exc,
+        )
+
+
+cache = ResultCache.from_url(settings.REDIS_URL)
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -14,6 +16,18 @@ class Settings(BaseSettings):
     FRONTEND_URL: str = "http://localhost:3000"
     SENTRY_DSN: str = ""
     ENVIRONMENT: str = "development"
+    # Search totals: "exact", "capped" at SEARCH_COUNT_CAP, or planner "estimate"
+    SEARCH_COUNT_STRATEGY: Literal["exact", "capped", "estimate"] = "capped"
+    SEARCH_COUNT_CAP: int = 10_000
+    SEARCH_COUNT_CACHE_SECONDS: int = 300
+    # Cached search results and typeahead suggestions; 0 turns a cache off
+    SEARCH_CACHE_SECONDS: int = 60
+    TYPEAHEAD_CACHE_SECONDS: int = 300
+    # In-process typeahead index, off at 0 bytes. Opt-in: it ranks prefix
+    # matches first, so suggestions can differ from the database query
+    # (see app.services.typeahead_index)
+    TYPEAHEAD_INDEX_MAX_BYTES: int = 0
+    TYPEAHEAD_REFRESH_SECONDS: int = 60
 
 
 settings = Settings()
@@ -1,5 +1,6 @@
+import asyncio
 from collections.abc import AsyncIterator
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
 import sentry_sdk
 from fastapi import FastAPI, Request
@@ -7,8 +8,10 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from app.api import health, organizations, search, usage, users, webhooks
+from app.core.cache import cache
 from app.core.config import settings
 from app.core.database import engine
+from app.services.typeahead_index import maintain_index
 
 if settings.SENTRY_DSN:
     sentry_sdk.init(
@@ -21,7 +24,15 @@ if settings.SENTRY_DSN:
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    indexer = None
+    if settings.TYPEAHEAD_INDEX_MAX_BYTES:
+        indexer = asyncio.create_task(maintain_index())
     yield
+    if indexer is not None:
+        indexer.cancel()
+        with suppress(asyncio.CancelledError):
+            await indexer
+    await cache.close()
     await engine.dispose()
 
 
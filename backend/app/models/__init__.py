@@ -1,6 +1,18 @@
 from app.models.analytics import OrgScore, OrgSummary, UsageEvent
 from app.models.base import Base
-from app.models.organization import Filing, FilingGrant, FilingPerson, Organization
+from app.models.ingest import (
+    IngestBatch,
+    IngestDeadLetter,
+    IngestIndexSnapshot,
+    IngestRun,
+)
+from app.models.organization import (
+    Filing,
+    FilingGrant,
+    FilingPerson,
+    Organization,
+    OrgLatestFinancials,
+)
 from app.models.user import Team, TeamMember, User
 from app.models.watchlist import SavedSearch, Watchlist, WatchlistItem
 
@@ -10,6 +22,7 @@ __all__ = [
     "Filing",
     "FilingPerson",
     "FilingGrant",
+    "OrgLatestFinancials",
     "User",
     "Team",
     "TeamMember",
@@ -19,4 +32,8 @@ __all__ = [
     "UsageEvent",
     "OrgSummary",
     "OrgScore",
+    "IngestRun",
+    "IngestBatch",
+    "IngestDeadLetter",
+    "IngestIndexSnapshot",
 ]
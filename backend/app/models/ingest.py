@@ -0,0 +1,96 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import (
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+    UniqueConstraint,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, FullTimestampMixin, UUIDMixin
+
+
+class IngestRun(Base, UUIDMixin, FullTimestampMixin):
+    __tablename__ = "ingest_runs"
+
+    mode: Mapped[str] = mapped_column(String(20), nullable=False)
+    years: Mapped[list[int]] = mapped_column(ARRAY(Integer), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+    processed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    loaded: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    skipped: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    errors: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+
+
+class IngestBatch(Base, UUIDMixin, FullTimestampMixin):
+    __tablename__ = "ingest_batches"
+
+    year: Mapped[int] = mapped_column(Integer, nullable=False)
+    batch_id: Mapped[str] = mapped_column(String(100), nullable=False)
+    run_id: Mapped[uuid.UUID | None] = mapped_column(ForeignKey("ingest_runs.id"))
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+    entries: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    processed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    loaded: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    skipped: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    errors: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    completed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    # Job queue: claims by pipeline workers and retries of failed batches
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    claimed_by: Mapped[str | None] = mapped_column(String(200))
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    available_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    last_error: Mapped[str | None] = mapped_column(Text)
+
+    __table_args__ = (
+        UniqueConstraint("year", "batch_id", name="uq_ingest_batch"),
+        Index("idx_ingest_batch_status", "status"),
+    )
+
+
+class IngestDeadLetter(Base, UUIDMixin, FullTimestampMixin):
+    __tablename__ = "ingest_dead_letters"
+
+    object_id: Mapped[str] = mapped_column(String(50), nullable=False)
+    year: Mapped[int] = mapped_column(Integer, nullable=False)
+    batch_id: Mapped[str] = mapped_column(String(100), nullable=False)
+    ein: Mapped[str] = mapped_column(String(10), nullable=False)
+    return_type: Mapped[str] = mapped_column(String(10), nullable=False)
+    run_id: Mapped[uuid.UUID | None] = mapped_column(ForeignKey("ingest_runs.id"))
+    stage: Mapped[str] = mapped_column(String(20), nullable=False)
+    error_class: Mapped[str] = mapped_column(String(200), nullable=False)
+    error: Mapped[str] = mapped_column(Text, nullable=False)
+    traceback: Mapped[str | None] = mapped_column(Text)
+    # zlib-compressed filing XML
+    xml: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    xml_size: Mapped[int] = mapped_column(Integer, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    resolved_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+
+    __table_args__ = (
+        UniqueConstraint("object_id", name="uq_dead_letter_object"),
+        Index("idx_dead_letter_resolved", "resolved_at"),
+    )
+
+
+class IngestIndexSnapshot(Base, UUIDMixin, FullTimestampMixin):
+    __tablename__ = "ingest_index_snapshots"
+
+    year: Mapped[int] = mapped_column(Integer, nullable=False)
+    batch_id: Mapped[str] = mapped_column(String(100), nullable=False)
+    run_id: Mapped[uuid.UUID | None] = mapped_column(ForeignKey("ingest_runs.id"))
+    entries: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Order-independent digest of the batch's object_ids in the index
+    digest: Mapped[str] = mapped_column(String(32), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("year", "batch_id", name="uq_index_snapshot"),
+    )
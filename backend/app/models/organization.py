@@ -1,15 +1,17 @@
 import uuid
-from datetime import date
+from datetime import date, datetime
 
 from sqlalchemy import (
     BigInteger,
     Boolean,
     Date,
+    DateTime,
     ForeignKey,
     Index,
     Integer,
     String,
     Text,
+    func,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -32,6 +34,7 @@ class Organization(Base, UUIDMixin, FullTimestampMixin):
         Index("idx_org_ein", "ein"),
         Index("idx_org_state", "state"),
         Index("idx_org_ntee", "ntee_code"),
+        Index("idx_org_updated_at", "updated_at"),
         Index(
             "idx_org_name_trgm",
             "name",
@@ -76,6 +79,38 @@ class Filing(Base, UUIDMixin, TimestampMixin):
     )
 
 
+class OrgLatestFinancials(Base):
+    """Financials of each organization's latest filing, for search.
+
+    Kept up to date by everything that writes filings; see
+    :mod:`app.services.latest_financials`.
+    """
+
+    __tablename__ = "org_latest_financials"
+
+    organization_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True
+    )
+    filing_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("filings.id", ondelete="CASCADE"), nullable=False
+    )
+    tax_year: Mapped[int] = mapped_column(Integer, nullable=False)
+    total_revenue: Mapped[int | None] = mapped_column(BigInteger)
+    total_expenses: Mapped[int | None] = mapped_column(BigInteger)
+    net_assets: Mapped[int | None] = mapped_column(BigInteger)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+
+    __table_args__ = (
+        Index("idx_latest_revenue", "total_revenue"),
+        Index("idx_latest_net_assets", "net_assets"),
+        Index("idx_latest_tax_year", "tax_year"),
+    )
+
+
 class FilingPerson(Base, UUIDMixin):
     __tablename__ = "filing_people"
 
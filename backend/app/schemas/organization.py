@@ -1,3 +1,4 @@
+from typing import Literal
 from uuid import UUID
 
 from pydantic import BaseModel
@@ -18,6 +19,10 @@ class OrganizationSearchResult(BaseModel):
     model_config = {"from_attributes": True}
 
 
+# How search totals are counted; see app.services.search._count
+CountStrategy = Literal["exact", "capped", "estimate"]
+
+
 class SearchFilters(BaseModel):
     q: str = ""
     state: str | None = None
@@ -29,14 +34,18 @@ class SearchFilters(BaseModel):
     filing_year: int | None = None
     page: int = 1
     page_size: int = 20
+    cursor: str | None = None
+    count: CountStrategy | None = None
 
 
 class PaginatedResults[T](BaseModel):
     items: list[T]
     total: int
+    total_is_exact: bool = True
     page: int
     page_size: int
     total_pages: int
+    next_cursor: str | None = None
 
 
 class TypeaheadResult(BaseModel):
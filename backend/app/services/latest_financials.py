@@ -0,0 +1,61 @@
+"""Upkeep of ``org_latest_financials``, the latest filing per organization.
+
+Search filters on the revenue, net assets and tax year of each
+organization's latest filing. Instead of ranking all filings on every
+request, those values live in one indexed row per organization. Whatever
+writes filings (the ingestion loaders, the seed script, test factories)
+runs :func:`refresh_latest_financials` for the organizations it touched,
+in the same transaction.
+"""
+
+from sqlalchemy import Select, func, select, tuple_
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlalchemy.orm import aliased
+
+from app.models.organization import Filing, OrgLatestFinancials
+
+_VALUE_COLUMNS = (
+    "filing_id",
+    "tax_year",
+    "total_revenue",
+    "total_expenses",
+    "net_assets",
+)
+
+
+def refresh_latest_financials(organization_ids: list | Select) -> Insert:
+    """Statement recomputing the latest-filing rows of ``organization_ids``.
+
+    ``organization_ids`` is a list of ids or a select returning them. The
+    latest filing has the highest tax year, then the highest object_id
+    (the IRS numbers submissions in order, so an amended return wins).
+    Rows that would not change are left alone.
+    """
+    newest = aliased(Filing)
+    latest_id = (
+        select(newest.id)
+        .where(newest.organization_id == Filing.organization_id)
+        .order_by(newest.tax_year.desc(), newest.object_id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    latest = select(
+        Filing.organization_id,
+        Filing.id,
+        Filing.tax_year,
+        Filing.total_revenue,
+        Filing.total_expenses,
+        Filing.net_assets,
+    ).where(Filing.organization_id.in_(organization_ids), Filing.id == latest_id)
+    stmt = insert(OrgLatestFinancials).from_select(
+        ["organization_id", *_VALUE_COLUMNS], latest
+    )
+    table = OrgLatestFinancials.__table__
+    new = {c: stmt.excluded[c] for c in _VALUE_COLUMNS}
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.organization_id],
+        set_={**new, "updated_at": func.now()},
+        where=tuple_(*(table.c[c] for c in _VALUE_COLUMNS)).is_distinct_from(
+            tuple_(*new.values())
+        ),
+    )
@@ -1,37 +1,154 @@
-from sqlalchemy import and_, func, select
+import base64
+import binascii
+import json
+from uuid import UUID
+
+from pydantic import TypeAdapter
+from sqlalchemy import Select, and_, func, null, or_, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
 
-from app.models.organization import Filing, Organization
+from app.core.cache import cache
+from app.core.config import settings
+from app.models.organization import Organization, OrgLatestFinancials
 from app.schemas.organization import (
+    CountStrategy,
     OrganizationSearchResult,
     PaginatedResults,
     SearchFilters,
     TypeaheadResult,
 )
+from app.services import typeahead_index
+
+# How cached values are stored
+_RESULTS = TypeAdapter(PaginatedResults[OrganizationSearchResult])
+_TOTAL = TypeAdapter(tuple[int, bool])
+_SUGGESTIONS = TypeAdapter(list[TypeaheadResult])
+
+
+class InvalidCursorError(ValueError):
+    """A search cursor that could not be decoded for the given filters."""
+
+
+def encode_cursor(key: list) -> str:
+    """Opaque cursor for the sort key of the last row of a page."""
+    raw = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, ranked: bool) -> tuple[float | None, str, UUID]:
+    """Sort key (similarity, name, id) from a cursor.
+
+    ``ranked`` says whether the search orders by similarity, i.e. has a
+    query; a cursor from a search that did not is rejected, as its key
+    cannot be compared.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+        if ranked:
+            similarity, name, org_id = key
+            similarity = float(similarity)
+        else:
+            similarity, (name, org_id) = None, key
+        if not isinstance(name, str):
+            raise ValueError(name)
+        return similarity, name, UUID(org_id)
+    except (binascii.Error, TypeError, ValueError) as exc:
+        raise InvalidCursorError("invalid cursor") from exc
+
+
+class _Explain(Executable, ClauseElement):
+    """``EXPLAIN (FORMAT JSON)`` of a select, keeping its bound parameters."""
+
+    inherit_cache = False
+
+    def __init__(self, stmt: Select):
+        self.stmt = stmt
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.stmt, **kw)
+
+
+def normalize_query(q: str) -> str:
+    """``q`` as searched and cached.
+
+    Trigram matching ignores case and spacing, so queries differing only
+    in those are one query; a blank one is no query at all.
+    """
+    return " ".join(q.lower().split())
+
+
+def filters_key(filters: SearchFilters, *exclude: str) -> str:
+    """Cache key for ``filters``, leaving out the fields in ``exclude``."""
+    return json.dumps(filters.model_dump(exclude=set(exclude)), sort_keys=True)
+
+
+async def _count(
+    db: AsyncSession, query: Select, strategy: CountStrategy, cap: int
+) -> tuple[int, bool]:
+    """Total rows of ``query`` as (total, is_exact), by ``strategy``.
+
+    ``exact`` counts every row. ``capped`` stops counting past ``cap``
+    rows and reports ``cap``, not exact, for anything larger. ``estimate``
+    asks the planner first and only counts (capped) when it expects
+    fewer than ``cap`` rows, so an unselective search is not counted at
+    all.
+    """
+    query = query.order_by(None)
+    if strategy == "estimate":
+        plan = (await db.execute(_Explain(query))).scalar_one()
+        if plan[0]["Plan"]["Plan Rows"] >= cap:
+            return cap, False
+    if strategy != "exact":
+        query = query.limit(cap + 1)
+    count_query = select(func.count()).select_from(query.subquery())
+    total = (await db.execute(count_query)).scalar() or 0
+    if strategy != "exact" and total > cap:
+        return cap, False
+    return total, True
 
 
 async def search_organizations(
     db: AsyncSession, filters: SearchFilters
 ) -> PaginatedResults[OrganizationSearchResult]:
-    """Full search with filters, pagination, and latest filing data."""
-    # Subquery for the latest filing per organization
-    latest_filing_sq = (
-        select(
-            Filing.organization_id,
-            Filing.total_revenue,
-            Filing.total_expenses,
-            Filing.net_assets,
-            Filing.tax_year,
-            func.row_number()
-            .over(
-                partition_by=Filing.organization_id,
-                order_by=Filing.tax_year.desc(),
-            )
-            .label("rn"),
-        )
-    ).subquery()
+    """Full search with filters, pagination, and latest filing data.
+
+    Pages are read by offset from ``filters.page``, or, given
+    ``filters.cursor`` (the ``next_cursor`` of the page before), by
+    seeking past the last row of the previous page, which stays as fast
+    however deep the page is.
+
+    ``total`` is counted as ``filters.count`` (or the
+    ``SEARCH_COUNT_STRATEGY`` setting) says, see :func:`_count`, and is
+    cached by the filters for ``SEARCH_COUNT_CACHE_SECONDS``. A page that
+    reaches the end of the results gives its total without counting.
+
+    ``filters.q`` is searched as :func:`normalize_query` gives it, and
+    results are cached by the filters for ``SEARCH_CACHE_SECONDS``, or
+    until ingestion loads new filings (see :mod:`app.core.cache`).
+    """
+    filters = filters.model_copy(update={"q": normalize_query(filters.q)})
+    return await cache.cached(
+        "search",
+        filters_key(filters),
+        settings.SEARCH_CACHE_SECONDS,
+        _RESULTS,
+        lambda: _search_organizations(db, filters),
+    )
+
 
-    # Main query: Organization LEFT JOIN latest filing (rn == 1)
+async def _search_organizations(
+    db: AsyncSession, filters: SearchFilters
+) -> PaginatedResults[OrganizationSearchResult]:
+    """Run a search, uncached; see :func:`search_organizations`."""
+    latest = OrgLatestFinancials
+    similarity = func.similarity(Organization.name, filters.q)
+
+    # Main query: Organization LEFT JOIN its latest filing's financials
     query = select(
         Organization.id,
         Organization.ein,
@@ -39,17 +156,12 @@ async def search_organizations(
         Organization.city,
         Organization.state,
         Organization.ntee_code,
-        latest_filing_sq.c.total_revenue.label("latest_revenue"),
-        latest_filing_sq.c.total_expenses.label("latest_expenses"),
-        latest_filing_sq.c.net_assets.label("latest_net_assets"),
-        latest_filing_sq.c.tax_year.label("latest_tax_year"),
-    ).outerjoin(
-        latest_filing_sq,
-        and_(
-            latest_filing_sq.c.organization_id == Organization.id,
-            latest_filing_sq.c.rn == 1,
-        ),
-    )
+        latest.total_revenue.label("latest_revenue"),
+        latest.total_expenses.label("latest_expenses"),
+        latest.net_assets.label("latest_net_assets"),
+        latest.tax_year.label("latest_tax_year"),
+        (similarity if filters.q else null()).label("similarity"),
+    ).outerjoin(latest, latest.organization_id == Organization.id)
 
     # Build filter conditions
     conditions = []
@@ -60,38 +172,75 @@ async def search_organizations(
     if filters.ntee_code:
         conditions.append(Organization.ntee_code == filters.ntee_code)
     if filters.min_revenue is not None:
-        conditions.append(latest_filing_sq.c.total_revenue >= filters.min_revenue)
+        conditions.append(latest.total_revenue >= filters.min_revenue)
     if filters.max_revenue is not None:
-        conditions.append(latest_filing_sq.c.total_revenue <= filters.max_revenue)
+        conditions.append(latest.total_revenue <= filters.max_revenue)
     if filters.min_assets is not None:
-        conditions.append(latest_filing_sq.c.net_assets >= filters.min_assets)
+        conditions.append(latest.net_assets >= filters.min_assets)
     if filters.max_assets is not None:
-        conditions.append(latest_filing_sq.c.net_assets <= filters.max_assets)
+        conditions.append(latest.net_assets <= filters.max_assets)
     if filters.filing_year is not None:
-        conditions.append(latest_filing_sq.c.tax_year == filters.filing_year)
+        conditions.append(latest.tax_year == filters.filing_year)
 
     if conditions:
         query = query.where(and_(*conditions))
 
-    # Order by similarity when searching, otherwise alphabetical
+    # Order by similarity when searching, otherwise alphabetical; the id
+    # breaks ties so every row has a distinct key to seek past
     if filters.q:
-        query = query.order_by(
-            func.similarity(Organization.name, filters.q).desc()
-        )
+        query = query.order_by(similarity.desc(), Organization.name, Organization.id)
     else:
-        query = query.order_by(Organization.name)
+        query = query.order_by(Organization.name, Organization.id)
 
-    # Count total results
-    count_query = select(func.count()).select_from(query.subquery())
-    total = (await db.execute(count_query)).scalar() or 0
+    # What the total counts: every row the filters match
+    counted = query
 
-    # Paginate
-    offset = (filters.page - 1) * filters.page_size
-    query = query.offset(offset).limit(filters.page_size)
+    # Paginate, reading one row more to tell whether a next page exists
+    offset = 0
+    if filters.cursor:
+        last_similarity, last_name, last_id = decode_cursor(
+            filters.cursor, ranked=bool(filters.q)
+        )
+        after = tuple_(Organization.name, Organization.id) > tuple_(last_name, last_id)
+        if filters.q:
+            after = or_(
+                similarity < last_similarity,
+                and_(similarity == last_similarity, after),
+            )
+        query = query.where(after)
+    else:
+        offset = (filters.page - 1) * filters.page_size
+        query = query.offset(offset)
+    query = query.limit(filters.page_size + 1)
 
     result = await db.execute(query)
     rows = result.all()
 
+    # Count total results, unless this page already shows where they end
+    strategy = filters.count or settings.SEARCH_COUNT_STRATEGY
+    ended = len(rows) <= filters.page_size and (rows or offset == 0)
+    if not filters.cursor and ended:
+        total, total_is_exact = offset + len(rows), True
+    elif strategy == "exact":
+        total, total_is_exact = await _count(
+            db, counted, strategy, settings.SEARCH_COUNT_CAP
+        )
+    else:
+        total, total_is_exact = await cache.cached(
+            "count",
+            strategy + filters_key(filters, "page", "page_size", "cursor", "count"),
+            settings.SEARCH_COUNT_CACHE_SECONDS,
+            _TOTAL,
+            lambda: _count(db, counted, strategy, settings.SEARCH_COUNT_CAP),
+        )
+
+    next_cursor = None
+    if len(rows) > filters.page_size:
+        rows = rows[: filters.page_size]
+        last = rows[-1]
+        key = [last.name, str(last.id)]
+        next_cursor = encode_cursor([last.similarity, *key] if filters.q else key)
+
     items = [
         OrganizationSearchResult(
             id=row.id,
@@ -113,19 +262,40 @@ async def search_organizations(
     return PaginatedResults(
         items=items,
         total=total,
+        total_is_exact=total_is_exact,
         page=filters.page,
         page_size=filters.page_size,
         total_pages=total_pages,
+        next_cursor=next_cursor,
     )
 
 
 async def typeahead(
     db: AsyncSession, q: str, limit: int = 10
 ) -> list[TypeaheadResult]:
-    """Fast typeahead search on organization names only."""
+    """Fast typeahead search on organization names only.
+
+    Served from the in-process typeahead index, when it is turned on and
+    built (see :mod:`app.services.typeahead_index` for how its
+    suggestions differ). Otherwise suggestions come from the database and
+    are cached like search results, for ``TYPEAHEAD_CACHE_SECONDS``.
+    """
+    q = normalize_query(q)
     if len(q) < 2:
         return []
+    rows = typeahead_index.search(q, limit)
+    if rows is not None:
+        return [TypeaheadResult.model_validate(row) for row in rows]
+    return await cache.cached(
+        "typeahead",
+        json.dumps([q, limit]),
+        settings.TYPEAHEAD_CACHE_SECONDS,
+        _SUGGESTIONS,
+        lambda: _typeahead(db, q, limit),
+    )
+
 
+async def _typeahead(db: AsyncSession, q: str, limit: int) -> list[TypeaheadResult]:
     query = (
         select(Organization)
         .where(Organization.name.op("%")(q))
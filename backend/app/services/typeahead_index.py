@@ -0,0 +1,368 @@
+"""In-process typeahead index over organization names.
+
+Typeahead runs on every keystroke, so instead of a trigram query against
+Postgres it is answered from memory by a :class:`TypeaheadIndex`:
+
+- a name array sorted by the lowercased name, which a prefix is looked up
+  in by binary search, and
+- a posting list of documents per trigram, extracted the way pg_trgm
+  does, from which names as similar to the query as the ``%`` operator
+  requires are found without looking at every name.
+
+Names starting with the query come first, in name order, then the most
+similar other names. Suggestions can therefore differ from the database
+query, which keeps only names matching ``%`` and orders them all by
+``similarity()``: a short prefix brings up names too dissimilar for
+``%``, in another order. The index also applies the default 0.3
+threshold, not the database's ``pg_trgm.similarity_threshold``.
+
+The index is opt-in, since it holds every organization name in each API
+process. With ``TYPEAHEAD_INDEX_MAX_BYTES`` set it is built from
+``organizations`` when the API starts (see :func:`maintain_index`), off
+the event loop, and then refreshed every ``TYPEAHEAD_REFRESH_SECONDS``
+with the organizations ingestion added or changed. It is dropped, and
+typeahead goes back to the database, when it would take more than
+``TYPEAHEAD_INDEX_MAX_BYTES``.
+Organizations deleted from the database stay in the index until the API
+restarts; ingestion never deletes any.
+"""
+
+import asyncio
+import bisect
+import heapq
+import itertools
+import logging
+import math
+import re
+import sys
+import uuid
+from array import array
+from collections import Counter
+from collections.abc import Iterable, Iterator, Sequence
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.database import async_session_factory
+from app.models.organization import Organization
+
+logger = logging.getLogger(__name__)
+
+# What the % operator requires: pg_trgm.similarity_threshold's default
+SIMILARITY_THRESHOLD = 0.3
+
+# Organizations read from the database at a time
+FETCH_SIZE = 10_000
+
+# Names added since the index was built are kept in a small sorted list
+# beside the main array; past this many of them, or once a tenth of the
+# documents have been replaced, the index is rebuilt
+RECENT_MAX = 20_000
+
+# A refresh re-reads organizations updated this long before the newest one
+# it has seen, so rows committed late by a long ingestion transaction are
+# not missed
+REFRESH_OVERLAP = timedelta(minutes=5)
+
+# Rough bytes per document besides its name and postings (its id, EIN, id
+# map entry and places in the arrays), and per distinct trigram
+_DOC_BYTES = 240
+_TRIGRAM_BYTES = 120
+
+_WORD = re.compile(r"[^\W_]+")
+_NO_POSTINGS = array("I")
+
+
+class IndexBudgetError(Exception):
+    """The index would take more memory than it is allowed."""
+
+
+class TypeaheadRow(NamedTuple):
+    id: uuid.UUID
+    ein: str
+    name: str
+    city: str | None
+    state: str | None
+
+
+def trigrams(text: str) -> set[str]:
+    """The trigrams pg_trgm extracts from ``text``.
+
+    Words are runs of letters and digits, lowercased, and padded with two
+    spaces in front and one behind.
+    """
+    found = set()
+    for word in _WORD.findall(text.lower()):
+        padded = f"  {word} "
+        found.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return found
+
+
+def _fold(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _contains(postings: array, doc: int) -> bool:
+    i = bisect.bisect_left(postings, doc)
+    return i < len(postings) and postings[i] == doc
+
+
+class TypeaheadIndex:
+    """Organization names, searchable by prefix and by trigram similarity.
+
+    Documents are numbered in the order they are added and never
+    renumbered: their fields are kept in parallel arrays, and a changed
+    organization is added again as a new document while the old one is
+    marked dead. Documents added by :meth:`add_rows` become searchable
+    with :meth:`seal`; those added later by :meth:`update` right away.
+    ``nbytes`` is an estimate of the memory taken, kept under
+    ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        # Newest updated_at added, where the next refresh picks up
+        self.watermark: datetime | None = None
+
+        self._ids = bytearray()
+        self._eins: list[str] = []
+        self._names: list[str] = []
+        self._cities: list[str | None] = []
+        self._states: list[str | None] = []
+        self._sizes = array("H")
+        self._alive = bytearray()
+        self._doc_of: dict[bytes, int] = {}
+        self._dead = 0
+
+        self._postings: dict[str, array] = {}
+        self._order = array("I")
+        self._recent: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self._names) - self._dead
+
+    @property
+    def needs_rebuild(self) -> bool:
+        return len(self._recent) > RECENT_MAX or self._dead * 10 > len(self._names)
+
+    def add_rows(self, rows: Iterable) -> None:
+        """Add organizations (rows with the fields of a TypeaheadRow and
+        ``updated_at``) while building."""
+        for row in rows:
+            self._add(row)
+
+    def seal(self) -> None:
+        """Sort the names added so far; run once, after the last add_rows."""
+        self._order = array("I", sorted(range(len(self._names)), key=self._key))
+
+    def update(self, rows: Iterable) -> int:
+        """Apply new or changed organizations. Returns how many changed."""
+        changed = 0
+        for row in rows:
+            doc = self._doc_of.get(row.id.bytes)
+            if doc is not None:
+                current = (
+                    self._eins[doc],
+                    self._names[doc],
+                    self._cities[doc],
+                    self._states[doc],
+                )
+                if current == (row.ein, row.name, row.city, row.state):
+                    self._see(row.updated_at)
+                    continue
+                self._alive[doc] = 0
+                self._dead += 1
+            bisect.insort(self._recent, self._add(row), key=self._key)
+            changed += 1
+        return changed
+
+    def search(self, q: str, limit: int = 10) -> list[TypeaheadRow]:
+        """Names starting with ``q``, then the names most similar to it."""
+        docs = list(itertools.islice(self._prefixed(_fold(q)), limit))
+        if len(docs) < limit:
+            taken = set(docs)
+            similar = (doc for doc in self._similar(q) if doc not in taken)
+            docs += itertools.islice(similar, limit - len(docs))
+        return [self._row(doc) for doc in docs]
+
+    def _add(self, row) -> int:
+        doc = len(self._names)
+        found = trigrams(row.name)
+        self.nbytes += _DOC_BYTES + sys.getsizeof(row.name) + 4 * len(found)
+        if self.nbytes > self.max_bytes:
+            raise IndexBudgetError(
+                f"typeahead index over {self.max_bytes} bytes at {doc} names"
+            )
+        for trigram in found:
+            postings = self._postings.get(trigram)
+            if postings is None:
+                postings = self._postings[trigram] = array("I")
+                self.nbytes += _TRIGRAM_BYTES
+            postings.append(doc)
+
+        self._ids += row.id.bytes
+        self._eins.append(row.ein)
+        self._names.append(row.name)
+        self._cities.append(None if row.city is None else sys.intern(row.city))
+        self._states.append(None if row.state is None else sys.intern(row.state))
+        self._sizes.append(min(len(found), 0xFFFF))
+        self._alive.append(1)
+        self._doc_of[row.id.bytes] = doc
+        self._see(row.updated_at)
+        return doc
+
+    def _see(self, updated_at: datetime) -> None:
+        if self.watermark is None or updated_at > self.watermark:
+            self.watermark = updated_at
+
+    def _key(self, doc: int) -> str:
+        return _fold(self._names[doc])
+
+    def _row(self, doc: int) -> TypeaheadRow:
+        return TypeaheadRow(
+            uuid.UUID(bytes=bytes(self._ids[16 * doc : 16 * doc + 16])),
+            self._eins[doc],
+            self._names[doc],
+            self._cities[doc],
+            self._states[doc],
+        )
+
+    def _prefixed(self, prefix: str) -> Iterator[int]:
+        """Live documents whose name starts with ``prefix``, in name order."""
+        runs = []
+        for docs in (self._order, self._recent):
+            start = bisect.bisect_left(docs, prefix, key=self._key)
+            run = itertools.islice(docs, start, None)
+            runs.append(
+                itertools.takewhile(lambda d: self._key(d).startswith(prefix), run)
+            )
+        for doc in heapq.merge(*runs, key=self._key):
+            if self._alive[doc]:
+                yield doc
+
+    def _similar(self, q: str) -> list[int]:
+        """Live documents at least SIMILARITY_THRESHOLD similar to ``q``,
+        most similar first."""
+        query = trigrams(q)
+        n = len(query)
+        if not n:
+            return []
+        lists = sorted(
+            (self._postings.get(trigram, _NO_POSTINGS) for trigram in query),
+            key=len,
+        )
+        # Sharing ``need`` of the query's trigrams is the least a similar
+        # name can do, so each of them is in one of the rarest lists
+        # (all but need - 1 of them); the longer lists are only probed
+        need = max(1, math.ceil(SIMILARITY_THRESHOLD * n - 1e-9))
+        rare, common = lists[: n - need + 1], lists[n - need + 1 :]
+        shared: Counter[int] = Counter()
+        for postings in rare:
+            shared.update(postings)
+
+        scored = []
+        for doc, count in shared.items():
+            size = self._sizes[doc]
+            best = count + len(common)
+            if best < SIMILARITY_THRESHOLD * (n + size - best):
+                continue
+            count += sum(_contains(postings, doc) for postings in common)
+            similarity = count / (n + size - count)
+            if similarity >= SIMILARITY_THRESHOLD and self._alive[doc]:
+                scored.append((-similarity, self._key(doc), doc))
+        scored.sort()
+        return [doc for _, _, doc in scored]
+
+
+# The index being served; None until built, and once over budget
+index: TypeaheadIndex | None = None
+
+
+def _organizations(since: datetime | None = None):
+    query = select(
+        Organization.id,
+        Organization.ein,
+        Organization.name,
+        Organization.city,
+        Organization.state,
+        Organization.updated_at,
+    )
+    if since is not None:
+        query = query.where(Organization.updated_at >= since - REFRESH_OVERLAP)
+    return query.execution_options(yield_per=FETCH_SIZE)
+
+
+async def build_index(
+    session_factory: async_sessionmaker[AsyncSession], max_bytes: int
+) -> TypeaheadIndex:
+    """Build an index of every organization.
+
+    The names are indexed on a worker thread, a chunk at a time as they
+    are read, so the event loop keeps serving meanwhile.
+    """
+    built = TypeaheadIndex(max_bytes)
+    async with session_factory() as db:
+        result = await db.stream(_organizations())
+        async for rows in result.partitions():
+            await asyncio.to_thread(built.add_rows, rows)
+    await asyncio.to_thread(built.seal)
+    return built
+
+
+async def refresh_index(
+    current: TypeaheadIndex, session_factory: async_sessionmaker[AsyncSession]
+) -> int:
+    """Apply organizations updated since the index last saw one.
+
+    Runs on the event loop, between searches. Returns how many changed.
+    """
+    changed = 0
+    async with session_factory() as db:
+        result = await db.stream(_organizations(current.watermark))
+        async for rows in result.partitions():
+            changed += current.update(rows)
+            await asyncio.sleep(0)
+    return changed
+
+
+async def maintain_index(
+    session_factory: async_sessionmaker[AsyncSession] = async_session_factory,
+) -> None:
+    """Build the typeahead index, then keep it current until cancelled.
+
+    Once the index goes over budget it is dropped for good, and typeahead
+    is served from the database.
+    """
+    global index
+    max_bytes = settings.TYPEAHEAD_INDEX_MAX_BYTES
+    while True:
+        try:
+            if index is None or index.needs_rebuild:
+                index = await build_index(session_factory, max_bytes)
+                logger.info(
+                    "Typeahead index built: %d names, ~%d MB",
+                    len(index),
+                    index.nbytes // 2**20,
+                )
+            else:
+                changed = await refresh_index(index, session_factory)
+                if changed:
+                    logger.info("Typeahead index refreshed: %d names", changed)
+        except IndexBudgetError as exc:
+            index = None
+            logger.warning("Typeahead served from the database: %s", exc)
+            return
+        except Exception:
+            logger.exception("Typeahead index update failed")
+        await asyncio.sleep(settings.TYPEAHEAD_REFRESH_SECONDS)
+
+
+def search(q: str, limit: int) -> Sequence[TypeaheadRow] | None:
+    """Typeahead from the index, or None while there is no index."""
+    if index is None:
+        return None
+    return index.search(q, limit)
@@ -0,0 +1,342 @@
+"""Synthetic IRS 990 corpus for the offline ingestion benchmarks.
+
+Generates 990, 990EZ and 990PF returns from the parser's own tag tables
+(``HEADER_XPATHS``, ``FIELD_MAPS``, ``PERSON_XPATHS``, ``GRANT_XPATHS``),
+each written with either the current or the pre-2013 tag names, and packs
+them into batch ZIPs with a matching ``index_{year}.csv`` in the IRS
+layout. Filing sizes and people/grant counts are heavy-tailed like the
+real corpus, and a small share of filings is large enough to take the
+streaming parse path. The output is deterministic for a given seed.
+Usage::
+
+    cd backend && uv run python -m benchmarks.corpus --out /tmp/990-corpus
+"""
+
+import argparse
+import csv
+import io
+import math
+import random
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from lxml import etree
+
+from scripts.ingest.config import STREAMING_PARSE_THRESHOLD_BYTES
+from scripts.ingest.xml_parser import (
+    FIELD_MAPS,
+    GRANT_XPATHS,
+    HEADER_XPATHS,
+    PERSON_XPATHS,
+)
+
+NAMESPACE = "http://www.irs.gov/efile"
+INDEX_COLUMNS = (
+    "RETURN_ID",
+    "FILING_TYPE",
+    "EIN",
+    "TAX_PERIOD",
+    "SUB_DATE",
+    "TAXPAYER_NAME",
+    "RETURN_TYPE",
+    "DLN",
+    "OBJECT_ID",
+    "XML_BATCH_ID",
+)
+
+# Share of each return type, and of filings using the old tag names
+FORM_MIX = (("990", 0.60), ("990EZ", 0.25), ("990PF", 0.15))
+OLD_SCHEMA_FRACTION = 0.3
+# Share of filings past the streaming-parse threshold
+LARGE_FRACTION = 0.002
+# Share of filings by an organization seen earlier in the corpus
+REPEAT_EIN_FRACTION = 0.1
+# Median size of the schedule text the parser skips over, in bytes
+FILLER_MEDIAN_BYTES = 12_000
+
+_WORDS = (
+    "program", "services", "community", "education", "health", "youth",
+    "housing", "support", "grants", "families", "research", "arts",
+    "foundation", "scholarship", "outreach", "annual", "operating", "capital",
+    "endowment", "volunteer", "regional", "national",
+)  # fmt: skip
+_CITIES = (
+    ("COLUMBUS", "OH"),
+    ("CHICAGO", "IL"),
+    ("AUSTIN", "TX"),
+    ("SEATTLE", "WA"),
+    ("BOSTON", "MA"),
+    ("DENVER", "CO"),
+    ("ATLANTA", "GA"),
+    ("PORTLAND", "OR"),
+)
+_TITLES = ("PRESIDENT", "TREASURER", "SECRETARY", "DIRECTOR", "TRUSTEE", "CEO")
+
+
+@dataclass
+class CorpusStats:
+    filings: int = 0
+    batches: int = 0
+    xml_bytes: int = 0
+    people: int = 0
+    grants: int = 0
+    large: int = 0
+    forms: dict[str, int] = field(default_factory=dict)
+
+
+class _Doc:
+    """Builds one return, creating path elements on first use."""
+
+    def __init__(self, return_version: str):
+        self.root = etree.Element(
+            f"{{{NAMESPACE}}}Return",
+            nsmap={None: NAMESPACE},
+            returnVersion=return_version,
+        )
+        self._nodes: dict[tuple[str, ...], etree._Element] = {(): self.root}
+
+    def node(self, path: tuple[str, ...]) -> etree._Element:
+        found = self._nodes.get(path)
+        if found is None:
+            parent = self.node(path[:-1])
+            found = etree.SubElement(parent, f"{{{NAMESPACE}}}{path[-1]}")
+            self._nodes[path] = found
+        return found
+
+    def set(self, xpath: str, value: str) -> None:
+        self.node(_steps(xpath)).text = value
+
+
+def _steps(xpath: str) -> tuple[str, ...]:
+    """``//Return/A/B`` -> ``("A", "B")``."""
+    return tuple(xpath.removeprefix("//").split("/")[1:])
+
+
+def _sub(parent: etree._Element, path: str, value: str) -> None:
+    for step in path.split("/"):
+        parent = etree.SubElement(parent, f"{{{NAMESPACE}}}{step}")
+    parent.text = value
+
+
+def _heavy_tail(rng: random.Random, scale: float, cap: int) -> int:
+    """Pareto-distributed count: mostly small, occasionally large."""
+    return min(int(scale * (rng.paretovariate(1.3) - 1)), cap)
+
+
+def _words(rng: random.Random, count: int) -> str:
+    return " ".join(rng.choices(_WORDS, k=count))
+
+
+def _filler(doc: _Doc, rng: random.Random, nbytes: int) -> None:
+    """Schedule O text the parser has to skip, about ``nbytes`` long."""
+    schedule = doc.node(("ReturnData", "IRS990ScheduleO"))
+    # ~600 bytes of markup and text per detail; fresh words keep the ZIP
+    # compression ratio near the real corpus
+    for _ in range(max(1, nbytes // 600)):
+        detail = etree.SubElement(
+            schedule, f"{{{NAMESPACE}}}SupplementalInformationDetail"
+        )
+        _sub(detail, "FormAndLineReferenceDesc", "PART III, LINE 4A")
+        _sub(detail, "ExplanationTxt", _words(rng, 60))
+
+
+def _variant(paths: list[str], old: bool) -> str:
+    return paths[min(int(old), len(paths) - 1)]
+
+
+def make_filing(
+    rng: random.Random,
+    ein: str,
+    name: str,
+    form: str,
+    tax_year: int,
+    old: bool,
+    large: bool = False,
+) -> tuple[bytes, int, int]:
+    """Generate one return. Returns (xml_bytes, people, grants)."""
+    doc = _Doc("2012v2.1" if old else "2023v5.0")
+    city, state = rng.choice(_CITIES)
+    header = {
+        "ein": ein,
+        "name": name,
+        "city": city,
+        "state": state,
+        "tax_year": str(tax_year),
+        "form_type": form,
+    }
+    for key, value in header.items():
+        doc.set(_variant(HEADER_XPATHS[key], old), value)
+
+    for key, paths in FIELD_MAPS[form].items():
+        if key == "mission_description":
+            value = _words(rng, rng.randint(8, 40)).capitalize()
+        elif key in ("num_employees", "num_volunteers"):
+            value = str(_heavy_tail(rng, 20, 50_000))
+        else:
+            value = str(_heavy_tail(rng, 250_000, 10**10))
+        doc.set(_variant(paths, old), value)
+
+    people = grants = 0
+    if form == "990":
+        people = _heavy_tail(rng, 8, 400) + 1
+        container = _steps(_variant(PERSON_XPATHS["container"], old))
+        parent = doc.node(container[:-1])
+        for i in range(people):
+            person = etree.SubElement(parent, f"{{{NAMESPACE}}}{container[-1]}")
+            _sub(person, _variant(PERSON_XPATHS["name"], old), f"PERSON {ein}-{i}")
+            _sub(person, _variant(PERSON_XPATHS["title"], old), rng.choice(_TITLES))
+            _sub(
+                person,
+                _variant(PERSON_XPATHS["compensation"], old),
+                str(_heavy_tail(rng, 40_000, 5_000_000)),
+            )
+            flag = "X" if not old else "1"
+            _sub(person, _variant(PERSON_XPATHS["is_director"], old), flag)
+            if i < 3:
+                _sub(person, _variant(PERSON_XPATHS["is_officer"], old), flag)
+    elif form == "990PF":
+        grants = _heavy_tail(rng, 15, 3000)
+        container = _steps(_variant(GRANT_XPATHS["container"], old))
+        parent = doc.node(container[:-1])
+        for i in range(grants):
+            grant = etree.SubElement(parent, f"{{{NAMESPACE}}}{container[-1]}")
+            recipient = 1 + int(old) if rng.random() < 0.8 else 0
+            _sub(grant, GRANT_XPATHS["recipient_name"][recipient], f"GRANTEE {i}")
+            rcity, rstate = rng.choice(_CITIES)
+            _sub(grant, _variant(GRANT_XPATHS["recipient_city"], old), rcity)
+            _sub(grant, _variant(GRANT_XPATHS["recipient_state"], old), rstate)
+            _sub(
+                grant,
+                _variant(GRANT_XPATHS["amount"], old),
+                str(_heavy_tail(rng, 5_000, 10**8) + 100),
+            )
+            _sub(grant, _variant(GRANT_XPATHS["purpose"], old), _words(rng, 4))
+
+    if large:
+        nbytes = STREAMING_PARSE_THRESHOLD_BYTES + rng.randint(1, 4) * 1024 * 1024
+    else:
+        nbytes = int(rng.lognormvariate(math.log(FILLER_MEDIAN_BYTES), 1.0))
+    _filler(doc, rng, nbytes)
+
+    xml = etree.tostring(doc.root, xml_declaration=True, encoding="utf-8")
+    return xml, people, grants
+
+
+def _pick_form(rng: random.Random) -> str:
+    roll = rng.random()
+    for form, share in FORM_MIX:
+        if roll < share:
+            return form
+        roll -= share
+    return FORM_MIX[-1][0]
+
+
+def generate(
+    out: Path,
+    filings: int,
+    batch_size: int = 500,
+    year: int = 2024,
+    seed: int = 990,
+    large_fraction: float = LARGE_FRACTION,
+) -> CorpusStats:
+    """Write ``filings`` returns as batch ZIPs plus ``index_{year}.csv``."""
+    rng = random.Random(seed)
+    out.mkdir(parents=True, exist_ok=True)
+    stats = CorpusStats()
+    index_rows: list[dict[str, str]] = []
+    eins: list[str] = []
+    zf: zipfile.ZipFile | None = None
+
+    for n in range(filings):
+        if n % batch_size == 0:
+            if zf is not None:
+                zf.close()
+            stats.batches += 1
+            batch_id = f"{year}_TEOS_XML_{stats.batches:02d}A"
+            zf = zipfile.ZipFile(out / f"{batch_id}.zip", "w", zipfile.ZIP_DEFLATED)
+
+        if eins and rng.random() < REPEAT_EIN_FRACTION:
+            ein = rng.choice(eins)
+        else:
+            ein = f"{rng.randrange(10**7, 10**9):09d}"
+            eins.append(ein)
+        name = f"{_words(rng, 3).upper()} {ein[-4:]}"
+        form = _pick_form(rng)
+        large = rng.random() < large_fraction
+        xml, people, grants = make_filing(
+            rng, ein, name, form, year - 1, rng.random() < OLD_SCHEMA_FRACTION, large
+        )
+        object_id = f"{year}{n:014d}"
+        zf.writestr(f"{object_id}_public.xml", xml)
+
+        index_rows.append(
+            {
+                "RETURN_ID": str(n),
+                "FILING_TYPE": "EFILE",
+                "EIN": ein,
+                "TAX_PERIOD": f"{year - 1}12",
+                "SUB_DATE": f"{year}",
+                "TAXPAYER_NAME": name,
+                "RETURN_TYPE": form,
+                "DLN": "",
+                "OBJECT_ID": object_id,
+                "XML_BATCH_ID": batch_id,
+            }
+        )
+        stats.filings += 1
+        stats.xml_bytes += len(xml)
+        stats.people += people
+        stats.grants += grants
+        stats.large += large
+        stats.forms[form] = stats.forms.get(form, 0) + 1
+
+    if zf is not None:
+        zf.close()
+
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=INDEX_COLUMNS)
+    writer.writeheader()
+    writer.writerows(index_rows)
+    (out / f"index_{year}.csv").write_text(buf.getvalue(), encoding="utf-8")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic 990 corpus")
+    parser.add_argument("--out", type=Path, required=True, help="Output directory")
+    parser.add_argument(
+        "--filings", type=int, default=5000, help="Filings to generate (default: 5000)"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=500, help="Filings per ZIP (default: 500)"
+    )
+    parser.add_argument("--year", type=int, default=2024, help="Index year")
+    parser.add_argument("--seed", type=int, default=990, help="Random seed")
+    parser.add_argument(
+        "--large-fraction",
+        type=float,
+        default=LARGE_FRACTION,
+        help=f"Share of filings over the streaming threshold "
+        f"(default: {LARGE_FRACTION})",
+    )
+    args = parser.parse_args()
+
+    stats = generate(
+        args.out,
+        args.filings,
+        args.batch_size,
+        args.year,
+        args.seed,
+        args.large_fraction,
+    )
+    print(
+        f"{stats.filings} filings in {stats.batches} batches "
+        f"({stats.xml_bytes / 1024 / 1024:,.1f} MB XML): "
+        f"{stats.forms}, {stats.people} people, {stats.grants} grants, "
+        f"{stats.large} large"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Throughput benchmark for the IRS 990 XML parser.
+
+Parses every XML fixture in ``tests/ingest/fixtures`` repeatedly and reports
+filings/sec. Usage::
+
+    cd backend && uv run python -m benchmarks.xml_parser --iterations 2000
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from scripts.ingest.xml_parser import parse_filing
+
+FIXTURES_DIR = Path(__file__).resolve().parent.parent / "tests" / "ingest" / "fixtures"
+
+
+def run(xml_docs: list[bytes], iterations: int) -> float:
+    """Parse each document ``iterations`` times. Returns filings/sec."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for xml_bytes in xml_docs:
+            parse_filing(xml_bytes)
+    elapsed = time.perf_counter() - start
+    return len(xml_docs) * iterations / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="XML parser benchmark")
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=1000,
+        help="Passes over the fixture set (default: 1000)",
+    )
+    args = parser.parse_args()
+
+    xml_docs = [path.read_bytes() for path in sorted(FIXTURES_DIR.glob("*.xml"))]
+    run(xml_docs, max(1, args.iterations // 10))  # warm-up
+    rate = run(xml_docs, args.iterations)
+    print(
+        f"parse_filing: {len(xml_docs)} fixtures x {args.iterations} "
+        f"iterations, {rate:,.0f} filings/sec"
+    )
+
+
+if __name__ == "__main__":
+    main()
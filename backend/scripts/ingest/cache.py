@@ -0,0 +1,286 @@
+"""On-disk cache of IRS downloads (index CSVs and ZIP batches).
+
+Bodies are stored under the SHA-256 of their URL with a JSON sidecar
+holding the validators (ETag / Last-Modified), size and CRC-32. Cached
+copies are revalidated with a conditional GET, so an unchanged file costs
+one 304 instead of a full download. The least recently used entries are
+evicted once the cache exceeds its size cap. In offline mode no requests
+are made and only intact cached copies are served.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zlib
+from collections import Counter
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import requests
+
+from scripts.ingest import metrics
+from scripts.ingest.config import (
+    CACHE_DIR,
+    CACHE_MAX_BYTES,
+    MAX_RETRIES,
+    RETRY_BACKOFF_BASE,
+    STREAM_CHUNK_SIZE,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    size: int
+    crc32: int
+    etag: str | None = None
+    last_modified: str | None = None
+    extra: dict | None = None  # caller's data kept with a stored body
+
+
+def _file_crc32(path: Path) -> int:
+    crc = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+class HttpCache:
+    """URL-keyed download cache with conditional GET and LRU eviction.
+
+    Paths returned by :meth:`fetch` are pinned so they are not evicted
+    while in use; call :meth:`release` with the same URL when done.
+    Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        root: str | Path = CACHE_DIR,
+        max_bytes: int = CACHE_MAX_BYTES,
+        offline: bool = False,
+    ):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self._lock = threading.Lock()
+        self._pinned: Counter[str] = Counter()
+        # (size, mtime_ns) of bodies whose CRC was checked by this process
+        self._verified: dict[str, tuple[int, int]] = {}
+
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return self.root / f"{key}.body", self.root / f"{key}.json"
+
+    def lookup(self, url: str) -> CacheEntry | None:
+        """Return the entry for ``url`` if its body is present and intact."""
+        body, meta = self._paths(url)
+        try:
+            entry = CacheEntry(**json.loads(meta.read_text()))
+            stat = body.stat()
+        except (OSError, ValueError, TypeError):
+            return None
+        if entry.url != url or stat.st_size != entry.size:
+            return None
+
+        key = body.name
+        if self._verified.get(key) != (stat.st_size, stat.st_mtime_ns):
+            if _file_crc32(body) != entry.crc32:
+                logger.warning("Cached copy of %s is corrupt, discarding", url)
+                return None
+            self._verified[key] = (stat.st_size, stat.st_mtime_ns)
+        return entry
+
+    def size(self, url: str) -> int | None:
+        """Size in bytes of the intact cached copy of ``url``, if any."""
+        entry = self.lookup(url)
+        return entry.size if entry is not None else None
+
+    def fetch(
+        self,
+        url: str,
+        session: requests.Session | None = None,
+        stop: threading.Event | None = None,
+        timeout: int = 300,
+    ) -> Path | None:
+        """Return a local path holding the body of ``url``.
+
+        Serves the cached copy when the server answers 304 (or without
+        asking, in offline mode), otherwise downloads it into the cache.
+        Returns None if the body is unavailable or ``stop`` was set.
+        """
+        entry = self.lookup(url)
+        if self.offline:
+            if entry is None:
+                logger.warning("Offline and %s is not cached", url)
+                return None
+            return self._hit(url)
+
+        for attempt in range(1, MAX_RETRIES + 1):
+            try:
+                return self._download(url, entry, session or requests, stop, timeout)
+            except requests.RequestException as exc:
+                if attempt < MAX_RETRIES:
+                    wait = RETRY_BACKOFF_BASE**attempt
+                    logger.warning(
+                        "Attempt %d/%d failed for %s: %s. Retrying in %ds...",
+                        attempt,
+                        MAX_RETRIES,
+                        url,
+                        exc,
+                        wait,
+                    )
+                    time.sleep(wait)
+                else:
+                    logger.warning(
+                        "All %d attempts failed for %s: %s",
+                        MAX_RETRIES,
+                        url,
+                        exc,
+                    )
+        return None
+
+    def store(self, url: str, path: str | Path, extra: dict | None = None) -> Path:
+        """Move the file at ``path`` into the cache as the body of ``url``.
+
+        For bodies not downloaded by :meth:`fetch`, such as parts of a file
+        fetched by range; ``extra`` is kept with it and comes back from
+        :meth:`lookup`. Offline, :meth:`fetch` serves it like any other
+        entry. The returned path is pinned as one from :meth:`fetch` is.
+        """
+        path = Path(path)
+        entry = CacheEntry(
+            url=url, size=path.stat().st_size, crc32=_file_crc32(path), extra=extra
+        )
+        return self._put(url, path, entry)
+
+    def release(self, url: str) -> None:
+        """Unpin a path returned by :meth:`fetch` or :meth:`store`."""
+        with self._lock:
+            self._pinned[url] -= 1
+            if self._pinned[url] <= 0:
+                del self._pinned[url]
+
+    def _hit(self, url: str) -> Path:
+        body, _ = self._paths(url)
+        with self._lock:
+            self._pinned[url] += 1
+            os.utime(body)  # LRU order is body mtime
+        stat = body.stat()
+        self._verified[body.name] = (stat.st_size, stat.st_mtime_ns)
+        return body
+
+    def _download(
+        self,
+        url: str,
+        entry: CacheEntry | None,
+        session,
+        stop: threading.Event | None,
+        timeout: int,
+    ) -> Path | None:
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        started = time.perf_counter()
+        resp = session.get(url, headers=headers, timeout=timeout, stream=True)
+        if resp.status_code == 304 and entry is not None:
+            resp.close()
+            logger.info("Cache hit for %s (not modified)", url.split("/")[-1])
+            return self._hit(url)
+        resp.raise_for_status()
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".part")
+        try:
+            size = crc = 0
+            with os.fdopen(fd, "wb") as f:
+                for chunk in resp.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                    if stop is not None and stop.is_set():
+                        resp.close()
+                        os.unlink(tmp_path)
+                        return None
+                    f.write(chunk)
+                    size += len(chunk)
+                    crc = zlib.crc32(chunk, crc)
+
+            expected = resp.headers.get("Content-Length")
+            if expected is not None and expected.isdigit() and int(expected) != size:
+                raise requests.RequestException(
+                    f"truncated download: {size} of {expected} bytes"
+                )
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        entry = CacheEntry(
+            url=url,
+            size=size,
+            crc32=crc,
+            etag=resp.headers.get("ETag"),
+            last_modified=resp.headers.get("Last-Modified"),
+        )
+        body = self._put(url, tmp_path, entry)
+
+        elapsed = time.perf_counter() - started
+        metrics.record("download", elapsed, nbytes=size)
+        size_mb = size / (1024 * 1024)
+        logger.info(
+            "Downloaded %s to cache: %.1f MB in %.1fs (%.1f MB/s)",
+            url.split("/")[-1],
+            size_mb,
+            elapsed,
+            size_mb / elapsed if elapsed > 0 else 0.0,
+        )
+        return body
+
+    def _put(self, url: str, path: str | Path, entry: CacheEntry) -> Path:
+        """Move ``path`` in as the pinned body of ``entry``."""
+        body, meta = self._paths(url)
+        with self._lock:
+            shutil.move(path, body)
+            meta_tmp = meta.with_suffix(".json.part")
+            meta_tmp.write_text(json.dumps(asdict(entry)))
+            os.replace(meta_tmp, meta)
+            self._pinned[url] += 1
+            self._evict()
+        stat = body.stat()
+        self._verified[body.name] = (stat.st_size, stat.st_mtime_ns)
+        return body
+
+    def _evict(self) -> None:
+        """Drop least recently used unpinned entries over the size cap.
+
+        Caller holds the lock.
+        """
+        pinned = {self._paths(url)[0].name for url in self._pinned}
+        bodies = []
+        for body in self.root.glob("*.body"):
+            try:
+                stat = body.stat()
+            except OSError:
+                continue
+            bodies.append((stat.st_mtime_ns, stat.st_size, body))
+
+        total = sum(size for _, size, _ in bodies)
+        for _, size, body in sorted(bodies, key=lambda b: b[0]):
+            if total <= self.max_bytes:
+                break
+            if body.name in pinned:
+                continue
+            body.with_suffix(".json").unlink(missing_ok=True)
+            body.unlink(missing_ok=True)
+            self._verified.pop(body.name, None)
+            total -= size
+            logger.info("Evicted %s from download cache", body.name)
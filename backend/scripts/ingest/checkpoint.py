@@ -0,0 +1,139 @@
+"""Persistent ingestion progress, kept in ingest_runs / ingest_batches.
+
+Each pipeline run gets an ``ingest_runs`` row; each ZIP batch it finishes
+is upserted into ``ingest_batches`` keyed by (year, batch_id) with its
+counters, so a resumed run can skip completed batches without
+downloading them and progress can be reported across restarts.
+"""
+
+import uuid
+from dataclasses import dataclass
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.ingest import IngestBatch, IngestRun
+
+# ingest_runs.status
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+INTERRUPTED = "interrupted"
+
+# ingest_batches.status; as jobs (see jobs.py) batches are also RUNNING
+# while claimed by a worker and FAILED once out of retries
+COMPLETED = "completed"
+PARTIAL = "partial"  # stopped early by --limit
+DOWNLOAD_FAILED = "download_failed"
+READ_FAILED = "read_failed"  # some members unreadable (corrupt ZIP data)
+QUEUED = "queued"
+
+
+@dataclass
+class BatchCounts:
+    entries: int = 0
+    processed: int = 0
+    loaded: int = 0
+    skipped: int = 0
+    errors: int = 0
+
+
+class Checkpoint:
+    """Checkpoint store for one pipeline run.
+
+    ``bind`` is the sync engine (or connection) used by the loader; every
+    write is committed immediately.
+    """
+
+    def __init__(self, bind, run_id: uuid.UUID):
+        self.bind = bind
+        self.run_id = run_id
+
+    @classmethod
+    def start(cls, bind, mode: str, years: list[int]) -> "Checkpoint":
+        """Record a new run and return its checkpoint."""
+        with Session(bind) as session:
+            run = IngestRun(mode=mode, years=list(years), status=RUNNING)
+            session.add(run)
+            session.commit()
+            return cls(bind, run.id)
+
+    def completed_batches(self, year: int) -> set[str]:
+        """Batch ids of ``year`` fully ingested by this or an earlier run."""
+        with Session(self.bind) as session:
+            rows = session.scalars(
+                select(IngestBatch.batch_id).where(
+                    IngestBatch.year == year, IngestBatch.status == COMPLETED
+                )
+            )
+            return set(rows)
+
+    def record_batch(
+        self, year: int, batch_id: str, status: str, counts: BatchCounts
+    ) -> None:
+        """Upsert the outcome of one batch."""
+        with Session(self.bind) as session:
+            session.execute(self._batch_upsert(year, batch_id, status, counts))
+            session.commit()
+
+    def _batch_upsert(
+        self, year: int, batch_id: str, status: str, counts: BatchCounts, where=None
+    ):
+        values = dict(
+            run_id=self.run_id,
+            status=status,
+            entries=counts.entries,
+            processed=counts.processed,
+            loaded=counts.loaded,
+            skipped=counts.skipped,
+            errors=counts.errors,
+            completed_at=func.now() if status == COMPLETED else None,
+        )
+        stmt = insert(IngestBatch).values(year=year, batch_id=batch_id, **values)
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_ingest_batch",
+            set_={
+                **values,
+                # a filing is loaded at most once, so loads add up across
+                # reruns of a partial batch; the other counters are per run
+                "loaded": IngestBatch.loaded + stmt.excluded.loaded,
+                "updated_at": func.now(),
+            },
+            where=where,
+        )
+        return stmt
+
+    def totals(self, years: list[int]) -> tuple[int, BatchCounts]:
+        """(completed batch count, summed counters) across all runs."""
+        with Session(self.bind) as session:
+            row = session.execute(
+                select(
+                    func.count(),
+                    func.coalesce(func.sum(IngestBatch.entries), 0),
+                    func.coalesce(func.sum(IngestBatch.processed), 0),
+                    func.coalesce(func.sum(IngestBatch.loaded), 0),
+                    func.coalesce(func.sum(IngestBatch.skipped), 0),
+                    func.coalesce(func.sum(IngestBatch.errors), 0),
+                ).where(
+                    IngestBatch.year.in_(years), IngestBatch.status == COMPLETED
+                )
+            ).one()
+        return row[0], BatchCounts(*row[1:])
+
+    def finish(self, status: str, counts: BatchCounts) -> None:
+        """Close the run with its final status and counters."""
+        with Session(self.bind) as session:
+            session.execute(
+                update(IngestRun)
+                .where(IngestRun.id == self.run_id)
+                .values(
+                    status=status,
+                    processed=counts.processed,
+                    loaded=counts.loaded,
+                    skipped=counts.skipped,
+                    errors=counts.errors,
+                    finished_at=func.now(),
+                )
+            )
+            session.commit()
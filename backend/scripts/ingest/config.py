@@ -1,5 +1,7 @@
 """Ingestion pipeline configuration."""
 
+import os
+
 # IRS TEOS download base URL (moved from S3 in late 2021)
 IRS_BASE_URL = "https://apps.irs.gov/pub/epostcard/990/xml"
 IRS_INDEX_CSV_TEMPLATE = (
@@ -12,12 +14,77 @@ IRS_ZIP_TEMPLATE = (
 # Batch sizes
 BATCH_SIZE = 1000
 INDEX_BATCH_SIZE = 5000
+KNOWN_IDS_CHUNK_SIZE = 10_000  # object_ids per "already loaded?" query
+DEAD_LETTER_FETCH_SIZE = 100  # dead letters read at a time by replay
+
+# Organizations kept in the loader's EIN cache
+ORG_CACHE_SIZE = 200_000
 
 # Memory-safety constants
-MAX_ZIP_SIZE_MB = 200
-MAX_ZIP_SIZE_BYTES = MAX_ZIP_SIZE_MB * 1024 * 1024
 STREAM_CHUNK_SIZE = 8192
 
+# Filings larger than this are parsed with iterparse instead of a full tree
+STREAMING_PARSE_THRESHOLD_BYTES = 5 * 1024 * 1024
+
+# Memory budget per in-flight filing: ZIP members up to this size are read
+# into memory and parsed on the parser processes; larger ones are streamed
+# from the ZIP through lxml's feed parser without ever being held whole
+MEMBER_MEMORY_BUDGET_BYTES = STREAMING_PARSE_THRESHOLD_BYTES
+
+# Backpressure: while the pipeline process's RSS is over the budget and
+# filings are still queued downstream, no more ZIP members are read
+RSS_BUDGET_BYTES = 2 * 1024 * 1024 * 1024
+RSS_POLL_SECONDS = 0.1
+
+# Parallel parsing: filings queued per parser process, and filings a
+# parser process handles before it is recycled (caps lxml heap growth)
+PARSE_IN_FLIGHT_PER_WORKER = 4
+PARSE_WORKER_MAX_TASKS = 5000
+
+# Items (filings or batch markers) buffered between pipeline stages
+STAGE_QUEUE_SIZE = 256
+
+# Metrics: sliding window for rates/percentiles, periodic log interval,
+# per-stage samples kept for run percentiles, and the throughput goal the
+# run report is measured against
+METRICS_WINDOW_SECONDS = 60
+METRICS_LOG_INTERVAL_SECONDS = 30
+METRICS_RESERVOIR_SIZE = 10_000
+TARGET_FILINGS_PER_MINUTE = 1000
+
+# Download prefetching: ZIP batches downloaded ahead of the one being
+# processed, and the temp disk they may occupy at once
+PREFETCH_DEPTH = 2
+PREFETCH_DISK_BUDGET_BYTES = 2 * 1024 * 1024 * 1024
+HTTP_POOL_SIZE = 8
+
+# Index years planned and loaded side by side, their batches interleaved
+# over the same download threads and parser processes
+PARALLEL_YEARS = 2
+
+# Range requests: fetch only the wanted members of a batch ZIP when they
+# span at most this fraction of it (always when it is over the size below).
+# Member spans closer than the gap are fetched in one request up to the max.
+RANGE_FETCH_MAX_FRACTION = 0.5
+RANGE_FETCH_ALWAYS_BYTES = 200 * 1024 * 1024
+RANGE_COALESCE_GAP_BYTES = 256 * 1024
+RANGE_REQUEST_MAX_BYTES = 16 * 1024 * 1024
+
+# Local cache of downloaded index CSVs and ZIPs, LRU-evicted past the cap
+CACHE_DIR = os.path.expanduser("~/.cache/990_beacon/ingest")
+CACHE_MAX_BYTES = 20 * 1024 * 1024 * 1024
+
+# Job queue (--mode enqueue / worker): workers refresh the heartbeat of
+# their claimed batches; a claim not refreshed for JOB_STALE_SECONDS is
+# taken over by another worker. Failed batches are retried with doubling
+# delays up to JOB_MAX_ATTEMPTS claims. Idle workers poll for retries and
+# for batches of stale workers until the queue is empty.
+JOB_HEARTBEAT_SECONDS = 30
+JOB_STALE_SECONDS = 300
+JOB_MAX_ATTEMPTS = 3
+JOB_RETRY_DELAY_SECONDS = 60
+JOB_POLL_SECONDS = 10
+
 # Retry config
 MAX_RETRIES = 3
 RETRY_BACKOFF_BASE = 2  # seconds
@@ -0,0 +1,181 @@
+"""Dead-letter store for filings that failed to parse or load.
+
+A failed filing's XML is kept, zlib-compressed, in ``ingest_dead_letters``
+with its index entry and the error, so ``--mode replay`` can run just
+those filings through the current parser and loader later without
+downloading any ZIP again. A dead letter is resolved once its filing is in
+the database; failing again updates it in place. Filings streamed from a
+ZIP instead of being read whole are compressed for the store as they are
+parsed, by an :class:`XmlSpool`. Filings that could not be read out of
+their ZIP are kept without XML and left out of replay; their batch is
+fetched again instead, which resolves them.
+"""
+
+import traceback
+import zlib
+from collections.abc import Iterable, Iterator
+
+from sqlalchemy import exists, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.ingest import IngestDeadLetter
+from app.models.organization import Filing
+from scripts.ingest.config import DEAD_LETTER_FETCH_SIZE
+from scripts.ingest.index_downloader import IndexEntry
+
+# ingest_dead_letters.stage
+READ = "read"  # unreadable in its ZIP; no XML kept, nothing to replay
+PARSE = "parse"
+LOAD = "load"
+
+
+class XmlSpool:
+    """Compressed copy of an XML document taken while it streams past.
+
+    Holds the document the way the store keeps it, so a filing too large
+    to hold in memory can still be dead-lettered after it was parsed.
+    """
+
+    def __init__(self):
+        self.size = 0
+        self._parts: list[bytes] = []
+        self._zlib = zlib.compressobj()
+
+    def tee(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Yield ``chunks``, compressing each on the way through."""
+        for chunk in chunks:
+            self.size += len(chunk)
+            self._parts.append(self._zlib.compress(chunk))
+            yield chunk
+
+    def close(self) -> None:
+        """Finish the compressed stream once the document has been read."""
+        self._parts.append(self._zlib.flush())
+
+    @property
+    def compressed(self) -> bytes:
+        return b"".join(self._parts)
+
+
+class DeadLetters:
+    """Dead-letter store written by one pipeline run.
+
+    ``bind`` is the sync engine (or connection) used by the loader; every
+    write is committed immediately.
+    """
+
+    def __init__(self, bind, run_id):
+        self.bind = bind
+        self.run_id = run_id
+
+    def record(
+        self,
+        year: int,
+        entry: IndexEntry,
+        stage: str,
+        xml: bytes | XmlSpool,
+        error: BaseException | None,
+    ) -> None:
+        """Keep a failed filing; ``error`` is None for unparseable XML."""
+        if error is None:
+            error_class, message, trace = "Unparseable", "no filing in XML", None
+        else:
+            error_class = type(error).__qualname__
+            message = str(error) or repr(error)
+            trace = "".join(traceback.format_exception(error))
+        values = dict(
+            year=year,
+            batch_id=entry.xml_batch_id,
+            ein=entry.ein,
+            return_type=entry.return_type,
+            run_id=self.run_id,
+            stage=stage,
+            error_class=error_class,
+            error=message,
+            traceback=trace,
+            xml=xml.compressed if isinstance(xml, XmlSpool) else zlib.compress(xml),
+            xml_size=xml.size if isinstance(xml, XmlSpool) else len(xml),
+            resolved_at=None,
+        )
+        stmt = insert(IngestDeadLetter).values(object_id=entry.object_id, **values)
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_dead_letter_object",
+            set_={
+                **values,
+                "attempts": IngestDeadLetter.attempts + 1,
+                "updated_at": func.now(),
+            },
+        )
+        with Session(self.bind) as session:
+            session.execute(stmt)
+            session.commit()
+
+    def resolve(self) -> int:
+        """Resolve dead letters whose filing is now loaded. Returns how many."""
+        with Session(self.bind) as session:
+            result = session.execute(
+                update(IngestDeadLetter)
+                .where(
+                    IngestDeadLetter.resolved_at.is_(None),
+                    exists().where(Filing.object_id == IngestDeadLetter.object_id),
+                )
+                .values(resolved_at=func.now(), updated_at=func.now())
+            )
+            session.commit()
+            return result.rowcount
+
+    @staticmethod
+    def pending_years(bind) -> list[int]:
+        """Index years with unresolved dead letters to replay."""
+        with Session(bind) as session:
+            rows = session.scalars(
+                select(IngestDeadLetter.year)
+                .where(
+                    IngestDeadLetter.resolved_at.is_(None),
+                    IngestDeadLetter.stage != READ,
+                )
+                .distinct()
+                .order_by(IngestDeadLetter.year)
+            )
+            return list(rows)
+
+    def pending(self) -> Iterator[tuple[int, IndexEntry, bytes]]:
+        """Yield (year, entry, xml_bytes) per unresolved dead letter to replay.
+
+        Ordered by year and batch, and streamed from the database a few
+        at a time.
+        """
+        stmt = (
+            select(
+                IngestDeadLetter.year,
+                IngestDeadLetter.object_id,
+                IngestDeadLetter.ein,
+                IngestDeadLetter.return_type,
+                IngestDeadLetter.batch_id,
+                IngestDeadLetter.xml,
+            )
+            .where(
+                IngestDeadLetter.resolved_at.is_(None),
+                IngestDeadLetter.stage != READ,
+            )
+            .order_by(
+                IngestDeadLetter.year,
+                IngestDeadLetter.batch_id,
+                IngestDeadLetter.object_id,
+            )
+            .execution_options(yield_per=DEAD_LETTER_FETCH_SIZE)
+        )
+        with Session(self.bind) as session:
+            rows = session.execute(stmt)
+            for year, object_id, ein, return_type, batch_id, xml in rows:
+                entry = IndexEntry(
+                    object_id=object_id,
+                    ein=ein,
+                    taxpayer_name="",
+                    return_type=return_type,
+                    tax_period="",
+                    sub_date="",
+                    xml_batch_id=batch_id,
+                )
+                yield year, entry, zlib.decompress(xml)
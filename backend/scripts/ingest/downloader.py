@@ -1,35 +1,93 @@
 """Downloads ZIP archives of XML files from the IRS TEOS endpoint.
 
-Memory-safe: streams ZIPs to disk and yields one XML at a time.
+Memory-safe: streams ZIPs to disk and yields one XML at a time; members
+over the per-filing memory budget are handed out as a stream of chunks
+rather than read whole.
 """
 
-import gc
+import functools
+import itertools
 import logging
 import os
+import shutil
 import tempfile
+import threading
 import time
 import zipfile
-from collections.abc import Generator
-from contextlib import contextmanager
+import zlib
+from collections import deque
+from collections.abc import Collection, Generator, Iterable, Iterator, Mapping
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import closing, contextmanager, suppress
+from dataclasses import asdict, dataclass
 
 import requests
+from requests.adapters import HTTPAdapter
 
+from scripts.ingest import metrics
+from scripts.ingest.cache import HttpCache
 from scripts.ingest.config import (
+    HTTP_POOL_SIZE,
     IRS_ZIP_TEMPLATE,
     MAX_RETRIES,
-    MAX_ZIP_SIZE_BYTES,
-    MAX_ZIP_SIZE_MB,
+    MEMBER_MEMORY_BUDGET_BYTES,
+    PREFETCH_DEPTH,
+    PREFETCH_DISK_BUDGET_BYTES,
+    RANGE_FETCH_ALWAYS_BYTES,
+    RANGE_FETCH_MAX_FRACTION,
     RETRY_BACKOFF_BASE,
     STREAM_CHUNK_SIZE,
 )
+from scripts.ingest.remote_zip import (
+    FetchedMember,
+    RemoteZip,
+    RemoteZipError,
+    ZipMember,
+    read_fetched,
+)
 
 logger = logging.getLogger(__name__)
 
+# An XML member: its bytes, its chunks when over the memory budget, or the
+# error that kept it from being read. A chunk stream must be read before
+# the next member is asked for.
+XmlMember = bytes | Iterator[bytes] | Exception
+
+# Raised reading a ZIP or a member whose data is corrupt (bad CRC,
+# undecompressible, truncated)
+READ_ERRORS = (zipfile.BadZipFile, zlib.error, EOFError, RemoteZipError)
+
+# Handed out by a batch source with no batch ready yet, while batches it
+# handed out earlier are still waiting; see prefetch_batches
+NOT_READY = object()
+
+_http_session: requests.Session | None = None
+_http_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """Return the process-wide requests.Session shared by all downloads.
+
+    Reusing one session keeps TCP/TLS connections to apps.irs.gov alive
+    across batches; the pool is sized for the prefetch threads.
+    """
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _http_session = session
+        return _http_session
+
 
 def _check_content_length(url: str) -> int | None:
     """HEAD request to get Content-Length. Returns bytes or None."""
     try:
-        resp = requests.head(url, timeout=30, allow_redirects=True)
+        resp = get_http_session().head(url, timeout=30, allow_redirects=True)
         resp.raise_for_status()
         cl = resp.headers.get("Content-Length")
         return int(cl) if cl else None
@@ -37,29 +95,50 @@ def _check_content_length(url: str) -> int | None:
         return None
 
 
-def _download_to_tempfile(url: str) -> str | None:
-    """Stream a ZIP to a temp file on disk. Returns path or None."""
+def _download_to_tempfile(
+    url: str, stop: threading.Event | None = None
+) -> str | None:
+    """Stream a ZIP to a temp file on disk. Returns path or None.
+
+    Returns None without retrying if ``stop`` is set mid-download.
+    """
     for attempt in range(1, MAX_RETRIES + 1):
         try:
-            resp = requests.get(url, timeout=300, stream=True)
+            started = time.perf_counter()
+            resp = get_http_session().get(url, timeout=300, stream=True)
             resp.raise_for_status()
 
             fd, tmp_path = tempfile.mkstemp(suffix=".zip")
+            cancelled = False
             try:
                 total = 0
                 with os.fdopen(fd, "wb") as f:
                     for chunk in resp.iter_content(
                         chunk_size=STREAM_CHUNK_SIZE
                     ):
+                        if stop is not None and stop.is_set():
+                            cancelled = True
+                            break
                         f.write(chunk)
                         total += len(chunk)
             except Exception:
                 os.unlink(tmp_path)
                 raise
 
+            if cancelled:
+                resp.close()
+                os.unlink(tmp_path)
+                return None
+
+            elapsed = time.perf_counter() - started
+            metrics.record("download", elapsed, nbytes=total)
             size_mb = total / (1024 * 1024)
             logger.info(
-                "Downloaded %s to disk: %.1f MB", url.split("/")[-1], size_mb
+                "Downloaded %s to disk: %.1f MB in %.1fs (%.1f MB/s)",
+                url.split("/")[-1],
+                size_mb,
+                elapsed,
+                size_mb / elapsed if elapsed > 0 else 0.0,
             )
             return tmp_path
 
@@ -88,56 +167,462 @@ def _download_to_tempfile(url: str) -> str | None:
 
 @contextmanager
 def open_zip_batch(
-    year: int, batch_id: str
-) -> Generator[Generator[tuple[str, bytes], None, None] | None, None, None]:
+    year: int,
+    batch_id: str,
+    cache: HttpCache | None = None,
+    members: Collection[str] | None = None,
+) -> Generator[Iterator[tuple[str, XmlMember]] | None, None, None]:
     """Context manager that downloads a ZIP to disk and yields XML entries.
 
-    Yields a generator of (filename, xml_bytes) tuples one at a time,
-    or None if the download fails or the ZIP is too large.
+    Yields a generator of (filename, xml) tuples one at a time, or None
+    if the download fails. ``xml`` is the member's bytes, or an iterator
+    over its chunks when it is larger than MEMBER_MEMORY_BUDGET_BYTES (see
+    :data:`XmlMember`). With a ``cache`` the ZIP is kept in the download
+    cache instead of a temp file.
+
+    If ``members`` names the wanted XML files, only those are fetched with
+    HTTP Range requests when they are a small part of the ZIP or the ZIP
+    is very large; only wanted members are yielded then.
 
     Usage::
 
         with open_zip_batch(2024, "batch01") as xml_iter:
             if xml_iter is None:
                 continue
-            for filename, xml_bytes in xml_iter:
-                process(xml_bytes)
+            for filename, xml in xml_iter:
+                process(xml)
     """
     url = IRS_ZIP_TEMPLATE.format(year=year, batch_id=batch_id)
-
-    # Check size before downloading
-    content_length = _check_content_length(url)
-    if content_length is not None and content_length > MAX_ZIP_SIZE_BYTES:
-        size_mb = content_length / (1024 * 1024)
-        logger.warning(
-            "Skipping %s: %.0f MB exceeds %d MB limit",
-            batch_id,
-            size_mb,
-            MAX_ZIP_SIZE_MB,
-        )
+    opened = _open_batch(url, batch_id, cache, members)
+    if opened is None:
         yield None
         return
 
-    tmp_path = _download_to_tempfile(url)
-    if tmp_path is None:
-        yield None
-        return
+    batch, _ = opened
+    try:
+        yield batch.entries(batch_id)
+    finally:
+        batch.close(cache)
+
+
+@dataclass(slots=True)
+class _LocalBatch:
+    """A batch on local disk: a whole ZIP, or members spooled by range."""
+
+    url: str
+    path: str
+    fetched: list[FetchedMember] | None = None
+    cached: str | None = None  # cache key of ``path``, if it is in the cache
+
+    def entries(self, batch_id: str) -> Iterator[tuple[str, XmlMember]]:
+        if self.fetched is not None:
+            return read_fetched(self.path, self.fetched, batch_id)
+        return _xml_entries(self.path, batch_id)
+
+    def close(self, cache: HttpCache | None) -> None:
+        """Delete temp files, or unpin cached ones."""
+        if cache is not None and self.cached is not None:
+            cache.release(self.cached)
+            return
+        with suppress(OSError):
+            os.unlink(self.path)
 
+
+class _DiskBudget:
+    """Byte reservations for prefetched ZIPs, granted in ticket order.
+
+    Granting strictly in submission order means a later batch can never
+    take the space the batch the consumer is waiting on needs. A request
+    is always granted when nothing is reserved, so one oversized ZIP
+    cannot stall the pipeline.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.reserved = 0
+        self._next_ticket = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, ticket: int, size: int, stop: threading.Event) -> bool:
+        """Block until ``size`` bytes are granted. False if stopped."""
+        with self._cond:
+            while not stop.is_set() and not (
+                ticket == self._next_ticket
+                and (self.reserved == 0 or self.reserved + size <= self.limit)
+            ):
+                self._cond.wait(timeout=1.0)
+            if stop.is_set():
+                return False
+            self.reserved += size
+            self._next_ticket += 1
+            self._cond.notify_all()
+            return True
+
+    def release(self, size: int) -> None:
+        with self._cond:
+            self.reserved -= size
+            self._cond.notify_all()
+
+
+def _open_batch(
+    url: str,
+    batch_id: str,
+    cache: HttpCache | None,
+    members: Collection[str] | None,
+    stop: threading.Event | None = None,
+    budget: _DiskBudget | None = None,
+    ticket: int = 0,
+) -> tuple[_LocalBatch, int] | None:
+    """Bring a batch to local disk. Returns (batch, bytes reserved).
+
+    Uses range requests when :func:`_range_plan` says so, otherwise
+    downloads the whole ZIP, however large. Offline, a ZIP that is not
+    cached is served from members an earlier run fetched by range, if they
+    cover ``members``. With a ``budget`` the download first reserves its
+    size, in ``ticket`` order; a ZIP of unknown size reserves the whole
+    budget.
+    """
+    stop = stop or threading.Event()
+    content_length = _zip_size(url, cache)
+    plan = stored = None
+    if members is not None:
+        plan = _range_plan(url, batch_id, content_length, members, cache)
+        if content_length is None and cache is not None and cache.offline:
+            stored = _stored_members(url, cache, members)
+
+    if plan is not None:
+        remote, wanted = plan
+        reserved = remote.span_bytes(wanted)
+    elif stored is not None:
+        reserved = sum(item.member.compressed_size for item in stored)
+    elif content_length is not None:
+        reserved = content_length
+    else:
+        reserved = budget.limit if budget is not None else 0
+    if budget is not None and not budget.acquire(ticket, reserved, stop):
+        return None
+
+    if plan is not None:
+        batch = _fetch_ranges(url, batch_id, *plan, members, stop, cache)
+    elif stored is not None:
+        key = _members_key(url)
+        path = cache.fetch(key)
+        batch = _LocalBatch(url, str(path), stored, key) if path is not None else None
+    else:
+        zip_path = _fetch_zip(url, cache, stop=stop)
+        cached = url if cache is not None else None
+        batch = (
+            _LocalBatch(url, zip_path, cached=cached) if zip_path is not None else None
+        )
+
+    if batch is None:
+        if budget is not None:
+            budget.release(reserved)
+        return None
+    return batch, reserved
+
+
+def _range_plan(
+    url: str,
+    batch_id: str,
+    content_length: int | None,
+    members: Collection[str],
+    cache: HttpCache | None,
+) -> tuple[RemoteZip, list[ZipMember]] | None:
+    """Decide whether to fetch ``members`` of a ZIP by range.
+
+    Returns the archive and its wanted members when they span at most
+    RANGE_FETCH_MAX_FRACTION of it, or the ZIP is over
+    RANGE_FETCH_ALWAYS_BYTES; None to download it whole (or when it is
+    already cached).
+    """
+    if cache is not None and (cache.offline or cache.lookup(url) is not None):
+        return None
+
+    remote = RemoteZip(url, get_http_session(), size=content_length)
     try:
+        wanted = remote.plan(members)
+    except (RemoteZipError, requests.RequestException) as exc:
+        logger.warning("Cannot read %s by range: %s", batch_id, exc)
+        return None
+
+    span = remote.span_bytes(wanted)
+    if (
+        remote.size <= RANGE_FETCH_ALWAYS_BYTES
+        and span > remote.size * RANGE_FETCH_MAX_FRACTION
+    ):
+        return None
+    logger.info(
+        "Fetching %d of %d members of %s by range: %.1f of %.1f MB",
+        len(wanted),
+        len(remote.members()),
+        batch_id,
+        span / (1024 * 1024),
+        remote.size / (1024 * 1024),
+    )
+    return remote, wanted
 
-        def _xml_entries() -> Generator[tuple[str, bytes], None, None]:
+
+def _members_key(url: str) -> str:
+    """Cache key of the members of the ZIP at ``url`` fetched by range."""
+    return url + "#members"
+
+
+def _stored_members(
+    url: str, cache: HttpCache, members: Collection[str]
+) -> list[FetchedMember] | None:
+    """The cached members of ``members`` last fetched by range from ``url``.
+
+    None if that fetch did not ask for all of ``members``; names it asked
+    for that are not in the ZIP are simply not there.
+    """
+    entry = cache.lookup(_members_key(url))
+    if entry is None or not entry.extra:
+        return None
+    if not set(members) <= set(entry.extra["requested"]):
+        return None
+    return [
+        FetchedMember(ZipMember(**item["member"]), item["offset"])
+        for item in entry.extra["fetched"]
+        if item["member"]["name"] in members
+    ]
+
+
+def _fetch_ranges(
+    url: str,
+    batch_id: str,
+    remote: RemoteZip,
+    wanted: list[ZipMember],
+    members: Collection[str],
+    stop: threading.Event,
+    cache: HttpCache | None = None,
+) -> _LocalBatch | None:
+    """Spool the compressed data of ``wanted`` members to a temp file.
+
+    With a ``cache`` the file is kept in it, together with where each
+    member's data starts, so an offline run can read the members again
+    (see :func:`_stored_members`).
+    """
+    started = time.perf_counter()
+    spool_dir = cache.root if cache is not None else None
+    fd, tmp_path = tempfile.mkstemp(suffix=".members", dir=spool_dir)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            fetched = remote.fetch(wanted, f, stop=stop)
+            total = f.tell()
+    except (RemoteZipError, requests.RequestException) as exc:
+        os.unlink(tmp_path)
+        logger.warning("Range fetch failed for %s: %s", batch_id, exc)
+        return None
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    if fetched is None:
+        os.unlink(tmp_path)
+        return None
+
+    elapsed = time.perf_counter() - started
+    metrics.record("download", elapsed, nbytes=total)
+    size_mb = total / (1024 * 1024)
+    logger.info(
+        "Fetched %d members of %s: %.1f MB in %.1fs (%.1f MB/s)",
+        len(fetched),
+        batch_id,
+        size_mb,
+        elapsed,
+        size_mb / elapsed if elapsed > 0 else 0.0,
+    )
+    if cache is None:
+        return _LocalBatch(url, tmp_path, fetched)
+    key = _members_key(url)
+    extra = dict(requested=sorted(members), fetched=[asdict(f) for f in fetched])
+    return _LocalBatch(url, str(cache.store(key, tmp_path, extra)), fetched, key)
+
+
+def _zip_size(url: str, cache: HttpCache | None) -> int | None:
+    """Size of the ZIP at ``url``, without touching the network offline."""
+    if cache is not None and cache.offline:
+        return cache.size(url)
+    return _check_content_length(url)
+
+
+def _fetch_zip(
+    url: str, cache: HttpCache | None, stop: threading.Event | None = None
+) -> str | None:
+    """Download a ZIP to a temp file, or via the cache. Returns its path."""
+    if cache is None:
+        return _download_to_tempfile(url, stop=stop)
+    path = cache.fetch(url, session=get_http_session(), stop=stop)
+    return str(path) if path is not None else None
+
+
+def _xml_entries(
+    zip_path: str, batch_id: str, budget: int = MEMBER_MEMORY_BUDGET_BYTES
+) -> Generator[tuple[str, XmlMember], None, None]:
+    """Yield (filename, xml) for each XML member of a ZIP on disk.
+
+    Members are decompressed through ``zf.open()``: read into bytes when
+    they fit ``budget``, otherwise handed out as chunks read straight off
+    the open member (a CRC failure surfaces as BadZipFile at its end). A
+    member that cannot be read is yielded as the error instead, and the
+    members after it are still read; a ZIP that cannot be opened at all
+    raises BadZipFile.
+    """
+    with zipfile.ZipFile(zip_path, "r") as zf:
+        for info in zf.infolist():
+            if not info.filename.lower().endswith(".xml"):
+                continue
             try:
-                with zipfile.ZipFile(tmp_path, "r") as zf:
-                    for name in zf.namelist():
-                        if name.lower().endswith(".xml"):
-                            yield name, zf.read(name)
-            except zipfile.BadZipFile as exc:
-                logger.warning("Bad ZIP file for %s: %s", batch_id, exc)
-
-        yield _xml_entries()
-    finally:
+                with zf.open(info) as member:
+                    if info.file_size > budget:
+                        chunks = functools.partial(member.read, STREAM_CHUNK_SIZE)
+                        yield info.filename, iter(chunks, b"")
+                        continue
+                    xml = member.read()
+            except READ_ERRORS as exc:
+                logger.warning("Bad member %s in %s: %s", info.filename, batch_id, exc)
+                xml = exc
+            yield info.filename, xml
+
+
+# --- Prefetching ---
+
+
+def _batch_result(
+    future: Future, cancel: threading.Event | None, stop: threading.Event
+):
+    """``future.result()``, passing ``cancel`` on to the downloads."""
+    if cancel is None:
+        return future.result()
+    while True:
         try:
-            os.unlink(tmp_path)
-        except OSError:
-            pass
-        gc.collect()
+            return future.result(timeout=0.5)
+        except TimeoutError:
+            if cancel.is_set():
+                stop.set()
+
+
+def prefetch_zip_batches(
+    year: int,
+    batch_ids: Iterable[str],
+    depth: int = PREFETCH_DEPTH,
+    disk_budget_bytes: int = PREFETCH_DISK_BUDGET_BYTES,
+    cache: HttpCache | None = None,
+    members: Mapping[str, Collection[str]] | None = None,
+    cancel: threading.Event | None = None,
+) -> Iterator[tuple[str, Iterator[tuple[str, XmlMember]] | None]]:
+    """Yield (batch_id, xml_iter) in order while later ZIPs download.
+
+    :func:`prefetch_batches` for the batches of a single year.
+
+    Usage::
+
+        with closing(prefetch_zip_batches(2024, batch_ids)) as batches:
+            for batch_id, xml_iter in batches:
+                if xml_iter is None:
+                    continue
+                for filename, xml in xml_iter:
+                    process(xml)
+    """
+    keyed = None
+    if members is not None:
+        keyed = {(year, batch_id): wanted for batch_id, wanted in members.items()}
+    batches = prefetch_batches(
+        ((year, batch_id) for batch_id in batch_ids),
+        depth=depth,
+        disk_budget_bytes=disk_budget_bytes,
+        cache=cache,
+        members=keyed,
+        cancel=cancel,
+    )
+    with closing(batches):
+        for _, batch_id, xml_iter in batches:
+            yield batch_id, xml_iter
+
+
+def prefetch_batches(
+    batches: Iterable[tuple[int, str]],
+    depth: int = PREFETCH_DEPTH,
+    disk_budget_bytes: int = PREFETCH_DISK_BUDGET_BYTES,
+    cache: HttpCache | None = None,
+    members: Mapping[tuple[int, str], Collection[str]] | None = None,
+    cancel: threading.Event | None = None,
+) -> Iterator[tuple[int, str, Iterator[tuple[str, XmlMember]] | None]]:
+    """Yield (year, batch_id, xml_iter) in order while later ZIPs download.
+
+    ``batches`` are (year, batch_id) pairs, so batches of several years can
+    share one set of downloads; NOT_READY among them means no batch is
+    ready yet while the consumer still has one to get through, and no more
+    are asked for until it moves on. Up to ``depth`` batches beyond the one
+    being processed download in background threads over the shared HTTP
+    session, holding at most ``disk_budget_bytes`` (capped by free temp
+    space) on disk. ``xml_iter``
+    is None if the download failed. Each batch's temp file is deleted when
+    the consumer moves on; closing the generator stops in-flight downloads
+    and cleans up. ``depth=0`` downloads each batch only when it is
+    reached. With a ``cache`` ZIPs are read from and kept in the
+    download cache rather than temp files. ``members`` maps (year, batch_id)
+    to wanted XML file names, enabling range fetches as in
+    :func:`open_zip_batch`. Setting ``cancel`` from another thread stops
+    in-flight downloads as closing does, so a consumer waiting on a batch
+    gets it back promptly (usually as None).
+    """
+    free = shutil.disk_usage(tempfile.gettempdir()).free
+    budget = _DiskBudget(min(disk_budget_bytes, int(free * 0.9)))
+    stop = threading.Event()
+    pool = ThreadPoolExecutor(
+        max_workers=max(1, depth), thread_name_prefix="zip-prefetch"
+    )
+    keys = iter(batches)
+    tickets = itertools.count()
+    queue: deque[tuple[int, str, Future]] = deque()
+
+    def fill(ahead: int) -> None:
+        while len(queue) < ahead:
+            key = next(keys, None)
+            if key is None:
+                return
+            if key is NOT_READY:
+                return
+            year, batch_id = key
+            url = IRS_ZIP_TEMPLATE.format(year=year, batch_id=batch_id)
+            wanted = members.get(key) if members is not None else None
+            future = pool.submit(
+                _open_batch, url, batch_id, cache, wanted, stop, budget, next(tickets)
+            )
+            queue.append((year, batch_id, future))
+
+    try:
+        while True:
+            fill(max(1, depth))
+            if not queue:
+                break
+            year, batch_id, future = queue.popleft()
+            fill(depth)
+            started = time.perf_counter()
+            opened = _batch_result(future, cancel, stop)
+            waited = time.perf_counter() - started
+            if waited >= 1.0:
+                logger.info("Waited %.1fs for batch %s download", waited, batch_id)
+
+            if opened is None:
+                yield year, batch_id, None
+                continue
+
+            batch, reserved = opened
+            try:
+                yield year, batch_id, batch.entries(batch_id)
+            finally:
+                batch.close(cache)
+                budget.release(reserved)
+    finally:
+        stop.set()
+        for _, _, future in queue:
+            future.cancel()
+        pool.shutdown(wait=True)
+        for _, _, future in queue:
+            if future.cancelled() or future.exception() is not None:
+                continue
+            opened = future.result()
+            if opened is not None:
+                opened[0].close(cache)
@@ -1,18 +1,43 @@
-"""Downloads and parses IRS index CSV files."""
+"""Downloads and parses IRS index CSV files.
 
+The index is streamed: rows are parsed as the CSV arrives (or is read from
+the download cache) into compact, slotted entries, and handed out grouped
+by ZIP batch, so the whole index never has to be held as Python objects.
+"""
+
+import codecs
 import csv
 import io
 import logging
+import sys
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
+from itertools import groupby
 
 import requests
 
-from scripts.ingest.config import IRS_INDEX_CSV_TEMPLATE, VALID_FILING_TYPES
+from scripts.ingest.cache import HttpCache
+from scripts.ingest.config import (
+    IRS_INDEX_CSV_TEMPLATE,
+    STREAM_CHUNK_SIZE,
+    VALID_FILING_TYPES,
+)
 
 logger = logging.getLogger(__name__)
 
+# Index columns kept on an IndexEntry, by field
+_COLUMNS = {
+    "object_id": "OBJECT_ID",
+    "ein": "EIN",
+    "taxpayer_name": "TAXPAYER_NAME",
+    "return_type": "RETURN_TYPE",
+    "tax_period": "TAX_PERIOD",
+    "sub_date": "SUB_DATE",
+    "xml_batch_id": "XML_BATCH_ID",
+}
+
 
-@dataclass
+@dataclass(slots=True)
 class IndexEntry:
     object_id: str
     ein: str
@@ -23,40 +48,115 @@ class IndexEntry:
     xml_batch_id: str
 
 
-def download_index(year: int) -> list[IndexEntry]:
-    """Download and parse the IRS index CSV for a given year.
+def index_batches(
+    year: int, cache: HttpCache | None = None
+) -> Iterator[tuple[str, list[IndexEntry]]]:
+    """Stream the IRS index for ``year`` as (xml_batch_id, entries) groups.
 
-    Returns a list of IndexEntry for valid 990/990EZ/990PF filings.
+    Only valid 990/990EZ/990PF filings are included. Each group is a run of
+    consecutive rows of one ZIP batch; the IRS writes a batch's rows
+    together, but a batch that comes back later in the file is yielded
+    again. Rows without a batch id are grouped under ``""``.
+
+    With a ``cache`` the CSV is served from (and stored in) the local
+    download cache. A failed download is logged and yields nothing.
     """
     url = IRS_INDEX_CSV_TEMPLATE.format(year=year)
     logger.info("Downloading index for year %d from %s", year, url)
+    count = 0
+
+    if cache is not None:
+        path = cache.fetch(url, timeout=120)
+        if path is None:
+            logger.warning("Failed to download index for year %d", year)
+            return
+        try:
+            with open(path, encoding="utf-8", errors="replace", newline="") as f:
+                for batch_id, entries in group_by_batch(iter_index(f)):
+                    count += len(entries)
+                    yield batch_id, entries
+        finally:
+            cache.release(url)
+    else:
+        try:
+            resp = requests.get(url, timeout=120, stream=True)
+            resp.raise_for_status()
+        except Exception as exc:
+            logger.warning("Failed to download index for year %d: %s", year, exc)
+            return
+        with resp:
+            chunks = resp.iter_content(chunk_size=STREAM_CHUNK_SIZE)
+            for batch_id, entries in group_by_batch(iter_index(_lines(chunks))):
+                count += len(entries)
+                yield batch_id, entries
+
+    logger.info("Parsed %d valid entries for year %d", count, year)
+
+
+def download_index(year: int, cache: HttpCache | None = None) -> list[IndexEntry]:
+    """Download and parse the IRS index CSV for a given year.
+
+    Returns a list of IndexEntry for valid 990/990EZ/990PF filings. This
+    holds the whole index in memory; the pipeline reads it with
+    :func:`index_batches` instead.
+    """
+    return [entry for _, entries in index_batches(year, cache) for entry in entries]
+
+
+def parse_index(text: str) -> list[IndexEntry]:
+    """Parse index CSV text into entries for 990/990EZ/990PF filings."""
+    return list(iter_index(io.StringIO(text, newline="")))
 
-    try:
-        resp = requests.get(url, timeout=120)
-        resp.raise_for_status()
-    except Exception as exc:
-        logger.warning("Failed to download index for year %d: %s", year, exc)
-        return []
 
-    entries: list[IndexEntry] = []
-    reader = csv.DictReader(io.StringIO(resp.text))
+def iter_index(lines: Iterable[str]) -> Iterator[IndexEntry]:
+    """Parse index CSV lines into entries for 990/990EZ/990PF filings.
+
+    Rows are read one at a time. Values repeated across many rows (batch
+    ids, return types, tax periods, submission dates) are interned so
+    entries share one string each.
+    """
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        return
+    positions = {name: i for i, name in enumerate(header)}
+    # A missing column points past the header, at the "" padded onto rows
+    columns = [positions.get(column, len(header)) for column in _COLUMNS.values()]
+    intern = sys.intern
 
     for row in reader:
-        return_type = row.get("RETURN_TYPE", "")
+        if len(row) <= len(header):
+            row.extend([""] * (len(header) + 1 - len(row)))
+        object_id, ein, name, return_type, period, sub_date, batch_id = (
+            row[i] for i in columns
+        )
         if return_type not in VALID_FILING_TYPES:
             continue
-
-        entries.append(
-            IndexEntry(
-                object_id=row.get("OBJECT_ID", ""),
-                ein=row.get("EIN", ""),
-                taxpayer_name=row.get("TAXPAYER_NAME", ""),
-                return_type=return_type,
-                tax_period=row.get("TAX_PERIOD", ""),
-                sub_date=row.get("SUB_DATE", ""),
-                xml_batch_id=row.get("XML_BATCH_ID", ""),
-            )
+        yield IndexEntry(
+            object_id=object_id,
+            ein=ein,
+            taxpayer_name=name,
+            return_type=intern(return_type),
+            tax_period=intern(period),
+            sub_date=intern(sub_date),
+            xml_batch_id=intern(batch_id),
         )
 
-    logger.info("Parsed %d valid entries for year %d", len(entries), year)
-    return entries
+
+def group_by_batch(
+    entries: Iterable[IndexEntry],
+) -> Iterator[tuple[str, list[IndexEntry]]]:
+    """Group consecutive entries of the same ZIP batch."""
+    for batch_id, group in groupby(entries, key=lambda e: e.xml_batch_id):
+        yield batch_id, list(group)
+
+
+def _lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """Decode a streamed body into lines, keeping their line endings."""
+    pending = ""
+    for text in codecs.iterdecode(chunks, "utf-8", errors="replace"):
+        *lines, pending = (pending + text).split("\n")
+        for line in lines:
+            yield line + "\n"
+    if pending:
+        yield pending
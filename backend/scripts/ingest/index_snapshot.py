@@ -0,0 +1,124 @@
+"""Snapshots of the IRS index, per ZIP batch, for incremental runs.
+
+For every batch a run finishes, ``ingest_index_snapshots`` keeps the
+number of index entries and an order-independent digest of their
+object_ids. The next ``--mode incremental`` run folds the freshly streamed
+index into the same digests and leaves out the batches that still match
+their snapshot: every filing in them was handled before, so they are
+neither checked against the database nor downloaded. Only new batches and
+batches that gained (or lost) filings are diffed against the object_ids
+already loaded. An amended return is filed under a new object_id, so it
+shows up as a new filing of the batch it lands in.
+"""
+
+import hashlib
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.ingest import IngestIndexSnapshot
+from scripts.ingest.index_downloader import IndexEntry
+
+_DIGEST_BITS = 128
+
+
+@dataclass
+class BatchDigest:
+    """Entry count and digest of (part of) one batch in the index.
+
+    The digest sums a hash per object_id, so it does not depend on the
+    order the entries come in and can be built up a group at a time.
+    """
+
+    entries: int = 0
+    total: int = 0
+
+    def add(self, entries: Sequence[IndexEntry]) -> None:
+        for entry in entries:
+            hashed = hashlib.blake2b(
+                entry.object_id.encode(), digest_size=_DIGEST_BITS // 8
+            ).digest()
+            self.total += int.from_bytes(hashed)
+        self.total %= 1 << _DIGEST_BITS
+        self.entries += len(entries)
+
+    @property
+    def digest(self) -> str:
+        return f"{self.total:0{_DIGEST_BITS // 4}x}"
+
+
+class IndexSnapshot:
+    """Index snapshots read and written by one pipeline run.
+
+    ``bind`` is the sync engine (or connection) used by the loader; every
+    write is committed immediately. Digests of the index being read are
+    kept per (year, batch_id) until the batch is saved.
+    """
+
+    def __init__(self, bind, run_id):
+        self.bind = bind
+        self.run_id = run_id
+        self.digests: dict[tuple[int, str], BatchDigest] = {}
+        self._stored: dict[int, dict[str, tuple[int, str]]] = {}
+
+    def stored(self, year: int) -> dict[str, tuple[int, str]]:
+        """batch_id -> (entries, digest) saved for ``year`` by earlier runs."""
+        if year not in self._stored:
+            with Session(self.bind) as session:
+                rows = session.execute(
+                    select(
+                        IngestIndexSnapshot.batch_id,
+                        IngestIndexSnapshot.entries,
+                        IngestIndexSnapshot.digest,
+                    ).where(IngestIndexSnapshot.year == year)
+                )
+                self._stored[year] = {
+                    batch_id: (entries, digest) for batch_id, entries, digest in rows
+                }
+        return self._stored[year]
+
+    def add(self, year: int, batch_id: str, entries: Sequence[IndexEntry]) -> bool:
+        """Fold a group of a batch's index entries into its digest.
+
+        Returns True when the group is the whole batch as it was
+        snapshotted, i.e. nothing in it is new.
+        """
+        seen = (year, batch_id) in self.digests
+        digest = self.digests.setdefault((year, batch_id), BatchDigest())
+        digest.add(entries)
+        return not seen and self.stored(year).get(batch_id) == (
+            digest.entries,
+            digest.digest,
+        )
+
+    def save(self, year: int, batch_ids: Iterable[str]) -> None:
+        """Snapshot the batches, as digested, once all their filings are in."""
+        rows = [
+            dict(
+                year=year,
+                batch_id=batch_id,
+                run_id=self.run_id,
+                entries=digest.entries,
+                digest=digest.digest,
+            )
+            for batch_id in batch_ids
+            if (digest := self.digests.get((year, batch_id))) is not None
+        ]
+        if not rows:
+            return
+        stmt = insert(IngestIndexSnapshot).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_index_snapshot",
+            set_={
+                "run_id": stmt.excluded.run_id,
+                "entries": stmt.excluded.entries,
+                "digest": stmt.excluded.digest,
+                "updated_at": func.now(),
+            },
+        )
+        with Session(self.bind) as session:
+            session.execute(stmt)
+            session.commit()
@@ -0,0 +1,394 @@
+"""ZIP batches as jobs in a Postgres queue, for distributed ingestion.
+
+A coordinator (``--mode enqueue``) queues every batch with filings left to
+load as an ``ingest_batches`` row; any number of workers (``--mode
+worker``), on any number of hosts, claim rows with ``FOR UPDATE SKIP
+LOCKED`` so no batch is handed to two workers at once. A worker refreshes
+the heartbeat of the batches it holds; a batch whose heartbeat goes stale
+(its worker died) is taken over by another worker. Failed downloads and
+batches held by a failed worker are queued again after a doubling delay
+until they run out of attempts.
+"""
+
+import logging
+import os
+import socket
+import threading
+import uuid
+from collections.abc import Callable, Iterator, Mapping
+from datetime import timedelta
+
+from sqlalchemy import and_, case, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.ingest import IngestBatch
+from scripts.ingest.checkpoint import (
+    COMPLETED,
+    DOWNLOAD_FAILED,
+    FAILED,
+    PARTIAL,
+    QUEUED,
+    READ_FAILED,
+    RUNNING,
+    BatchCounts,
+    Checkpoint,
+)
+from scripts.ingest.config import (
+    JOB_HEARTBEAT_SECONDS,
+    JOB_MAX_ATTEMPTS,
+    JOB_POLL_SECONDS,
+    JOB_RETRY_DELAY_SECONDS,
+    JOB_STALE_SECONDS,
+)
+from scripts.ingest.downloader import NOT_READY
+from scripts.ingest.index_downloader import IndexEntry
+
+logger = logging.getLogger(__name__)
+
+
+def _stale_before():
+    return func.now() - timedelta(seconds=JOB_STALE_SECONDS)
+
+
+def _released(refund: bool, exhausted: str, error: str | None = None) -> dict:
+    """Values handing a claimed batch back to the queue.
+
+    With ``refund`` the batch was cut short rather than failed: it is
+    queued again as it was. Otherwise it is retried after a delay doubling
+    with each attempt, or set to ``exhausted`` once out of attempts.
+    """
+    values = dict(claimed_by=None, heartbeat_at=None, updated_at=func.now())
+    if refund:
+        return dict(
+            values,
+            status=QUEUED,
+            attempts=IngestBatch.attempts - 1,
+            available_at=None,
+        )
+    seconds = JOB_RETRY_DELAY_SECONDS * func.power(2, IngestBatch.attempts - 1)
+    # make_interval(years, months, weeks, days, hours, mins, secs)
+    delay = func.make_interval(0, 0, 0, 0, 0, 0, seconds)
+    return dict(
+        values,
+        status=case(
+            (IngestBatch.attempts < JOB_MAX_ATTEMPTS, QUEUED), else_=exhausted
+        ),
+        available_at=func.now() + delay,
+        last_error=error,
+    )
+
+
+class JobQueue(Checkpoint):
+    """Checkpoint store of a run whose batches are claimed from the queue.
+
+    Batch outcomes are only recorded for batches this worker still holds.
+    """
+
+    def __init__(self, bind, run_id: uuid.UUID):
+        super().__init__(bind, run_id)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{run_id.hex[:8]}"
+
+    @staticmethod
+    def queued_years(bind) -> list[int]:
+        """Years with batches queued or claimed."""
+        with Session(bind) as session:
+            rows = session.scalars(
+                select(IngestBatch.year)
+                .where(IngestBatch.status.in_([QUEUED, RUNNING]))
+                .distinct()
+                .order_by(IngestBatch.year)
+            )
+            return list(rows)
+
+    def enqueue(self, year: int, batches: Mapping[str, int]) -> int:
+        """Queue ``batches`` (batch_id -> entries to load) of ``year``.
+
+        Completed batches and batches claimed by a worker are left alone;
+        any other is queued again with its attempts reset. Returns the
+        number of batches queued.
+        """
+        if not batches:
+            return 0
+        stmt = insert(IngestBatch).values(
+            [
+                dict(year=year, batch_id=batch_id, status=QUEUED, entries=entries)
+                for batch_id, entries in batches.items()
+            ]
+        )
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_ingest_batch",
+            set_={
+                "status": QUEUED,
+                "entries": stmt.excluded.entries,
+                "attempts": 0,
+                "claimed_by": None,
+                "heartbeat_at": None,
+                "available_at": None,
+                "last_error": None,
+                "updated_at": func.now(),
+            },
+            where=IngestBatch.status.not_in([COMPLETED, RUNNING]),
+        ).returning(IngestBatch.batch_id)
+        with Session(self.bind) as session:
+            queued = len(session.execute(stmt).all())
+            session.commit()
+        return queued
+
+    def claim(self, year: int) -> str | None:
+        """Claim the next batch of ``year`` that is ready, or None.
+
+        Ready batches are queued ones past their retry delay and claimed
+        ones whose heartbeat is older than JOB_STALE_SECONDS; a stale batch
+        that has used up its attempts is failed instead.
+        """
+        stale = and_(
+            IngestBatch.status == RUNNING, IngestBatch.heartbeat_at < _stale_before()
+        )
+        ready = (
+            select(IngestBatch.id, IngestBatch.claimed_by)
+            .where(
+                IngestBatch.year == year,
+                or_(
+                    and_(
+                        IngestBatch.status == QUEUED,
+                        or_(
+                            IngestBatch.available_at.is_(None),
+                            IngestBatch.available_at <= func.now(),
+                        ),
+                    ),
+                    and_(stale, IngestBatch.attempts < JOB_MAX_ATTEMPTS),
+                ),
+            )
+            .order_by(IngestBatch.batch_id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .cte("ready")
+        )
+        with Session(self.bind) as session:
+            session.execute(
+                update(IngestBatch)
+                .where(
+                    IngestBatch.year == year,
+                    stale,
+                    IngestBatch.attempts >= JOB_MAX_ATTEMPTS,
+                )
+                .values(
+                    status=FAILED,
+                    claimed_by=None,
+                    heartbeat_at=None,
+                    last_error="worker lost: " + IngestBatch.claimed_by,
+                    updated_at=func.now(),
+                )
+            )
+            row = session.execute(
+                update(IngestBatch)
+                .where(IngestBatch.id == ready.c.id)
+                .values(
+                    status=RUNNING,
+                    run_id=self.run_id,
+                    claimed_by=self.worker_id,
+                    heartbeat_at=func.now(),
+                    attempts=IngestBatch.attempts + 1,
+                    updated_at=func.now(),
+                )
+                .returning(IngestBatch.batch_id, ready.c.claimed_by)
+                .execution_options(synchronize_session=False)
+            ).one_or_none()
+            session.commit()
+
+        if row is None:
+            return None
+        batch_id, previous = row
+        if previous is not None:
+            logger.warning(
+                "Reclaimed batch %s of %d from stale worker %s",
+                batch_id,
+                year,
+                previous,
+            )
+        return batch_id
+
+    def pending(self, year: int) -> bool:
+        """Whether batches of ``year`` may still become ready.
+
+        That is, batches waiting out a retry delay, and batches held by
+        other workers (which may fail or go stale).
+        """
+        with Session(self.bind) as session:
+            return session.scalar(
+                select(
+                    select(IngestBatch.id)
+                    .where(
+                        IngestBatch.year == year,
+                        or_(
+                            IngestBatch.status == QUEUED,
+                            and_(
+                                IngestBatch.status == RUNNING,
+                                IngestBatch.claimed_by.is_distinct_from(
+                                    self.worker_id
+                                ),
+                            ),
+                        ),
+                    )
+                    .exists()
+                )
+            )
+
+    def heartbeat(self) -> int:
+        """Refresh the heartbeat of this worker's batches. Returns how many."""
+        with Session(self.bind) as session:
+            result = session.execute(
+                update(IngestBatch)
+                .where(
+                    IngestBatch.claimed_by == self.worker_id,
+                    IngestBatch.status == RUNNING,
+                )
+                .values(heartbeat_at=func.now())
+            )
+            session.commit()
+            return result.rowcount
+
+    def record_batch(
+        self, year: int, batch_id: str, status: str, counts: BatchCounts
+    ) -> None:
+        """Record the outcome of a claimed batch and release it.
+
+        A completed batch is done. A partial one (cut short by ``--limit``
+        or Ctrl-C) is queued again without using up an attempt, and a
+        failed download or a ZIP with unreadable members is retried while
+        attempts remain.
+        """
+        mine = IngestBatch.claimed_by == self.worker_id
+        upsert = self._batch_upsert(
+            year, batch_id, status, counts, where=mine
+        ).returning(IngestBatch.id)
+        if status == COMPLETED:
+            values = dict(
+                claimed_by=None,
+                heartbeat_at=None,
+                last_error=None,
+                updated_at=func.now(),
+            )
+        elif status == DOWNLOAD_FAILED:
+            values = _released(False, DOWNLOAD_FAILED, "download failed")
+        elif status == READ_FAILED:
+            values = _released(False, READ_FAILED, "unreadable members")
+        else:
+            values = _released(status == PARTIAL, FAILED)
+
+        with Session(self.bind) as session:
+            if session.execute(upsert).one_or_none() is None:
+                logger.warning(
+                    "Batch %s of %d was taken over by another worker; "
+                    "not recording its outcome",
+                    batch_id,
+                    year,
+                )
+                return
+            session.execute(
+                update(IngestBatch)
+                .where(
+                    IngestBatch.year == year, IngestBatch.batch_id == batch_id, mine
+                )
+                .values(**values)
+            )
+            session.commit()
+
+    def release(self, error: str | None = None) -> int:
+        """Hand back batches this worker still holds. Returns how many.
+
+        Without an ``error`` the worker stopped cleanly and they are queued
+        again as they were; with one they count as failed attempts.
+        """
+        with Session(self.bind) as session:
+            result = session.execute(
+                update(IngestBatch)
+                .where(
+                    IngestBatch.claimed_by == self.worker_id,
+                    IngestBatch.status == RUNNING,
+                )
+                .values(**_released(error is None, FAILED, error))
+            )
+            session.commit()
+            return result.rowcount
+
+
+class ClaimedBatches(Mapping[str, list[IndexEntry]]):
+    """A year's planned batches (batch_id -> entries), as claimed.
+
+    Iterating claims batches from ``jobs`` one at a time, so batches are
+    only claimed as the pipeline gets to them. While none is ready but some
+    may become so it polls every JOB_POLL_SECONDS; it ends when the year's
+    queue is empty or ``stop`` is set. Claimed batches with nothing left
+    to load are completed straight away.
+
+    While ``busy()`` says batches handed out earlier are still waiting to
+    be read, it yields NOT_READY instead of polling: other workers may be
+    polling for exactly those batches, and a download lookahead that
+    waited for theirs would never get to them.
+    """
+
+    def __init__(
+        self,
+        jobs: JobQueue,
+        year: int,
+        planned: Mapping[str, list[IndexEntry]],
+        stop: threading.Event,
+        busy: Callable[[], bool] = lambda: False,
+    ):
+        self.jobs = jobs
+        self.year = year
+        self.planned = planned
+        self.stop = stop
+        self.busy = busy
+
+    def __getitem__(self, batch_id: str) -> list[IndexEntry]:
+        return self.planned[batch_id]
+
+    def __len__(self) -> int:
+        return len(self.planned)
+
+    def __iter__(self) -> Iterator[str]:
+        while not self.stop.is_set():
+            batch_id = self.jobs.claim(self.year)
+            if batch_id is None:
+                if not self.jobs.pending(self.year):
+                    return
+                if self.busy():
+                    yield NOT_READY
+                    continue
+                self.stop.wait(JOB_POLL_SECONDS)
+                continue
+            if batch_id not in self.planned:
+                logger.info(
+                    "Batch %s of %d has no filings left to load",
+                    batch_id,
+                    self.year,
+                )
+                self.jobs.record_batch(
+                    self.year, batch_id, COMPLETED, BatchCounts()
+                )
+                continue
+            yield batch_id
+
+
+class Heartbeat(threading.Thread):
+    """Refreshes a worker's claims every ``interval`` seconds until stopped."""
+
+    def __init__(self, jobs: JobQueue, interval: float = JOB_HEARTBEAT_SECONDS):
+        super().__init__(name="ingest-heartbeat", daemon=True)
+        self.jobs = jobs
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.jobs.heartbeat()
+            except Exception:
+                logger.exception("Heartbeat failed")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
@@ -2,11 +2,28 @@
 
 import logging
 import os
+import uuid
+from collections import Counter, OrderedDict
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
 
-from sqlalchemy import create_engine, select
+from sqlalchemy import (
+    column,
+    create_engine,
+    func,
+    literal_column,
+    select,
+    table,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session, sessionmaker
 
 from app.models.organization import Filing, FilingGrant, FilingPerson, Organization
+from app.services.latest_financials import refresh_latest_financials
+from scripts.ingest.config import KNOWN_IDS_CHUNK_SIZE, ORG_CACHE_SIZE
 from scripts.ingest.xml_parser import ParsedFiling
 
 logger = logging.getLogger(__name__)
@@ -24,22 +41,193 @@ def get_session_factory(db_url: str | None = None):
     return sessionmaker(bind=engine)
 
 
-def load_filing(session: Session, parsed: ParsedFiling, object_id: str) -> bool:
-    """Load a parsed filing into the database.
+# --- Organization cache ---
 
-    Returns True if the filing was inserted, False if it was skipped
-    (already exists with the same object_id).
+
+# (name, city, state) as written to organizations
+OrgValues = tuple[str, str | None, str | None]
+
+
+@dataclass(slots=True)
+class CachedOrg:
+    id: uuid.UUID
+    name: str
+    city: str | None
+    state: str | None
+
+    @property
+    def values(self) -> OrgValues:
+        return self.name, self.city, self.state
+
+
+@dataclass
+class OrgCacheStats:
+    hits: int = 0  # EINs served from memory
+    misses: int = 0  # EINs looked up in the database
+    inserts: int = 0
+    updates: int = 0
+    unchanged: int = 0  # org loads that needed no write
+
+
+class OrganizationCache:
+    """Bounded LRU of EIN -> organization row, kept across loads.
+
+    Lets the loaders resolve organizations and skip no-op updates without
+    a SELECT per filing. EINs :meth:`warm` found no row for are remembered
+    as absent until they are inserted. The cache records its own writes as
+    they are executed, so after a rollback the caller must :meth:`clear` it.
     """
-    # Idempotency: skip if filing with this object_id already exists
-    existing = session.execute(
-        select(Filing).where(Filing.object_id == object_id)
-    ).scalar_one_or_none()
 
-    if existing is not None:
-        logger.debug("Filing %s already exists, skipping", object_id)
-        return False
+    def __init__(self, max_size: int = ORG_CACHE_SIZE):
+        self.max_size = max_size
+        self.stats = OrgCacheStats()
+        # None marks an EIN known to have no organization yet
+        self._orgs: OrderedDict[str, CachedOrg | None] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._orgs)
+
+    def __contains__(self, ein: str) -> bool:
+        return ein in self._orgs
+
+    def get(self, ein: str) -> CachedOrg | None:
+        """The cached organization, or None if absent or not cached."""
+        if ein not in self._orgs:
+            return None
+        self._orgs.move_to_end(ein)
+        return self._orgs[ein]
+
+    def put(self, ein: str, org: CachedOrg | None) -> None:
+        self._orgs[ein] = org
+        self._orgs.move_to_end(ein)
+        while len(self._orgs) > self.max_size:
+            self._orgs.popitem(last=False)
+
+    def discard(self, ein: str) -> None:
+        self._orgs.pop(ein, None)
+
+    def clear(self) -> None:
+        self._orgs.clear()
+
+    def warm(self, session: Session, eins: Iterable[str]) -> None:
+        """Load the organizations for ``eins`` that are not cached yet.
+
+        One ``ein = ANY(:eins)`` query per ``KNOWN_IDS_CHUNK_SIZE`` EINs.
+        """
+        wanted = set(eins)
+        missing = [ein for ein in wanted if ein not in self._orgs]
+        self.stats.hits += len(wanted) - len(missing)
+        self.stats.misses += len(missing)
+        for start in range(0, len(missing), KNOWN_IDS_CHUNK_SIZE):
+            chunk = missing[start : start + KNOWN_IDS_CHUNK_SIZE]
+            rows = session.execute(
+                text(
+                    "SELECT ein, id, name, city, state FROM organizations "
+                    "WHERE ein = ANY(:eins)"
+                ),
+                {"eins": chunk},
+            )
+            found = {
+                ein: CachedOrg(org_id, name, city, state)
+                for ein, org_id, name, city, state in rows
+            }
+            for ein in chunk:
+                self.put(ein, found.get(ein))
+
+
+def _merged_org(current: OrgValues | None, parsed: ParsedFiling) -> OrgValues:
+    """Org values after applying a filing: the name always, city and state
+    only when the filing has them."""
+    if current is None:
+        return parsed.name, parsed.city, parsed.state
+    _, city, state = current
+    return parsed.name, parsed.city or city, parsed.state or state
 
-    # Upsert organization by EIN
+
+def _upsert_org_cached(
+    session: Session, parsed: ParsedFiling, org_cache: OrganizationCache
+) -> uuid.UUID:
+    """Resolve (inserting or updating as needed) the filing's organization."""
+    org_cache.warm(session, [parsed.ein])
+    cached = org_cache.get(parsed.ein)
+    name, city, state = _merged_org(cached and cached.values, parsed)
+
+    if cached is None:
+        org = _insert_org(session, parsed.ein, (name, city, state), org_cache)
+    elif (name, city, state) == cached.values:
+        org_cache.stats.unchanged += 1
+        return cached.id
+    else:
+        org = CachedOrg(cached.id, name, city, state)
+        session.execute(
+            update(Organization)
+            .where(Organization.id == org.id)
+            .values(name=name, city=city, state=state, updated_at=func.now())
+        )
+        org_cache.stats.updates += 1
+
+    org_cache.put(parsed.ein, org)
+    return org.id
+
+
+def _insert_org(
+    session: Session, ein: str, values: OrgValues, org_cache: OrganizationCache
+) -> CachedOrg:
+    """Insert an organization the cache has no row for.
+
+    Another worker may have inserted it since the cache was warmed, so a
+    conflict merges into that row by the rule of ``_ORG_CONFLICT_SQL``.
+    """
+    name, city, state = values
+    stmt = insert(Organization).values(
+        id=uuid.uuid4(), ein=ein, name=name, city=city, state=state
+    )
+    merged = (
+        stmt.excluded.name,
+        func.coalesce(stmt.excluded.city, Organization.city),
+        func.coalesce(stmt.excluded.state, Organization.state),
+    )
+    row = session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[Organization.ein],
+            set_={
+                "name": merged[0],
+                "city": merged[1],
+                "state": merged[2],
+                "updated_at": func.now(),
+            },
+            where=tuple_(
+                Organization.name, Organization.city, Organization.state
+            ).is_distinct_from(tuple_(*merged)),
+        ).returning(
+            Organization.id,
+            Organization.name,
+            Organization.city,
+            Organization.state,
+            literal_column("xmax = 0"),
+        )
+    ).one_or_none()
+    if row is None:
+        # Already there with these values, so the upsert left it alone
+        row = session.execute(
+            select(
+                Organization.id,
+                Organization.name,
+                Organization.city,
+                Organization.state,
+            ).where(Organization.ein == ein)
+        ).one()
+        org_cache.stats.unchanged += 1
+    elif row[4]:
+        org_cache.stats.inserts += 1
+        logger.debug("Created organization: %s (%s)", name, ein)
+    else:
+        org_cache.stats.updates += 1
+    return CachedOrg(*row[:4])
+
+
+def _upsert_org(session: Session, parsed: ParsedFiling) -> uuid.UUID:
+    """Upsert the filing's organization by EIN through the ORM."""
     org = session.execute(
         select(Organization).where(Organization.ein == parsed.ein)
     ).scalar_one_or_none()
@@ -62,10 +250,41 @@ def load_filing(session: Session, parsed: ParsedFiling, object_id: str) -> bool:
         if parsed.state:
             org.state = parsed.state
         session.flush()
+    return org.id
+
+
+def load_filing(
+    session: Session,
+    parsed: ParsedFiling,
+    object_id: str,
+    org_cache: OrganizationCache | None = None,
+) -> bool:
+    """Load a parsed filing into the database.
+
+    With an ``org_cache`` the organization is resolved from memory and only
+    written when it is new or its name/city/state changed. The
+    organization's row in ``org_latest_financials`` is refreshed.
+
+    Returns True if the filing was inserted, False if it was skipped
+    (already exists with the same object_id).
+    """
+    # Idempotency: skip if filing with this object_id already exists
+    existing = session.execute(
+        select(Filing).where(Filing.object_id == object_id)
+    ).scalar_one_or_none()
+
+    if existing is not None:
+        logger.debug("Filing %s already exists, skipping", object_id)
+        return False
+
+    if org_cache is not None:
+        org_id = _upsert_org_cached(session, parsed, org_cache)
+    else:
+        org_id = _upsert_org(session, parsed)
 
     # Insert filing
     filing = Filing(
-        organization_id=org.id,
+        organization_id=org_id,
         object_id=object_id,
         tax_year=parsed.tax_year or 0,
         filing_type=parsed.form_type or "990",
@@ -114,4 +333,380 @@ def load_filing(session: Session, parsed: ParsedFiling, object_id: str) -> bool:
         session.add(fg)
 
     session.flush()
+    session.execute(refresh_latest_financials([org_id]))
     return True
+
+
+def known_object_ids(session: Session, object_ids: Sequence[str]) -> set[str]:
+    """Return the subset of ``object_ids`` already loaded into filings.
+
+    Checked with one ``object_id = ANY(:ids)`` query per
+    ``KNOWN_IDS_CHUNK_SIZE`` ids, so a whole year's index costs a handful
+    of round trips instead of one SELECT per filing.
+    """
+    known: set[str] = set()
+    for start in range(0, len(object_ids), KNOWN_IDS_CHUNK_SIZE):
+        chunk = list(object_ids[start : start + KNOWN_IDS_CHUNK_SIZE])
+        known.update(
+            session.scalars(
+                text("SELECT object_id FROM filings WHERE object_id = ANY(:ids)"),
+                {"ids": chunk},
+            )
+        )
+    return known
+
+
+# --- Bulk (COPY) loader ---
+
+# Filing columns copied straight from ParsedFiling attributes of the same name
+FILING_VALUE_COLUMNS = (
+    "total_revenue",
+    "total_expenses",
+    "net_assets",
+    "contributions_and_grants",
+    "program_service_revenue",
+    "investment_income",
+    "program_expenses",
+    "management_expenses",
+    "fundraising_expenses",
+    "num_employees",
+    "num_volunteers",
+    "mission_description",
+)
+
+PERSON_COLUMNS = (
+    "name",
+    "title",
+    "compensation",
+    "is_officer",
+    "is_director",
+    "is_key_employee",
+    "is_highest_compensated",
+)
+
+GRANT_COLUMNS = (
+    "recipient_name",
+    "recipient_ein",
+    "recipient_city",
+    "recipient_state",
+    "amount",
+    "purpose",
+)
+
+STAGE_FILING_COLUMNS = (
+    "seq",
+    "id",
+    "object_id",
+    "ein",
+    "name",
+    "city",
+    "state",
+    "tax_year",
+    "filing_type",
+    *FILING_VALUE_COLUMNS,
+)
+
+# Temp tables live for the connection; ON COMMIT DELETE ROWS keeps them
+# empty between batches without paying for DDL on every commit.
+_STAGING_DDL = (
+    """
+    CREATE TEMP TABLE IF NOT EXISTS ingest_stage_filings (
+        seq integer NOT NULL,
+        id uuid NOT NULL,
+        object_id varchar(50) NOT NULL,
+        ein varchar(10) NOT NULL,
+        name text NOT NULL,
+        city text,
+        state varchar(2),
+        tax_year integer NOT NULL,
+        filing_type varchar(10) NOT NULL,
+        total_revenue bigint,
+        total_expenses bigint,
+        net_assets bigint,
+        contributions_and_grants bigint,
+        program_service_revenue bigint,
+        investment_income bigint,
+        program_expenses bigint,
+        management_expenses bigint,
+        fundraising_expenses bigint,
+        num_employees integer,
+        num_volunteers integer,
+        mission_description text
+    ) ON COMMIT DELETE ROWS
+    """,
+    """
+    CREATE TEMP TABLE IF NOT EXISTS ingest_stage_people (
+        filing_id uuid NOT NULL,
+        name text NOT NULL,
+        title text,
+        compensation bigint,
+        is_officer boolean,
+        is_director boolean,
+        is_key_employee boolean,
+        is_highest_compensated boolean
+    ) ON COMMIT DELETE ROWS
+    """,
+    """
+    CREATE TEMP TABLE IF NOT EXISTS ingest_stage_orgs (
+        id uuid NOT NULL,
+        ein varchar(10) NOT NULL,
+        name text NOT NULL,
+        city text,
+        state varchar(2)
+    ) ON COMMIT DELETE ROWS
+    """,
+    """
+    CREATE TEMP TABLE IF NOT EXISTS ingest_stage_grants (
+        filing_id uuid NOT NULL,
+        recipient_name text NOT NULL,
+        recipient_ein varchar(10),
+        recipient_city text,
+        recipient_state varchar(2),
+        amount bigint,
+        purpose text
+    ) ON COMMIT DELETE ROWS
+    """,
+)
+
+# Drop filings that are already loaded, then in-batch duplicates (first
+# occurrence wins, matching the per-filing loader). Both return the dropped
+# seqs so the org cache only sees filings that will be inserted.
+_DEDUP_SQL = (
+    """
+    DELETE FROM ingest_stage_filings s
+    USING filings f
+    WHERE f.object_id = s.object_id
+    RETURNING s.seq
+    """,
+    """
+    DELETE FROM ingest_stage_filings s
+    USING ingest_stage_filings d
+    WHERE d.object_id = s.object_id AND d.seq < s.seq
+    RETURNING s.seq
+    """,
+)
+
+# city/state only overwrite when present, as in load_filing; rows whose
+# values would not change are left alone instead of rewritten.
+_ORG_CONFLICT_SQL = """
+    ON CONFLICT (ein) DO UPDATE SET
+        name = EXCLUDED.name,
+        city = COALESCE(EXCLUDED.city, organizations.city),
+        state = COALESCE(EXCLUDED.state, organizations.state),
+        updated_at = now()
+    WHERE (organizations.name, organizations.city, organizations.state)
+        IS DISTINCT FROM (
+            EXCLUDED.name,
+            COALESCE(EXCLUDED.city, organizations.city),
+            COALESCE(EXCLUDED.state, organizations.state)
+        )
+"""
+
+# Latest filing in the batch wins the name and any city/state it has.
+_UPSERT_ORGS_SQL = f"""
+    INSERT INTO organizations (ein, name, city, state)
+    SELECT
+        ein,
+        (array_agg(name ORDER BY seq DESC))[1],
+        (array_agg(city ORDER BY seq DESC) FILTER (WHERE city <> ''))[1],
+        (array_agg(state ORDER BY seq DESC) FILTER (WHERE state <> ''))[1]
+    FROM ingest_stage_filings
+    GROUP BY ein
+    {_ORG_CONFLICT_SQL}
+"""
+
+# Used with an OrganizationCache: only new or changed orgs are staged, with
+# the values already merged client-side and a client-generated id.
+_UPSERT_STAGED_ORGS_SQL = f"""
+    INSERT INTO organizations (id, ein, name, city, state)
+    SELECT id, ein, name, city, state FROM ingest_stage_orgs
+    {_ORG_CONFLICT_SQL}
+    RETURNING ein, id, name, city, state, (xmax = 0) AS inserted
+"""
+
+_INSERT_FILINGS_SQL = f"""
+    INSERT INTO filings (
+        id, organization_id, object_id, tax_year, filing_type,
+        {", ".join(FILING_VALUE_COLUMNS)}
+    )
+    SELECT
+        s.id, o.id, s.object_id, s.tax_year, s.filing_type,
+        {", ".join(f"s.{c}" for c in FILING_VALUE_COLUMNS)}
+    FROM ingest_stage_filings s
+    JOIN organizations o ON o.ein = s.ein
+    ON CONFLICT (object_id) DO NOTHING
+"""
+
+# Joining on filings.id drops children of filings that were skipped above,
+# including ones a concurrent loader inserted between the DELETE and INSERT.
+_INSERT_PEOPLE_SQL = f"""
+    INSERT INTO filing_people (filing_id, {", ".join(PERSON_COLUMNS)})
+    SELECT p.filing_id, {", ".join(f"p.{c}" for c in PERSON_COLUMNS)}
+    FROM ingest_stage_people p
+    JOIN filings f ON f.id = p.filing_id
+"""
+
+_INSERT_GRANTS_SQL = f"""
+    INSERT INTO filing_grants (filing_id, {", ".join(GRANT_COLUMNS)})
+    SELECT g.filing_id, {", ".join(f"g.{c}" for c in GRANT_COLUMNS)}
+    FROM ingest_stage_grants g
+    JOIN filings f ON f.id = g.filing_id
+"""
+
+_stage_filings = table("ingest_stage_filings", column("id"))
+
+
+def load_filings_bulk(
+    session: Session,
+    filings: Sequence[tuple[ParsedFiling, str]],
+    org_cache: OrganizationCache | None = None,
+    rows: Counter | None = None,
+) -> int:
+    """Load a batch of parsed filings with COPY and set-based merges.
+
+    ``filings`` is a sequence of ``(parsed, object_id)`` pairs. Rows are
+    COPYed into temp staging tables and merged into ``organizations``,
+    ``filings``, ``filing_people`` and ``filing_grants`` with one statement
+    per table. Filings whose object_id already exists are skipped. With an
+    ``org_cache`` only organizations that are new or changed are written.
+    ``org_latest_financials`` is refreshed for the organizations that got a
+    filing.
+    Rows inserted per table are added to ``rows`` if given.
+
+    Returns the number of filings inserted. The caller commits.
+    """
+    if not filings:
+        return 0
+
+    for ddl in _STAGING_DDL:
+        session.execute(text(ddl))
+    session.execute(
+        text(
+            "TRUNCATE ingest_stage_filings, ingest_stage_people, "
+            "ingest_stage_orgs, ingest_stage_grants"
+        )
+    )
+
+    filing_rows = []
+    people_rows = []
+    grant_rows = []
+    for seq, (parsed, object_id) in enumerate(filings):
+        filing_id = uuid.uuid4()
+        filing_rows.append(
+            (
+                seq,
+                filing_id,
+                object_id,
+                parsed.ein,
+                parsed.name,
+                parsed.city,
+                parsed.state,
+                parsed.tax_year or 0,
+                parsed.form_type or "990",
+                *(getattr(parsed, c) for c in FILING_VALUE_COLUMNS),
+            )
+        )
+        for person in parsed.people:
+            people_rows.append(
+                (filing_id, *(getattr(person, c) for c in PERSON_COLUMNS))
+            )
+        for grant in parsed.grants:
+            grant_rows.append(
+                (filing_id, *(getattr(grant, c) for c in GRANT_COLUMNS))
+            )
+
+    raw_conn = session.connection().connection.driver_connection
+    with raw_conn.cursor() as cur:
+        _copy_rows(cur, "ingest_stage_filings", STAGE_FILING_COLUMNS, filing_rows)
+        _copy_rows(
+            cur, "ingest_stage_people", ("filing_id", *PERSON_COLUMNS), people_rows
+        )
+        _copy_rows(
+            cur, "ingest_stage_grants", ("filing_id", *GRANT_COLUMNS), grant_rows
+        )
+
+    dropped: set[int] = set()
+    for stmt in _DEDUP_SQL:
+        dropped.update(session.scalars(text(stmt)))
+    if org_cache is None:
+        session.execute(text(_UPSERT_ORGS_SQL))
+    else:
+        kept = [parsed for seq, (parsed, _) in enumerate(filings) if seq not in dropped]
+        _upsert_orgs_cached(session, kept, org_cache)
+    inserted = session.execute(text(_INSERT_FILINGS_SQL)).rowcount
+    people = session.execute(text(_INSERT_PEOPLE_SQL)).rowcount
+    grants = session.execute(text(_INSERT_GRANTS_SQL)).rowcount
+    if inserted:
+        # Organizations of the filings just inserted (staged ids are kept)
+        touched = select(Filing.organization_id).join(
+            _stage_filings, _stage_filings.c.id == Filing.id
+        )
+        session.execute(refresh_latest_financials(touched))
+    if rows is not None:
+        rows.update(filings=inserted, filing_people=people, filing_grants=grants)
+
+    logger.debug(
+        "Bulk loaded %d of %d filings (%d people, %d grants staged)",
+        inserted,
+        len(filings),
+        len(people_rows),
+        len(grant_rows),
+    )
+    return inserted
+
+
+def _upsert_orgs_cached(
+    session: Session, filings: list[ParsedFiling], org_cache: OrganizationCache
+) -> None:
+    """Write the new or changed organizations of ``filings`` (in order)."""
+    org_cache.warm(session, {parsed.ein for parsed in filings})
+
+    merged: dict[str, OrgValues] = {}
+    for parsed in filings:
+        current = merged.get(parsed.ein)
+        if current is None and (cached := org_cache.get(parsed.ein)):
+            current = cached.values
+        merged[parsed.ein] = _merged_org(current, parsed)
+
+    staged = []
+    for ein, values in merged.items():
+        cached = org_cache.get(ein)
+        if cached is None:
+            staged.append((uuid.uuid4(), ein, *values))
+        elif values != cached.values:
+            staged.append((cached.id, ein, *values))
+        else:
+            org_cache.stats.unchanged += 1
+    if not staged:
+        return
+
+    raw_conn = session.connection().connection.driver_connection
+    with raw_conn.cursor() as cur:
+        _copy_rows(
+            cur, "ingest_stage_orgs", ("id", "ein", "name", "city", "state"), staged
+        )
+    written = set()
+    for ein, org_id, name, city, state, was_inserted in session.execute(
+        text(_UPSERT_STAGED_ORGS_SQL)
+    ):
+        org_cache.put(ein, CachedOrg(org_id, name, city, state))
+        written.add(ein)
+        if was_inserted:
+            org_cache.stats.inserts += 1
+        else:
+            org_cache.stats.updates += 1
+    # Staged rows the upsert skipped were already current in the database
+    # (another writer got there first); forget them so they are re-read.
+    for _, ein, *_ in staged:
+        if ein not in written:
+            org_cache.discard(ein)
+            org_cache.stats.unchanged += 1
+
+
+def _copy_rows(cur, table: str, columns: Sequence[str], rows: list[tuple]) -> None:
+    """COPY rows into a staging table via psycopg's copy API."""
+    if not rows:
+        return
+    with cur.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+        for row in rows:
+            copy.write_row(row)
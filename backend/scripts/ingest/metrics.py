@@ -0,0 +1,253 @@
+"""Per-stage ingestion metrics: timers plus byte and row counters.
+
+Stages report through the module-level :func:`record` and
+:func:`add_rows`, which feed the :class:`Metrics` installed for the
+current run and do nothing otherwise, so download threads and parse
+helpers need no handle on the pipeline. Each stage keeps a sliding window
+of recent samples for the periodic log lines and run totals (with a
+sampled reservoir for percentiles) for the final report.
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any
+
+from scripts.ingest.config import (
+    METRICS_LOG_INTERVAL_SECONDS,
+    METRICS_RESERVOIR_SIZE,
+    METRICS_WINDOW_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[round(q * (len(ordered) - 1))]
+
+
+class _Series:
+    """Samples of one stage (or table): a time window plus run totals.
+
+    A sample is one operation (a download, a member read, a parse, a
+    commit) covering ``count`` items; percentiles are per operation.
+    """
+
+    __slots__ = ("window", "count", "ops", "seconds", "nbytes", "reservoir")
+
+    def __init__(self):
+        # (recorded at, seconds, count, nbytes)
+        self.window: deque[tuple[float, float, int, int]] = deque()
+        self.count = 0
+        self.ops = 0
+        self.seconds = 0.0
+        self.nbytes = 0
+        self.reservoir: list[float] = []
+
+    def add(self, now: float, seconds: float, count: int, nbytes: int) -> None:
+        self.window.append((now, seconds, count, nbytes))
+        self.count += count
+        self.seconds += seconds
+        self.nbytes += nbytes
+        # Reservoir sampling keeps run percentiles at bounded memory
+        self.ops += 1
+        if len(self.reservoir) < METRICS_RESERVOIR_SIZE:
+            self.reservoir.append(seconds)
+        else:
+            slot = random.randrange(self.ops)
+            if slot < METRICS_RESERVOIR_SIZE:
+                self.reservoir[slot] = seconds
+
+    def prune(self, cutoff: float) -> None:
+        while self.window and self.window[0][0] < cutoff:
+            self.window.popleft()
+
+    def summary(
+        self,
+        span: float,
+        count: int,
+        seconds: float,
+        nbytes: int,
+        durations: list[float],
+        ops: int,
+    ) -> dict[str, float]:
+        span = max(span, 1e-9)
+        summary = {
+            "count": count,
+            "per_sec": round(count / span, 2),
+            "busy_sec": round(seconds, 3),
+            "mean_ms": round(1000 * seconds / ops, 2) if ops else 0.0,
+            "p50_ms": round(1000 * _percentile(durations, 0.50), 2),
+            "p95_ms": round(1000 * _percentile(durations, 0.95), 2),
+            # busy time per wall-clock second; > 1 means parallel work
+            "utilization": round(seconds / span, 3),
+        }
+        if self.nbytes:
+            summary["mb_per_sec"] = round(nbytes / (1024 * 1024) / span, 2)
+        return summary
+
+
+class Metrics:
+    """Thread-safe timers and counters for one pipeline run."""
+
+    def __init__(self, window: float = METRICS_WINDOW_SECONDS):
+        self.window = window
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._stages: dict[str, _Series] = {}
+        self._rows: dict[str, _Series] = {}
+
+    def record(
+        self, stage: str, seconds: float, count: int = 1, nbytes: int = 0
+    ) -> None:
+        """Record ``count`` items taking ``seconds`` (and moving ``nbytes``)."""
+        with self._lock:
+            series = self._stages.get(stage)
+            if series is None:
+                series = self._stages[stage] = _Series()
+            series.add(time.monotonic(), seconds, count, nbytes)
+
+    def add_rows(self, table: str, rows: int) -> None:
+        """Count ``rows`` written to ``table``."""
+        if not rows:
+            return
+        with self._lock:
+            series = self._rows.get(table)
+            if series is None:
+                series = self._rows[table] = _Series()
+            series.add(time.monotonic(), 0.0, rows, 0)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Rates and latencies over the last ``window`` seconds."""
+        now = time.monotonic()
+        span = min(self.window, now - self.started)
+        with self._lock:
+            for series in (*self._stages.values(), *self._rows.values()):
+                series.prune(now - self.window)
+            stages = {
+                name: series.summary(
+                    span,
+                    sum(s[2] for s in series.window),
+                    sum(s[1] for s in series.window),
+                    sum(s[3] for s in series.window),
+                    [s[1] for s in series.window],
+                    len(series.window),
+                )
+                for name, series in self._stages.items()
+            }
+            rows = {
+                table: round(sum(s[2] for s in series.window) / max(span, 1e-9), 2)
+                for table, series in self._rows.items()
+            }
+        return {"window_sec": round(span, 1), "stages": stages, "rows_per_sec": rows}
+
+    def report(self) -> dict[str, Any]:
+        """Totals for the whole run so far."""
+        elapsed = time.monotonic() - self.started
+        with self._lock:
+            stages = {
+                name: series.summary(
+                    elapsed,
+                    series.count,
+                    series.seconds,
+                    series.nbytes,
+                    series.reservoir,
+                    series.ops,
+                )
+                for name, series in self._stages.items()
+            }
+            rows = {
+                table: {
+                    "rows": series.count,
+                    "per_sec": round(series.count / max(elapsed, 1e-9), 2),
+                }
+                for table, series in self._rows.items()
+            }
+        return {"elapsed_sec": round(elapsed, 1), "stages": stages, "rows": rows}
+
+
+_current: Metrics | None = None
+
+
+def install(metrics: Metrics | None) -> None:
+    """Make ``metrics`` receive :func:`record` / :func:`add_rows` calls."""
+    global _current
+    _current = metrics
+
+
+def record(stage: str, seconds: float, count: int = 1, nbytes: int = 0) -> None:
+    metrics = _current
+    if metrics is not None:
+        metrics.record(stage, seconds, count, nbytes)
+
+
+def add_rows(table: str, rows: int) -> None:
+    metrics = _current
+    if metrics is not None:
+        metrics.add_rows(table, rows)
+
+
+def timed_call(fn: Callable, *args) -> tuple[Any, float]:
+    """``(fn(*args), seconds)``; picklable, for timing work in pool workers."""
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def timed_iter(
+    stage: str, items: Iterable[tuple[str, Any]]
+) -> Iterator[tuple[str, Any]]:
+    """Yield ``items``, recording the time to produce each (name, data).
+
+    Bytes moved are counted for ``data`` that is bytes (not for streams).
+    """
+    it = iter(items)
+    while True:
+        started = time.perf_counter()
+        item = next(it, None)
+        if item is None:
+            return
+        data = item[1]
+        nbytes = len(data) if isinstance(data, bytes) else 0
+        record(stage, time.perf_counter() - started, nbytes=nbytes)
+        yield item
+
+
+class Reporter(threading.Thread):
+    """Logs a JSON metrics line every ``interval`` seconds until stopped.
+
+    ``extra`` returns fields (counters, queue depths) merged into each line.
+    """
+
+    def __init__(
+        self,
+        metrics: Metrics,
+        extra: Callable[[], dict[str, Any]] | None = None,
+        interval: float = METRICS_LOG_INTERVAL_SECONDS,
+    ):
+        super().__init__(name="ingest-metrics", daemon=True)
+        self.metrics = metrics
+        self.extra = extra
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.log()
+
+    def log(self) -> None:
+        line = self.metrics.snapshot()
+        if self.extra is not None:
+            line.update(self.extra())
+        logger.info("metrics %s", json.dumps(line, sort_keys=True))
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
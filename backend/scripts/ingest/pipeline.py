@@ -1,18 +1,56 @@
 """CLI orchestrator for the IRS 990 ingestion pipeline."""
 
 import argparse
-import gc
+import json
 import logging
+import multiprocessing
+import queue
 import resource
-from collections import defaultdict
+import signal
+import sys
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import closing
+from dataclasses import dataclass
 
 from sqlalchemy.orm import Session
 
-from scripts.ingest.config import HISTORICAL_YEARS
-from scripts.ingest.downloader import open_zip_batch
-from scripts.ingest.index_downloader import download_index
-from scripts.ingest.loader import get_session_factory, load_filing
-from scripts.ingest.xml_parser import parse_filing
+from scripts.ingest import checkpoint, dead_letters, jobs, metrics
+from scripts.ingest.cache import HttpCache
+from scripts.ingest.config import (
+    BATCH_SIZE,
+    CACHE_DIR,
+    HISTORICAL_YEARS,
+    KNOWN_IDS_CHUNK_SIZE,
+    PARALLEL_YEARS,
+    PARSE_IN_FLIGHT_PER_WORKER,
+    PARSE_WORKER_MAX_TASKS,
+    PREFETCH_DEPTH,
+    RSS_BUDGET_BYTES,
+    RSS_POLL_SECONDS,
+    STAGE_QUEUE_SIZE,
+    TARGET_FILINGS_PER_MINUTE,
+)
+from scripts.ingest.downloader import (
+    NOT_READY,
+    READ_ERRORS,
+    XmlMember,
+    prefetch_batches,
+)
+from scripts.ingest.index_downloader import IndexEntry, index_batches
+from scripts.ingest.index_snapshot import IndexSnapshot
+from scripts.ingest.loader import (
+    OrganizationCache,
+    get_session_factory,
+    known_object_ids,
+    load_filing,
+    load_filings_bulk,
+)
+from scripts.ingest.stages import Stage, drain, join_all
+from scripts.ingest.xml_parser import ParsedFiling, feed_filing, parse_filing
 
 logging.basicConfig(
     level=logging.INFO,
@@ -21,159 +59,1099 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def _peak_rss_mb() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_maxrss / 1024  # Linux reports in KB
+
+
+def _rss_bytes() -> int | None:
+    """Current resident set size, or None where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _MemoryGate:
+    """RSS-based backpressure for the source stage.
+
+    :meth:`wait` blocks while this process's RSS is over ``limit`` and
+    ``busy()`` says filings are still queued downstream, i.e. until the
+    parse and load stages have caught up and freed what they held. With
+    nothing queued it lets the source go on whatever the RSS, so memory
+    that is never given back to the OS cannot stall the run. The pipeline
+    gates at RSS_BUDGET_BYTES while either stage queue holds anything.
+    """
+
+    def __init__(self, limit: int, busy: Callable[[], bool]):
+        self.limit = limit
+        self.busy = busy
+        self._throttled = False
+
+    def wait(self, stop: threading.Event) -> None:
+        started = None
+        while not stop.is_set() and self.busy():
+            rss = _rss_bytes()
+            if rss is None or rss <= self.limit:
+                break
+            if started is None:
+                started = time.perf_counter()
+            if not self._throttled:
+                self._throttled = True
+                logger.info(
+                    "RSS %.0f MB over %.0f MB budget; waiting for the queues",
+                    rss / (1024 * 1024),
+                    self.limit / (1024 * 1024),
+                )
+            stop.wait(RSS_POLL_SECONDS)
+        if started is None:
+            self._throttled = False
+        else:
+            metrics.record("backpressure", time.perf_counter() - started)
+
+
 def _log_memory():
     """Log peak RSS memory usage via stdlib resource module."""
-    usage = resource.getrusage(resource.RUSAGE_SELF)
-    peak_mb = usage.ru_maxrss / 1024  # Linux reports in KB
+    peak_mb = _peak_rss_mb()
     logger.info("Peak RSS memory: %.1f MB", peak_mb)
 
 
-def run_pipeline(mode: str, limit: int | None = None):
-    """Run the ingestion pipeline."""
+def _log_org_cache(org_cache: OrganizationCache):
+    stats = org_cache.stats
+    logger.info(
+        "Org cache: %d hits, %d misses; %d inserted, %d updated, %d unchanged",
+        stats.hits,
+        stats.misses,
+        stats.inserts,
+        stats.updates,
+        stats.unchanged,
+    )
+
+
+def _make_parse_executor(workers: int) -> ProcessPoolExecutor | None:
+    """Create the XML parse pool, or None to parse in-process."""
+    if workers <= 1:
+        return None
+    # spawn keeps the loader's DB connections out of the children
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        max_tasks_per_child=PARSE_WORKER_MAX_TASKS,
+        # Ctrl-C reaches the whole process group; workers ignore it, finish
+        # their filings and leave shutdown to the parent
+        initializer=signal.signal,
+        initargs=(signal.SIGINT, signal.SIG_IGN),
+    )
+
+
+@dataclass(slots=True)
+class BatchStart:
+    """Marks where a ZIP batch's filings begin in the stage queues."""
+
+    year: int
+    batch_id: str
+    eins: set[str]
+
+
+@dataclass(slots=True)
+class BatchEnd:
+    """Marks the end of a ZIP batch; its checkpoint status travels with it.
+
+    ``status`` is None for filings replayed from the dead-letter store,
+    which are not checkpointed.
+    """
+
+    year: int
+    batch_id: str
+    entries: int
+    status: str | None
+
+
+@dataclass(slots=True)
+class Unread:
+    """A filing whose ZIP member could not be read (corrupt data).
+
+    Passed on to the load stage to be dead-lettered, and ends its batch
+    as READ_FAILED rather than completed, so the batch is fetched again.
+    """
+
+    entry: IndexEntry
+    error: Exception
+
+
+# Batch boundaries travel through the stage queues in order with filings,
+# as do the filings that could not be read; the parse stage passes both on
+Marker = BatchStart | BatchEnd | Unread
+
+
+@dataclass(slots=True)
+class Streamed:
+    """A filing over the memory budget, parsed as it was read from its ZIP.
+
+    ``xml`` is the compressed copy kept for the dead-letter store.
+    """
+
+    entry: IndexEntry
+    result: ParsedFiling | BaseException | None
+    xml: dead_letters.XmlSpool
+
+
+def _matched(
+    xml_iter: Iterable[tuple[str, XmlMember]], entry_lookup: dict[str, IndexEntry]
+) -> Iterator[tuple[IndexEntry, bytes] | Streamed | Unread]:
+    """Yield (entry, xml_bytes) for ZIP members present in the index.
+
+    Members streamed in chunks are parsed here, before the next member is
+    read (see :func:`_parse_chunks`). Members that could not be read come
+    out as Unread; if the ZIP cannot be read any further, so do all the
+    indexed members not reached.
+    """
+    seen = set()
+    try:
+        for filename, xml in xml_iter:
+            entry = entry_lookup.get(filename)
+            if entry is None:
+                continue
+            seen.add(filename)
+            if isinstance(xml, bytes):
+                yield entry, xml
+            elif isinstance(xml, Exception):
+                yield Unread(entry, xml)
+            else:
+                yield _parse_chunks(entry, xml)
+    except READ_ERRORS as exc:
+        logger.warning("Cannot read the rest of the ZIP: %s", exc)
+        for filename, entry in entry_lookup.items():
+            if filename not in seen:
+                yield Unread(entry, exc)
+
+
+def _parse_chunks(entry: IndexEntry, chunks: Iterator[bytes]) -> Streamed | Unread:
+    """Feed a member's chunks straight from the ZIP to the parser.
+
+    Runs in the source thread: the chunks come off the open member, so
+    they cannot be handed to a parser process. A member that fails to
+    read (a failed CRC check) is Unread.
+    """
+    spool = dead_letters.XmlSpool()
+    started = time.perf_counter()
+    try:
+        result = feed_filing(spool.tee(chunks))
+    except READ_ERRORS as exc:
+        return Unread(entry, exc)
+    except Exception as exc:
+        result = exc
+    spool.close()
+    metrics.record("parse", time.perf_counter() - started, nbytes=spool.size)
+    return Streamed(entry, result, spool)
+
+
+# (entry, result, xml); the XML is kept for the dead-letter store
+ParseResult = tuple[
+    IndexEntry, ParsedFiling | BaseException | None, bytes | dead_letters.XmlSpool
+]
+
+
+def _parse_stream(
+    items: Iterable[tuple[IndexEntry, bytes] | Streamed | Marker],
+    executor: ProcessPoolExecutor | None,
+    workers: int,
+) -> Iterator[ParseResult | Marker]:
+    """Parse filings in input order, in-process or on a process pool.
+
+    For each (entry, xml_bytes) in ``items`` yields (entry, result,
+    xml_bytes) where result is the ParsedFiling, None for unparseable XML,
+    or the exception raised while parsing; Streamed filings, parsed
+    upstream, come out the same way. Anything else in ``items`` (batch
+    markers and Unread filings) is passed through in order. At most
+    ``workers * PARSE_IN_FLIGHT_PER_WORKER`` filings are in flight so peak
+    memory stays bounded regardless of ZIP size; finished results are
+    yielded as soon as everything before them is. Being a stage of its
+    own, parsing overlaps the downloads upstream and the loads downstream.
+    """
+    if executor is None:
+        for item in items:
+            if isinstance(item, Streamed):
+                yield item.entry, item.result, item.xml
+                continue
+            if not isinstance(item, tuple):
+                yield item
+                continue
+            entry, xml_bytes = item
+            try:
+                parsed, seconds = metrics.timed_call(parse_filing, xml_bytes)
+            except Exception as exc:
+                yield entry, exc, xml_bytes
+                continue
+            metrics.record("parse", seconds)
+            yield entry, parsed, xml_bytes
+        return
+
+    max_in_flight = workers * PARSE_IN_FLIGHT_PER_WORKER
+    in_flight: deque[tuple[IndexEntry, bytes, Future] | Streamed | Marker] = deque()
+    for item in items:
+        if isinstance(item, tuple):
+            entry, xml_bytes = item
+            future = executor.submit(metrics.timed_call, parse_filing, xml_bytes)
+            in_flight.append((entry, xml_bytes, future))
+        else:
+            in_flight.append(item)
+        while in_flight and (
+            len(in_flight) >= max_in_flight or _is_ready(in_flight[0])
+        ):
+            yield _parse_result(in_flight.popleft())
+    while in_flight:
+        yield _parse_result(in_flight.popleft())
+
+
+def _is_ready(item: tuple[IndexEntry, bytes, Future] | Streamed | Marker) -> bool:
+    return not isinstance(item, tuple) or item[2].done()
+
+
+def _parse_result(
+    item: tuple[IndexEntry, bytes, Future] | Streamed | Marker,
+) -> ParseResult | Marker:
+    """Resolve an in-flight (entry, xml_bytes, future); markers pass through."""
+    if isinstance(item, Streamed):
+        return item.entry, item.result, item.xml
+    if not isinstance(item, tuple):
+        return item
+    entry, xml_bytes, future = item
+    try:
+        parsed, seconds = future.result()
+    except Exception as exc:
+        return entry, exc, xml_bytes
+    metrics.record("parse", seconds)
+    return entry, parsed, xml_bytes
+
+
+def _flush_bulk(
+    bind,
+    year: int,
+    pending: list[tuple[ParsedFiling, IndexEntry, bytes | dead_letters.XmlSpool]],
+    org_cache: OrganizationCache,
+    dead: dead_letters.DeadLetters,
+) -> tuple[int, int, int]:
+    """COPY a batch of parsed filings. Returns (loaded, skipped, errors).
+
+    If the batch fails as a whole (e.g. one row violates a constraint), its
+    filings are retried one at a time so a single bad filing only costs
+    itself; filings that still fail go to the dead-letter store.
+    """
+    try:
+        started = time.perf_counter()
+        rows: Counter = Counter()
+        filings = [(parsed, entry.object_id) for parsed, entry, _ in pending]
+        with Session(bind) as session:
+            loaded = load_filings_bulk(session, filings, org_cache, rows)
+            session.commit()
+        metrics.record("write", time.perf_counter() - started, count=len(pending))
+        for table, count in rows.items():
+            metrics.add_rows(table, count)
+        return loaded, len(pending) - loaded, 0
+    except Exception:
+        # The rollback may have undone org writes the cache recorded
+        org_cache.clear()
+        logger.exception(
+            "Bulk load of %d filings failed; retrying one at a time",
+            len(pending),
+        )
+
+    loaded = skipped = errors = 0
+    for parsed, entry, xml in pending:
+        try:
+            if _load_one(bind, parsed, entry.object_id, org_cache):
+                loaded += 1
+            else:
+                skipped += 1
+        except Exception as exc:
+            org_cache.clear()
+            errors += 1
+            logger.exception("Error processing filing %s", entry.object_id)
+            dead.record(year, entry, dead_letters.LOAD, xml, exc)
+    return loaded, skipped, errors
+
+
+def _plan_year(
+    year: int,
+    run: checkpoint.Checkpoint,
+    bind,
+    cache: HttpCache | None,
+    resume: bool,
+    counts: Counter,
+    snapshot: IndexSnapshot | None = None,
+    diff: bool = False,
+) -> dict[str, list[IndexEntry]]:
+    """Index stage: the year's entries still to load, grouped by ZIP batch.
+
+    The index is streamed a batch at a time; completed batches (with
+    ``resume``), batches unchanged since their ``snapshot`` (with
+    ``diff``) and filings already in the database are dropped as they are
+    read, so only the entries still to load are kept. The index is
+    digested into ``snapshot`` on the way, and batches left with nothing
+    to load are snapshotted straight away.
+    """
+    completed = run.completed_batches(year) if resume else set()
+    batches: dict[str, list[IndexEntry]] = defaultdict(list)
+    checked: set[str] = set()
+    held: list[IndexEntry] = []
+    indexed = skipped_no_batch = skipped_completed = unchanged = known = 0
+
+    def drop_known() -> int:
+        # Checked KNOWN_IDS_CHUNK_SIZE entries at a time, across batches
+        with Session(bind) as session:
+            ids = known_object_ids(session, [e.object_id for e in held])
+        for entry in held:
+            if entry.object_id not in ids:
+                batches[entry.xml_batch_id].append(entry)
+        held.clear()
+        return len(ids)
+
+    for batch_id, entries in index_batches(year, cache=cache):
+        # Skip entries without batch_id
+        if not batch_id:
+            skipped_no_batch += len(entries)
+            continue
+        indexed += len(entries)
+        if batch_id in completed:
+            skipped_completed += len(entries)
+            continue
+        if snapshot is not None and snapshot.add(year, batch_id, entries) and diff:
+            unchanged += 1
+            continue
+        checked.add(batch_id)
+        held.extend(entries)
+        if len(held) >= KNOWN_IDS_CHUNK_SIZE:
+            known += drop_known()
+    if held:
+        known += drop_known()
+    if snapshot is not None:
+        snapshot.save(year, checked - batches.keys())
+
+    if not indexed:
+        logger.warning("No entries for year %d", year)
+        return {}
+    if skipped_no_batch:
+        logger.warning(
+            "Year %d: skipped %d entries without XML_BATCH_ID",
+            year,
+            skipped_no_batch,
+        )
+    if resume:
+        logger.info(
+            "Year %d: skipping %d filings in %d completed batches",
+            year,
+            skipped_completed,
+            len(completed),
+        )
+    if diff:
+        logger.info(
+            "Year %d: %d ZIP batches unchanged since the last index snapshot, "
+            "%d new or changed",
+            year,
+            unchanged,
+            len(checked),
+        )
+        stored = snapshot.stored(year)
+        for batch_id, new in sorted(batches.items()):
+            logger.info(
+                "Year %d: %s has %d new filings (%s)",
+                year,
+                batch_id,
+                len(new),
+                "changed batch" if batch_id in stored else "new batch",
+            )
+    counts["already_ingested"] += known
+    logger.info(
+        "Year %d: %d entries indexed; %d filings already ingested; "
+        "%d to load in %d ZIP batches",
+        year,
+        indexed,
+        known,
+        sum(len(b) for b in batches.values()),
+        len(batches),
+    )
+    return dict(batches)
+
+
+class _Members(Mapping[tuple[int, str], dict[str, IndexEntry]]):
+    """ZIP member name -> index entry, per (year, batch_id), built on use.
+
+    ``planned`` holds the entries of the batches handed out for download;
+    the keys of a batch's lookup are also the members to fetch when
+    reading its ZIP by range. A batch is released once it is done.
+    """
+
+    def __init__(self, planned: dict[tuple[int, str], list[IndexEntry]]):
+        self.planned = planned
+        self._lookups: dict[tuple[int, str], dict[str, IndexEntry]] = {}
+
+    def __getitem__(self, key: tuple[int, str]) -> dict[str, IndexEntry]:
+        lookup = self._lookups.get(key)
+        if lookup is None:
+            lookup = self._lookups[key] = {
+                f"{e.object_id}_public.xml": e for e in self.planned[key]
+            }
+        return lookup
+
+    def __iter__(self) -> Iterator[tuple[int, str]]:
+        return iter(self._lookups)
+
+    def __len__(self) -> int:
+        return len(self._lookups)
+
+    def release(self, key: tuple[int, str]) -> None:
+        self.planned.pop(key, None)
+        self._lookups.pop(key, None)
+
+
+def _interleave(
+    years: list[int],
+    plan: Callable[[int], Mapping[str, list[IndexEntry]]],
+    parallel: int,
+    planned: dict[tuple[int, str], list[IndexEntry]],
+) -> Iterator[tuple[int, str]]:
+    """Yield (year, batch_id) round-robin across the years being loaded.
+
+    Up to ``parallel`` years are planned (indexed) at once on background
+    threads and then loaded side by side, one batch of each in turn; a
+    year joins as soon as its plan is ready and the next one is planned
+    when a year runs out of batches, so at most ``parallel`` years of
+    plans are held. Each batch's entries are put in ``planned`` as it is
+    handed out. Batch ids are taken from iterating each plan, so a worker
+    claims batches only as it gets to them; a plan with no batch ready yet
+    (NOT_READY) keeps its turn and NOT_READY is passed on.
+    """
+    upcoming = iter(years)
+    planning: deque[tuple[int, Future]] = deque()
+    active: deque[tuple[int, Mapping[str, list[IndexEntry]], Iterator[str]]] = deque()
+    pool = ThreadPoolExecutor(
+        max_workers=max(1, parallel), thread_name_prefix="ingest-index"
+    )
+
+    def top_up() -> None:
+        while len(planning) + len(active) < max(1, parallel):
+            year = next(upcoming, None)
+            if year is None:
+                return
+            planning.append((year, pool.submit(plan, year)))
+
+    try:
+        top_up()
+        while planning or active:
+            while planning and (not active or planning[0][1].done()):
+                year, future = planning.popleft()
+                batches = future.result()
+                active.append((year, batches, iter(batches)))
+            year, batches, batch_ids = active.popleft()
+            batch_id = next(batch_ids, None)
+            if batch_id is None:
+                top_up()
+                continue
+            if batch_id is NOT_READY:
+                active.appendleft((year, batches, batch_ids))
+                yield NOT_READY
+                continue
+            planned[(year, batch_id)] = batches[batch_id]
+            yield year, batch_id
+            active.append((year, batches, batch_ids))
+    finally:
+        # An index still being read is not waited for
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _produce(
+    years: list[int],
+    plan: Callable[[int], Mapping[str, list[IndexEntry]]],
+    prefetch: int,
+    cache: HttpCache | None,
+    limit: int | None,
+    stop: threading.Event,
+    counts: Counter,
+    parallel_years: int = 1,
+    memory: _MemoryGate | None = None,
+    planned: dict[tuple[int, str], list[IndexEntry]] | None = None,
+) -> Iterator[tuple[IndexEntry, bytes] | Streamed | Marker]:
+    """Source stage: index, download and unzip.
+
+    Yields, per ZIP batch, a BatchStart, (entry, xml_bytes) for each
+    indexed member and a BatchEnd; at most ``limit`` filings in all,
+    counted here so the limit is exact whatever the parallelism. Members
+    over MEMBER_MEMORY_BUDGET_BYTES are never read whole: they come as
+    Streamed, parsed straight from the open ZIP member. Batches of up to
+    ``parallel_years`` years are interleaved (see :func:`_interleave`) so
+    the network and the database stay busy across year boundaries, and
+    all share the ``prefetch`` download threads. With a ``memory`` gate no
+    member is read while it holds the source back. A batch with members
+    that could not be read (Unread) is ended as READ_FAILED, to be fetched
+    again. Once ``stop`` is set the current batch is ended as partial,
+    nothing more is produced and ``counts["stopped"]`` is set. The
+    batches handed out for download and not yet read through are kept in
+    ``planned``.
+    """
+    emitted = 0
+    planned = {} if planned is None else planned
+    lookups = _Members(planned)
+    order = _interleave(years, plan, parallel_years, planned)
+    zips = prefetch_batches(
+        order, depth=prefetch, cache=cache, members=lookups, cancel=stop
+    )
+    with closing(order), closing(zips):
+        for year, batch_id, xml_iter in zips:
+            if stop.is_set():
+                counts["stopped"] = 1
+                return
+            batch_entries = planned[(year, batch_id)]
+            if xml_iter is None:
+                logger.warning(
+                    "Skipping batch %s of %d (%d entries): ZIP download failed",
+                    batch_id,
+                    year,
+                    len(batch_entries),
+                )
+                lookups.release((year, batch_id))
+                yield BatchEnd(
+                    year, batch_id, len(batch_entries), checkpoint.DOWNLOAD_FAILED
+                )
+                continue
+
+            yield BatchStart(year, batch_id, {e.ein for e in batch_entries})
+            status = checkpoint.COMPLETED
+            members = metrics.timed_iter("unzip", xml_iter)
+            for item in _matched(members, lookups[(year, batch_id)]):
+                if stop.is_set():
+                    status = checkpoint.PARTIAL
+                    break
+                if isinstance(item, Unread):
+                    status = checkpoint.READ_FAILED
+                yield item
+                emitted += 1
+                if limit is not None and emitted >= limit:
+                    status = checkpoint.PARTIAL
+                    break
+                if memory is not None:
+                    memory.wait(stop)
+            lookups.release((year, batch_id))
+            yield BatchEnd(year, batch_id, len(batch_entries), status)
+
+            if stop.is_set():
+                counts["stopped"] = 1
+                return
+            if limit is not None and emitted >= limit:
+                logger.info("Reached limit of %d filings", limit)
+                return
+
+
+def _replay(
+    dead: dead_letters.DeadLetters,
+    limit: int | None,
+    stop: threading.Event,
+    counts: Counter,
+) -> Iterator[tuple[IndexEntry, bytes] | Marker]:
+    """Source stage for replay: unresolved dead letters, grouped by batch.
+
+    Like :func:`_produce`, but reading the XML kept in the dead-letter
+    store (see :mod:`scripts.ingest.dead_letters`) instead of downloading
+    anything, so the filings go through the current parser and loader
+    again. Every run, not only a replay, marks the dead letters whose
+    filings are now loaded as resolved.
+    """
+    batch: tuple[int, str] | None = None
+    entries = 0
+    for emitted, (year, entry, xml_bytes) in enumerate(dead.pending()):
+        if batch != (year, entry.xml_batch_id):
+            if batch is not None:
+                yield BatchEnd(*batch, entries, None)
+            batch = (year, entry.xml_batch_id)
+            entries = 0
+            yield BatchStart(year, entry.xml_batch_id, set())
+        if stop.is_set():
+            counts["stopped"] = 1
+            break
+        if limit is not None and emitted >= limit:
+            logger.info("Reached limit of %d filings", limit)
+            break
+        yield entry, xml_bytes
+        entries += 1
+    if batch is not None:
+        yield BatchEnd(*batch, entries, None)
+
+
+def _graceful_sigint(stop: threading.Event):
+    """SIGINT handler: the first Ctrl-C drains, the second aborts.
+
+    Draining reads no more filings; those already in the queues are
+    loaded and committed and their batches are checkpointed as partial.
+    """
+
+    def handler(signum, frame):
+        logger.warning(
+            "Interrupted: committing filings already read; "
+            "press Ctrl-C again to abort"
+        )
+        stop.set()
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    return handler
+
+
+def _load_one(
+    bind, parsed: ParsedFiling, object_id: str, org_cache: OrganizationCache
+) -> bool:
+    """Load and commit one filing, recording write time and rows."""
+    started = time.perf_counter()
+    with Session(bind) as session:
+        loaded = load_filing(session, parsed, object_id, org_cache)
+        session.commit()
+    metrics.record("write", time.perf_counter() - started)
+    if loaded:
+        metrics.add_rows("filings", 1)
+        metrics.add_rows("filing_people", len(parsed.people))
+        metrics.add_rows("filing_grants", len(parsed.grants))
+    return loaded
+
+
+def _invalidate_search_cache():
+    """Have the API drop cached search results once new filings are in.
+
+    Bumps the generation of the API's search cache (see
+    :mod:`app.core.cache`), so no search serves results from before the
+    run's filings.
+    """
+    try:
+        # Imported here so ingestion does not need the API's Redis client
+        # until it has something to invalidate
+        from app.core.cache import bump_generation
+
+        generation = bump_generation()
+    except Exception as exc:
+        logger.warning("Could not invalidate the search cache: %s", exc)
+        return
+    if generation is not None:
+        logger.info("Invalidated the search cache (generation %d)", generation)
+
+
+def _run_report(
+    run: checkpoint.Checkpoint,
+    status: str,
+    counts: dict[str, int],
+    org_cache: OrganizationCache,
+    run_metrics: metrics.Metrics,
+) -> dict:
+    """The JSON-serializable summary of a finished run."""
+    stats = org_cache.stats
+    run_metrics.add_rows("organizations", stats.inserts + stats.updates)
+    report = run_metrics.report()
+    elapsed = time.monotonic() - run_metrics.started
+    rate = counts["processed"] / elapsed * 60 if elapsed > 0 else 0.0
+    return {
+        "run_id": str(run.run_id),
+        "status": status,
+        **counts,
+        "filings_per_minute": round(rate, 1),
+        "target_filings_per_minute": TARGET_FILINGS_PER_MINUTE,
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "org_cache": {
+            "hits": stats.hits,
+            "misses": stats.misses,
+            "inserts": stats.inserts,
+            "updates": stats.updates,
+            "unchanged": stats.unchanged,
+        },
+        **report,
+    }
+
+
+def _open_cache(cache_dir: str | None, offline: bool) -> HttpCache | None:
+    if offline and cache_dir is None:
+        raise ValueError("offline mode requires a cache_dir")
+    return HttpCache(cache_dir, offline=offline) if cache_dir is not None else None
+
+
+def enqueue_batches(cache_dir: str | None = None, offline: bool = False) -> int:
+    """Queue the historical ZIP batches with filings left to load as jobs.
+
+    Completed batches and filings already in the database are left out.
+    Workers (``run_pipeline("worker")``, on any host) then take every year
+    with queued batches, claim batches one at a time as they get to them
+    and release them with their outcome (see :mod:`scripts.ingest.jobs`),
+    so any number of them share one historical load; ``limit`` applies
+    per worker. Returns the number of batches queued.
+    """
+    cache = _open_cache(cache_dir, offline)
+    bind = get_session_factory().kw["bind"]
+    run = jobs.JobQueue.start(bind, "enqueue", HISTORICAL_YEARS)
+    counts: Counter = Counter()
+    queued = 0
+    status = checkpoint.FAILED
+    try:
+        for year in HISTORICAL_YEARS:
+            batches = _plan_year(year, run, bind, cache, True, counts)
+            added = run.enqueue(
+                year, {batch_id: len(e) for batch_id, e in batches.items()}
+            )
+            logger.info("Year %d: queued %d batches", year, added)
+            queued += added
+        status = checkpoint.FINISHED
+    finally:
+        run.finish(status, checkpoint.BatchCounts())
+    return queued
+
+
+def run_pipeline(
+    mode: str,
+    limit: int | None = None,
+    loader: str = "orm",
+    workers: int = 1,
+    prefetch: int = PREFETCH_DEPTH,
+    cache_dir: str | None = None,
+    offline: bool = False,
+    resume: bool = False,
+    report_path: str | None = None,
+    parallel_years: int = PARALLEL_YEARS,
+) -> str:
+    """Run the ingestion pipeline.
+
+    Stages connected by bounded queues (see :mod:`scripts.ingest.stages`)
+    index, download and unzip (:func:`_produce`, or :func:`_replay` in
+    ``"replay"`` mode), parse (:func:`_parse_stream`, on ``workers``
+    processes when > 1) and, in the calling thread, load the filings.
+    ``"historical"`` mode loads every year, up to ``parallel_years`` of
+    them side by side, ``"incremental"`` only the batches of the latest
+    year that are new or changed, and ``"worker"`` the batches queued by
+    :func:`enqueue_batches`; ``limit`` caps the filings read.
+
+    ``loader`` selects how filings are written: ``"orm"`` loads and commits
+    each filing individually, ``"copy"`` accumulates ``BATCH_SIZE`` filings
+    and writes them with PostgreSQL COPY plus set-based merges.
+
+    ``cache_dir`` keeps downloaded index CSVs and ZIPs in a local cache that
+    is revalidated with conditional GETs (of a ZIP read by range, only the
+    fetched members are kept); ``offline`` serves only from that cache and
+    never touches the network. With ``resume`` batches completed
+    by earlier runs are skipped (see :func:`_plan_year`).
+
+    Filings that fail to parse or load go to the dead-letter store. Ctrl-C
+    drains the pipeline instead of aborting it (see
+    :func:`_graceful_sigint`). A JSON run report is logged and, with
+    ``report_path``, written to that file.
+
+    Returns the run status recorded in ``ingest_runs``.
+    """
+    cache = _open_cache(cache_dir, offline)
+    session_factory = get_session_factory()
+    bind = session_factory.kw["bind"]
+
     if mode == "historical":
         years = HISTORICAL_YEARS
         effective_limit = limit if limit is not None else 100_000
+    elif mode == "worker":
+        years = jobs.JobQueue.queued_years(bind)
+        effective_limit = limit
+    elif mode == "replay":
+        years = dead_letters.DeadLetters.pending_years(bind)
+        effective_limit = limit
     else:
         # Incremental: latest year only
         years = [HISTORICAL_YEARS[-1]]
         effective_limit = limit  # None means no limit
 
-    logger.info("Starting %s ingestion for years: %s", mode, years)
+    logger.info(
+        "Starting %s ingestion for years: %s (%s loader)", mode, years, loader
+    )
 
-    session_factory = get_session_factory()
+    if mode == "worker":
+        run = jobs.JobQueue.start(bind, mode, years)
+        heartbeat = jobs.Heartbeat(run)
+        logger.info("Worker %s claiming queued batches", run.worker_id)
+    else:
+        run = checkpoint.Checkpoint.start(bind, mode, years)
+        heartbeat = None
+    if resume:
+        done, counts = run.totals(years)
+        logger.info(
+            "Resuming: %d batches completed by earlier runs "
+            "(%d filings, %d loaded)",
+            done,
+            counts.processed,
+            counts.loaded,
+        )
+
+    run_metrics = metrics.Metrics()
+    metrics.install(run_metrics)
+    executor = _make_parse_executor(workers)
+    org_cache = OrganizationCache()
+    dead = dead_letters.DeadLetters(bind, run.run_id)
+    snapshot = IndexSnapshot(bind, run.run_id)
+    diff = mode == "incremental"
+    source_counts: Counter = Counter()
+    stop = threading.Event()
+    abort = threading.Event()
+
+    plan_lock = threading.Lock()
+    # Batches the source has been handed and not yet read through
+    handed_out: dict[tuple[int, str], list[IndexEntry]] = {}
+
+    def plan(year: int) -> Mapping[str, list[IndexEntry]]:
+        # Years are planned on parallel threads
+        counts: Counter = Counter()
+        if heartbeat is None:
+            planned = _plan_year(year, run, bind, cache, resume, counts, snapshot, diff)
+        else:
+            planned = _plan_year(year, run, bind, cache, False, counts, snapshot)
+            planned = jobs.ClaimedBatches(
+                run, year, planned, stop, busy=lambda: bool(handed_out)
+            )
+        with plan_lock:
+            source_counts.update(counts)
+        return planned
+
+    unzipped: queue.Queue = queue.Queue(maxsize=STAGE_QUEUE_SIZE)
+    parsed_q: queue.Queue = queue.Queue(maxsize=STAGE_QUEUE_SIZE)
+    memory = _MemoryGate(
+        RSS_BUDGET_BYTES, lambda: not (unzipped.empty() and parsed_q.empty())
+    )
+
+    if mode == "replay":
+        source = _replay(dead, effective_limit, stop, source_counts)
+    else:
+        source = _produce(
+            years,
+            plan,
+            prefetch,
+            cache,
+            effective_limit,
+            stop,
+            source_counts,
+            parallel_years,
+            memory,
+            handed_out,
+        )
+    stages = [
+        Stage("ingest-source", source, unzipped, abort),
+        Stage(
+            "ingest-parse",
+            _parse_stream(drain(unzipped, abort), executor, workers),
+            parsed_q,
+            abort,
+        ),
+    ]
+
+    previous_sigint = None
+    if threading.current_thread() is threading.main_thread():
+        previous_sigint = signal.signal(signal.SIGINT, _graceful_sigint(stop))
+
+    pending: list = []
+    year = 0
     total = 0
     success = 0
     skipped = 0
     errors = 0
-    hit_limit = False
+    start = (0, 0, 0, 0)
+    run_status = checkpoint.FAILED
 
-    for year in years:
-        if hit_limit:
-            break
+    # Queue depths show the bottleneck: a full queue's consumer is too slow
+    reporter = metrics.Reporter(
+        run_metrics,
+        lambda: {
+            "processed": total,
+            "loaded": success,
+            "errors": errors,
+            "queued": {"unzipped": unzipped.qsize(), "parsed": parsed_q.qsize()},
+            "peak_rss_mb": round(_peak_rss_mb(), 1),
+        },
+    )
 
-        entries = download_index(year)
-        if not entries:
-            logger.warning("No entries for year %d", year)
-            continue
+    try:
+        reporter.start()
+        if heartbeat is not None:
+            heartbeat.start()
+        for stage in stages:
+            stage.start()
 
-        # Group entries by ZIP batch, skip entries without batch_id
-        batches: dict[str, list] = defaultdict(list)
-        skipped_no_batch = 0
-        for entry in entries:
-            if not entry.xml_batch_id:
-                skipped_no_batch += 1
+        for item in drain(parsed_q, abort):
+            if isinstance(item, BatchStart):
+                with Session(bind) as session:
+                    org_cache.warm(session, item.eins)
+                year = item.year
+                start = (total, success, skipped, errors)
                 continue
-            batches[entry.xml_batch_id].append(entry)
 
-        if skipped_no_batch:
-            logger.warning(
-                "Year %d: skipped %d entries without XML_BATCH_ID",
-                year,
-                skipped_no_batch,
-            )
+            if isinstance(item, BatchEnd):
+                if pending:
+                    loaded, skip, errs = _flush_bulk(
+                        bind, year, pending, org_cache, dead
+                    )
+                    success += loaded
+                    skipped += skip
+                    errors += errs
+                    pending = []
 
-        logger.info(
-            "Year %d: %d entries in %d ZIP batches",
-            year,
-            len(entries) - skipped_no_batch,
-            len(batches),
-        )
+                # Recorded only after the batch's filings are committed;
+                # replayed batches have no status and are not checkpointed
+                if item.status == checkpoint.DOWNLOAD_FAILED:
+                    counts = checkpoint.BatchCounts(entries=item.entries)
+                else:
+                    counts = checkpoint.BatchCounts(
+                        entries=item.entries,
+                        processed=total - start[0],
+                        loaded=success - start[1],
+                        skipped=skipped - start[2],
+                        errors=errors - start[3],
+                    )
+                if item.status is not None:
+                    run.record_batch(item.year, item.batch_id, item.status, counts)
+                if item.status == checkpoint.COMPLETED:
+                    snapshot.save(item.year, [item.batch_id])
 
-        for batch_id, batch_entries in batches.items():
-            if hit_limit:
-                break
+                _log_memory()
+                continue
 
-            # Build lookup from object_id filename to entry
-            entry_lookup = {}
-            for e in batch_entries:
-                filename = f"{e.object_id}_public.xml"
-                entry_lookup[filename] = e
-
-            # Download the ZIP to disk and iterate XMLs
-            with open_zip_batch(year, batch_id) as xml_iter:
-                if xml_iter is None:
-                    logger.warning(
-                        "Skipping batch %s (%d entries): "
-                        "ZIP download failed or too large",
-                        batch_id,
-                        len(batch_entries),
-                    )
+            if isinstance(item, Unread):
+                total += 1
+                errors += 1
+                dead.record(year, item.entry, dead_letters.READ, b"", item.error)
+                continue
+
+            entry, parsed, xml = item
+            total += 1
+
+            try:
+                if isinstance(parsed, BaseException):
+                    raise parsed
+                if parsed is None:
+                    errors += 1
+                    dead.record(year, entry, dead_letters.PARSE, xml, None)
                     continue
 
-                for filename, xml_bytes in xml_iter:
-                    if (
-                        effective_limit is not None
-                        and total >= effective_limit
-                    ):
-                        logger.info(
-                            "Reached limit of %d filings",
-                            effective_limit,
-                        )
-                        hit_limit = True
-                        break
-
-                    entry = entry_lookup.get(filename)
-                    if entry is None:
-                        # XML in ZIP but not in our filtered
-                        # index
-                        del xml_bytes
-                        continue
-
-                    total += 1
-
-                    try:
-                        parsed = parse_filing(xml_bytes)
-                        del xml_bytes
-                        if parsed is None:
-                            errors += 1
-                            continue
-
-                        with Session(
-                            session_factory.kw["bind"]
-                        ) as session:
-                            loaded = load_filing(
-                                session, parsed, entry.object_id
-                            )
-                            session.commit()
-
-                        if loaded:
-                            success += 1
-                        else:
-                            skipped += 1
-
-                    except Exception:
-                        errors += 1
-                        logger.exception(
-                            "Error processing filing %s",
-                            entry.object_id,
-                        )
-
-                    if total % 50 == 0:
-                        _log_memory()
-
-                    if total % 100 == 0:
-                        logger.info(
-                            "Processed %d filings "
-                            "(%d success, %d skipped, "
-                            "%d errors)",
-                            total,
-                            success,
-                            skipped,
-                            errors,
-                        )
-
-            gc.collect()
-            _log_memory()
+                if loader == "copy":
+                    pending.append((parsed, entry, xml))
+                else:
+                    loaded = _load_one(bind, parsed, entry.object_id, org_cache)
+                    if loaded:
+                        success += 1
+                    else:
+                        skipped += 1
+
+            except Exception as exc:
+                org_cache.clear()
+                errors += 1
+                logger.exception(
+                    "Error processing filing %s",
+                    entry.object_id,
+                )
+                stage = dead_letters.PARSE if exc is parsed else dead_letters.LOAD
+                dead.record(year, entry, stage, xml, exc)
+
+            if len(pending) >= BATCH_SIZE:
+                loaded, skip, errs = _flush_bulk(bind, year, pending, org_cache, dead)
+                success += loaded
+                skipped += skip
+                errors += errs
+                pending = []
+
+            if total % 100 == 0:
+                logger.info(
+                    "Processed %d filings "
+                    "(%d success, %d skipped, "
+                    "%d errors)",
+                    total,
+                    success,
+                    skipped,
+                    errors,
+                )
+                _log_org_cache(org_cache)
+
+        if pending:
+            # Cut off mid-batch by a failed stage
+            loaded, skip, errs = _flush_bulk(bind, year, pending, org_cache, dead)
+            success += loaded
+            skipped += skip
+            errors += errs
+            pending = []
+        join_all(stages, abort)
+        resolved = dead.resolve()
+        if resolved:
+            logger.info("Resolved %d dead letters", resolved)
+        run_status = (
+            checkpoint.INTERRUPTED
+            if source_counts["stopped"]
+            else checkpoint.FINISHED
+        )
+    except KeyboardInterrupt:
+        run_status = checkpoint.INTERRUPTED
+        raise
+    finally:
+        stop.set()
+        abort.set()
+        for stage in stages:
+            if stage.is_alive():
+                stage.join()
+        reporter.stop()
+        if heartbeat is not None:
+            heartbeat.stop()
+            # Batches claimed but not finished (prefetched, or cut off by a
+            # failure) go back to the queue
+            failure = sys.exc_info()[1]
+            released = run.release(
+                repr(failure) if run_status == checkpoint.FAILED else None
+            )
+            if released:
+                logger.info("Released %d claimed batches", released)
+        metrics.install(None)
+        if previous_sigint is not None:
+            signal.signal(signal.SIGINT, previous_sigint)
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        run.finish(
+            run_status,
+            checkpoint.BatchCounts(
+                processed=total, loaded=success, skipped=skipped, errors=errors
+            ),
+        )
+        if success:
+            _invalidate_search_cache()
 
     logger.info(
-        "Done. Processed %d filings, "
-        "%d loaded, %d skipped, %d errors",
+        "%s. Processed %d filings, "
+        "%d loaded, %d skipped, %d errors, %d already ingested",
+        "Stopped early" if run_status == checkpoint.INTERRUPTED else "Done",
         total,
         success,
         skipped,
         errors,
+        source_counts["already_ingested"],
+    )
+    _log_org_cache(org_cache)
+    done, counts = run.totals(years)
+    logger.info(
+        "Across runs: %d batches completed, %d filings processed, %d loaded",
+        done,
+        counts.processed,
+        counts.loaded,
     )
 
+    report = _run_report(
+        run,
+        run_status,
+        {
+            "processed": total,
+            "loaded": success,
+            "skipped": skipped,
+            "errors": errors,
+            "already_ingested": source_counts["already_ingested"],
+        },
+        org_cache,
+        run_metrics,
+    )
+    logger.info("Run report %s", json.dumps(report, sort_keys=True))
+    if report_path is not None:
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        logger.info("Wrote run report to %s", report_path)
+    return run_status
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -181,9 +1159,12 @@ def main():
     )
     parser.add_argument(
         "--mode",
-        choices=["historical", "incremental"],
+        choices=["historical", "incremental", "enqueue", "worker", "replay"],
         default="historical",
-        help="Ingestion mode (default: historical)",
+        help="Ingestion mode: enqueue queues the historical ZIP batches as "
+        "jobs, worker (run any number, on any host) loads queued batches and "
+        "replay re-runs filings from the dead-letter store "
+        "(default: historical)",
     )
     parser.add_argument(
         "--limit",
@@ -191,8 +1172,86 @@ def main():
         default=None,
         help="Max number of filings to process",
     )
+    parser.add_argument(
+        "--loader",
+        choices=["orm", "copy"],
+        default="orm",
+        help="Database write strategy: per-filing ORM inserts or batched "
+        "COPY (default: orm)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of XML parser processes (default: 1, parse in-process)",
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=PREFETCH_DEPTH,
+        help="ZIP batches downloading concurrently ahead of the one being "
+        "processed "
+        f"(default: {PREFETCH_DEPTH}, 0 to disable)",
+    )
+    parser.add_argument(
+        "--parallel-years",
+        type=int,
+        default=PARALLEL_YEARS,
+        help="Index years loaded side by side, sharing the download threads "
+        f"and parser processes (default: {PARALLEL_YEARS})",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=CACHE_DIR,
+        help=f"Download cache for index CSVs and ZIPs (default: {CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Download to temp files and discard them after use",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help=(
+            "Use only what is already in the download cache. A ZIP an "
+            "earlier run read by range is cached as just the members it "
+            "fetched, so it can only be read again for those filings"
+        ),
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip ZIP batches completed by earlier runs (workers always do)",
+    )
+    parser.add_argument(
+        "--report",
+        metavar="PATH",
+        default=None,
+        help="Write the JSON run report (per-stage timings, rows/sec) to PATH",
+    )
     args = parser.parse_args()
-    run_pipeline(mode=args.mode, limit=args.limit)
+    if args.offline and args.no_cache:
+        parser.error("--offline needs the download cache")
+    cache_dir = None if args.no_cache else args.cache_dir
+    if args.mode == "enqueue":
+        queued = enqueue_batches(cache_dir=cache_dir, offline=args.offline)
+        logger.info("Queued %d batches", queued)
+        return
+    status = run_pipeline(
+        mode=args.mode,
+        limit=args.limit,
+        loader=args.loader,
+        workers=args.workers,
+        prefetch=args.prefetch,
+        cache_dir=cache_dir,
+        offline=args.offline,
+        resume=args.resume,
+        report_path=args.report,
+        parallel_years=args.parallel_years,
+    )
+    if status == checkpoint.INTERRUPTED:
+        sys.exit(130)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,389 @@
+"""Reads selected members of a remote ZIP with HTTP Range requests.
+
+The end-of-central-directory record (and its ZIP64 variant) and the
+central directory are fetched from the tail of the archive, then only the
+byte spans of the wanted members, with nearby spans coalesced into one
+request. Compressed member data is spooled to a local file so the caller
+can decompress it later, one member at a time (and large members a chunk
+at a time).
+"""
+
+import logging
+import re
+import struct
+import threading
+import time
+import zlib
+from collections.abc import Collection, Iterator
+from dataclasses import dataclass
+from typing import BinaryIO
+
+import requests
+
+from scripts.ingest.config import (
+    MAX_RETRIES,
+    MEMBER_MEMORY_BUDGET_BYTES,
+    RANGE_COALESCE_GAP_BYTES,
+    RANGE_REQUEST_MAX_BYTES,
+    RETRY_BACKOFF_BASE,
+    STREAM_CHUNK_SIZE,
+)
+
+logger = logging.getLogger(__name__)
+
+_EOCD = struct.Struct("<4s4H2LH")
+_EOCD_SIG = b"PK\x05\x06"
+_ZIP64_LOCATOR = struct.Struct("<4sLQL")
+_ZIP64_LOCATOR_SIG = b"PK\x06\x07"
+_ZIP64_EOCD = struct.Struct("<4sQ2H2L4Q")
+_ZIP64_EOCD_SIG = b"PK\x06\x06"
+_CENTRAL = struct.Struct("<4s6H3L5H2L")
+_CENTRAL_SIG = b"PK\x01\x02"
+_LOCAL = struct.Struct("<4s5H3L2H")
+_LOCAL_SIG = b"PK\x03\x04"
+_ZIP64_EXTRA_ID = 0x0001
+# EOCD plus the longest possible archive comment
+_TAIL_BYTES = _EOCD.size + 0xFFFF
+
+STORED = 0
+DEFLATED = 8
+
+
+class RemoteZipError(Exception):
+    """The archive cannot be read with range requests."""
+
+
+@dataclass(slots=True)
+class ZipMember:
+    name: str
+    header_offset: int
+    compressed_size: int
+    size: int
+    crc32: int
+    method: int
+    flags: int
+
+
+@dataclass(slots=True)
+class FetchedMember:
+    """A member whose compressed data sits at ``offset`` in a local file."""
+
+    member: ZipMember
+    offset: int
+
+
+class RemoteZip:
+    """A ZIP archive on an HTTP server that supports Range requests."""
+
+    def __init__(
+        self,
+        url: str,
+        session: requests.Session | None = None,
+        size: int | None = None,
+    ):
+        self.url = url
+        self.size = size
+        self._session = session or requests
+        self._members: dict[str, ZipMember] | None = None
+        self._central_offset = 0
+
+    def members(self) -> dict[str, ZipMember]:
+        """Central directory entries by name (read on first use)."""
+        if self._members is None:
+            self._members = self._read_central_directory()
+        return self._members
+
+    def plan(self, names: Collection[str]) -> list[ZipMember]:
+        """Members present in the archive for ``names``, in file order."""
+        members = self.members()
+        return sorted(
+            (members[n] for n in names if n in members),
+            key=lambda m: m.header_offset,
+        )
+
+    def span_bytes(self, wanted: list[ZipMember]) -> int:
+        """Bytes :meth:`fetch` will download for ``wanted``."""
+        return sum(end - start for start, end, _ in self._coalesce(wanted))
+
+    def fetch(
+        self,
+        wanted: list[ZipMember],
+        dest: BinaryIO,
+        stop: threading.Event | None = None,
+    ) -> list[FetchedMember] | None:
+        """Download the compressed data of ``wanted`` members into ``dest``.
+
+        Returns where each member landed in ``dest``, or None if ``stop``
+        was set before all ranges were fetched.
+        """
+        fetched: list[FetchedMember] = []
+        for start, end, group in self._coalesce(wanted):
+            if stop is not None and stop.is_set():
+                return None
+            data = self._get_span(start, end)
+            for member in group:
+                pos = member.header_offset - start
+                sig, *_, name_len, extra_len = _LOCAL.unpack_from(data, pos)
+                if sig != _LOCAL_SIG:
+                    raise RemoteZipError(f"bad local header for {member.name}")
+                pos += _LOCAL.size + name_len + extra_len
+                fetched.append(FetchedMember(member, dest.tell()))
+                dest.write(data[pos : pos + member.compressed_size])
+        return fetched
+
+    def _coalesce(
+        self, wanted: list[ZipMember]
+    ) -> list[tuple[int, int, list[ZipMember]]]:
+        """Group members into (start, end, members) byte ranges.
+
+        A member's span runs to the next member's local header (or the
+        central directory), which covers its header, data and any data
+        descriptor without knowing the local extra field length.
+        """
+        offsets = sorted(m.header_offset for m in self.members().values())
+        next_offset = dict(
+            zip(offsets, [*offsets[1:], self._central_offset], strict=True)
+        )
+        ranges: list[tuple[int, int, list[ZipMember]]] = []
+        for member in wanted:
+            start = member.header_offset
+            end = next_offset[start]
+            if ranges:
+                last_start, last_end, group = ranges[-1]
+                if (
+                    start - last_end <= RANGE_COALESCE_GAP_BYTES
+                    and end - last_start <= RANGE_REQUEST_MAX_BYTES
+                ):
+                    group.append(member)
+                    ranges[-1] = (last_start, end, group)
+                    continue
+            ranges.append((start, end, [member]))
+        return ranges
+
+    def _read_central_directory(self) -> dict[str, ZipMember]:
+        tail = self._get_range(f"-{_TAIL_BYTES}")
+        tail_start = self.size - len(tail)
+
+        pos = tail.rfind(_EOCD_SIG)
+        if pos < 0 or pos + _EOCD.size > len(tail):
+            raise RemoteZipError("end of central directory not found")
+        _, _, _, _, count, cd_size, cd_offset, _ = _EOCD.unpack_from(tail, pos)
+
+        if count == 0xFFFF or cd_size == 0xFFFFFFFF or cd_offset == 0xFFFFFFFF:
+            count, cd_size, cd_offset = self._read_zip64_eocd(tail, tail_start, pos)
+
+        self._central_offset = cd_offset
+        if cd_offset >= tail_start:
+            directory = tail[cd_offset - tail_start : cd_offset - tail_start + cd_size]
+        else:
+            directory = self._get_span(cd_offset, cd_offset + cd_size)
+        return _parse_central_directory(directory, count)
+
+    def _read_zip64_eocd(
+        self, tail: bytes, tail_start: int, eocd_pos: int
+    ) -> tuple[int, int, int]:
+        loc_pos = eocd_pos - _ZIP64_LOCATOR.size
+        if loc_pos < 0:
+            raise RemoteZipError("ZIP64 locator not in fetched tail")
+        sig, _, record_offset, _ = _ZIP64_LOCATOR.unpack_from(tail, loc_pos)
+        if sig != _ZIP64_LOCATOR_SIG:
+            raise RemoteZipError("ZIP64 locator not found")
+
+        if record_offset >= tail_start:
+            record = tail[record_offset - tail_start :]
+        else:
+            record = self._get_span(record_offset, record_offset + _ZIP64_EOCD.size)
+        sig, *_, count, cd_size, cd_offset = _ZIP64_EOCD.unpack_from(record)
+        if sig != _ZIP64_EOCD_SIG:
+            raise RemoteZipError("ZIP64 end of central directory not found")
+        return count, cd_size, cd_offset
+
+    def _get_span(self, start: int, end: int) -> bytes:
+        """GET bytes [start, end) of the archive."""
+        data = self._get_range(f"{start}-{end - 1}")
+        if len(data) != end - start:
+            raise RemoteZipError(
+                f"short range response: {len(data)} of {end - start} bytes"
+            )
+        return data
+
+    def _get_range(self, spec: str) -> bytes:
+        """GET ``bytes=<spec>``, recording the archive size if unknown."""
+        for attempt in range(1, MAX_RETRIES + 1):
+            try:
+                resp = self._session.get(
+                    self.url, headers={"Range": f"bytes={spec}"}, timeout=300
+                )
+                resp.raise_for_status()
+                break
+            except requests.RequestException as exc:
+                if attempt == MAX_RETRIES:
+                    raise
+                wait = RETRY_BACKOFF_BASE**attempt
+                logger.warning(
+                    "Attempt %d/%d failed for %s bytes=%s: %s. Retrying in %ds...",
+                    attempt,
+                    MAX_RETRIES,
+                    self.url,
+                    spec,
+                    exc,
+                    wait,
+                )
+                time.sleep(wait)
+
+        if resp.status_code != 206:
+            raise RemoteZipError(f"server ignored Range (HTTP {resp.status_code})")
+        if self.size is None:
+            match = re.search(r"/(\d+)$", resp.headers.get("Content-Range", ""))
+            if match is None:
+                raise RemoteZipError("no archive size in Content-Range")
+            self.size = int(match.group(1))
+        return resp.content
+
+
+def _parse_central_directory(directory: bytes, count: int) -> dict[str, ZipMember]:
+    members: dict[str, ZipMember] = {}
+    pos = 0
+    for _ in range(count):
+        if directory[pos : pos + 4] != _CENTRAL_SIG:
+            raise RemoteZipError("bad central directory entry")
+        (
+            _,
+            _,
+            _,
+            flags,
+            method,
+            _,
+            _,
+            crc,
+            compressed_size,
+            size,
+            name_len,
+            extra_len,
+            comment_len,
+            _,
+            _,
+            _,
+            header_offset,
+        ) = _CENTRAL.unpack_from(directory, pos)
+        pos += _CENTRAL.size
+        raw_name = directory[pos : pos + name_len]
+        name = raw_name.decode("utf-8" if flags & 0x800 else "cp437")
+        extra = directory[pos + name_len : pos + name_len + extra_len]
+        pos += name_len + extra_len + comment_len
+
+        if 0xFFFFFFFF in (size, compressed_size, header_offset):
+            size, compressed_size, header_offset = _zip64_sizes(
+                extra, size, compressed_size, header_offset
+            )
+        members[name] = ZipMember(
+            name=name,
+            header_offset=header_offset,
+            compressed_size=compressed_size,
+            size=size,
+            crc32=crc,
+            method=method,
+            flags=flags,
+        )
+    return members
+
+
+def _zip64_sizes(
+    extra: bytes, size: int, compressed_size: int, header_offset: int
+) -> tuple[int, int, int]:
+    """Replace 0xFFFFFFFF placeholders from the ZIP64 extra field."""
+    pos = 0
+    while pos + 4 <= len(extra):
+        field_id, field_len = struct.unpack_from("<2H", extra, pos)
+        pos += 4
+        if field_id == _ZIP64_EXTRA_ID:
+            values = iter(struct.unpack_from(f"<{field_len // 8}Q", extra, pos))
+            if size == 0xFFFFFFFF:
+                size = next(values)
+            if compressed_size == 0xFFFFFFFF:
+                compressed_size = next(values)
+            if header_offset == 0xFFFFFFFF:
+                header_offset = next(values)
+            break
+        pos += field_len
+    return size, compressed_size, header_offset
+
+
+def read_fetched(
+    path: str,
+    fetched: list[FetchedMember],
+    batch_id: str,
+    budget: int = MEMBER_MEMORY_BUDGET_BYTES,
+) -> Iterator[tuple[str, bytes | Iterator[bytes] | RemoteZipError]]:
+    """Yield (name, data) for members spooled to ``path`` by RemoteZip.fetch.
+
+    Members larger than ``budget`` are yielded as an iterator over their
+    decompressed chunks instead of bytes; it must be read before the next
+    member is asked for and raises RemoteZipError at its end if the CRC
+    check fails. Members that fail to decompress or their CRC check are
+    otherwise yielded as a RemoteZipError instead of bytes. Members that
+    are encrypted or use an unsupported compression method are logged and
+    skipped.
+    """
+    with open(path, "rb") as f:
+        for item in fetched:
+            member = item.member
+            if member.flags & 0x1:
+                logger.warning("Skipping encrypted member %s", member.name)
+                continue
+            if member.method not in (STORED, DEFLATED):
+                logger.warning(
+                    "Skipping %s in %s: compression method %d",
+                    member.name,
+                    batch_id,
+                    member.method,
+                )
+                continue
+            f.seek(item.offset)
+            if member.size > budget:
+                yield member.name, _inflate(f, member, batch_id)
+                continue
+            raw = f.read(member.compressed_size)
+            try:
+                data = raw if member.method == STORED else zlib.decompress(raw, -15)
+            except zlib.error as exc:
+                logger.warning("Bad member %s in %s: %s", member.name, batch_id, exc)
+                yield (
+                    member.name,
+                    RemoteZipError(f"Bad member {member.name} in {batch_id}: {exc}"),
+                )
+                continue
+            if len(data) != member.size or zlib.crc32(data) != member.crc32:
+                logger.warning("CRC mismatch for %s in %s", member.name, batch_id)
+                yield (
+                    member.name,
+                    RemoteZipError(f"CRC mismatch for {member.name} in {batch_id}"),
+                )
+                continue
+            yield member.name, data
+
+
+def _inflate(f: BinaryIO, member: ZipMember, batch_id: str) -> Iterator[bytes]:
+    """Decompress a member from the current position of ``f`` in chunks."""
+    inflater = zlib.decompressobj(-15) if member.method == DEFLATED else None
+    left = member.compressed_size
+    size = crc = 0
+    while left:
+        raw = f.read(min(left, STREAM_CHUNK_SIZE))
+        if not raw:
+            break
+        left -= len(raw)
+        try:
+            data = inflater.decompress(raw) if inflater is not None else raw
+        except zlib.error as exc:
+            raise RemoteZipError(f"Bad member {member.name} in {batch_id}") from exc
+        size += len(data)
+        crc = zlib.crc32(data, crc)
+        if data:
+            yield data
+    if inflater is not None and (data := inflater.flush()):
+        size += len(data)
+        crc = zlib.crc32(data, crc)
+        yield data
+    if size != member.size or crc != member.crc32:
+        raise RemoteZipError(f"CRC mismatch for {member.name} in {batch_id}")
@@ -0,0 +1,97 @@
+"""Threads and bounded queues connecting the ingestion pipeline stages.
+
+Each stage is an iterator pulled in its own thread, with every item it
+yields put on a bounded queue for the next stage. A slow stage therefore
+blocks the ones upstream of it (backpressure) instead of letting work pile
+up in memory. The end of a stream is marked with DONE. Setting ``abort``
+makes every stage give up without draining; to stop gracefully the source
+stops producing and the rest of the pipeline drains through.
+"""
+
+import logging
+import queue
+import threading
+from collections.abc import Iterator, Sequence
+
+logger = logging.getLogger(__name__)
+
+DONE = object()  # end of stream
+
+# How often blocked puts and gets check ``abort``
+POLL_INTERVAL = 0.2
+
+
+def put(q: queue.Queue, item, abort: threading.Event) -> bool:
+    """Put ``item`` on ``q``, blocking while it is full. False if aborted."""
+    while not abort.is_set():
+        try:
+            q.put(item, timeout=POLL_INTERVAL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def drain(q: queue.Queue, abort: threading.Event) -> Iterator:
+    """Yield items from ``q`` until DONE (or until aborted)."""
+    while not abort.is_set():
+        try:
+            item = q.get(timeout=POLL_INTERVAL)
+        except queue.Empty:
+            continue
+        if item is DONE:
+            return
+        yield item
+
+
+class Stage(threading.Thread):
+    """Pulls ``items`` in a thread and puts each on ``out``, then DONE.
+
+    DONE is sent even if ``items`` raises, so downstream stages finish
+    what they already have; the exception is kept in :attr:`error` for
+    the caller to re-raise after :meth:`join`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        items: Iterator,
+        out: queue.Queue,
+        abort: threading.Event,
+    ):
+        super().__init__(name=name, daemon=True)
+        self.items = items
+        self.out = out
+        self.abort = abort
+        self.error: BaseException | None = None
+
+    def run(self) -> None:
+        try:
+            for item in self.items:
+                if not put(self.out, item, self.abort):
+                    break
+        except BaseException as exc:
+            logger.error("Stage %s failed: %r", self.name, exc)
+            self.error = exc
+        finally:
+            close = getattr(self.items, "close", None)
+            if close is not None:
+                close()
+            put(self.out, DONE, self.abort)
+
+
+def join_all(stages: Sequence[Stage], abort: threading.Event) -> None:
+    """Wait for ``stages``, upstream first, and re-raise the first error kept.
+
+    A failed stage takes nothing more from the stage before it, which would
+    then block on its full queue forever; so while a stage is waited for and
+    one downstream of it has failed, ``abort`` is set.
+    """
+    for i, stage in enumerate(stages):
+        while stage.is_alive():
+            if any(later.error is not None for later in stages[i + 1 :]):
+                abort.set()
+            stage.join(POLL_INTERVAL)
+    for stage in stages:
+        if stage.error is not None:
+            raise stage.error
@@ -1,13 +1,17 @@
 """XML parser for IRS 990 e-file returns."""
 
-import contextlib
+import functools
+import io
 import logging
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass, field
 
 import defusedxml
 from lxml import etree
 from lxml.etree import XMLSyntaxError
 
+from scripts.ingest.config import STREAMING_PARSE_THRESHOLD_BYTES
+
 defusedxml.defuse_stdlib()
 
 
@@ -19,6 +23,10 @@ def _safe_fromstring(xml_bytes: bytes):
 logger = logging.getLogger(__name__)
 
 
+# Default namespace of IRS e-file returns. XPaths below are written without
+# it; the compiled tables are qualified with the document's namespace.
+IRS_EFILE_NS = "http://www.irs.gov/efile"
+
 # --- XPath field maps ---
 
 HEADER_XPATHS = {
@@ -264,35 +272,20 @@ class ParsedFiling:
 # --- Helpers ---
 
 
-def _strip_namespace(root):
-    """Remove XML namespace prefixes for easier XPath queries."""
-    for elem in root.iter():
-        if elem.tag and isinstance(elem.tag, str) and "}" in elem.tag:
-            elem.tag = elem.tag.split("}", 1)[1]
-        # Also strip namespace from attributes
-        new_attrib = {}
-        for key, val in elem.attrib.items():
-            if "}" in key:
-                key = key.split("}", 1)[1]
-            new_attrib[key] = val
-        elem.attrib.clear()
-        elem.attrib.update(new_attrib)
-
-
-def _extract_text(root, xpaths: list[str]) -> str | None:
-    """Try each XPath and return the first non-empty text value."""
-    for xpath in xpaths:
-        elements = root.xpath(xpath)
-        if elements:
-            text = elements[0].text
-            if text and text.strip():
-                return text.strip()
+def _first_text(found: dict, paths: tuple) -> str | None:
+    """Return the first non-empty text among the paths, in priority order.
+
+    Mirrors trying each XPath in turn: a path whose first element exists but
+    is empty falls through to the next path.
+    """
+    for path in paths:
+        text = found.get(path)
+        if text and text.strip():
+            return text.strip()
     return None
 
 
-def _extract_int(root, xpaths: list[str]) -> int | None:
-    """Try each XPath and return the first non-None int value."""
-    text = _extract_text(root, xpaths)
+def _to_int(text: str | None) -> int | None:
     if text is None:
         return None
     try:
@@ -301,70 +294,199 @@ def _extract_int(root, xpaths: list[str]) -> int | None:
         return None
 
 
-def _extract_bool(element, tag_names: list[str]) -> bool:
-    """Check if any of the tag names have a truthy value in the element."""
-    for tag in tag_names:
-        found = element.xpath(tag)
-        if found:
-            text = found[0].text
-            if text and text.strip().upper() in ("X", "1", "TRUE", "YES"):
-                return True
+def _first_bool(found: dict, paths: tuple) -> bool:
+    """Check if any of the paths have a truthy value."""
+    for path in paths:
+        text = found.get(path)
+        if text and text.strip().upper() in ("X", "1", "TRUE", "YES"):
+            return True
     return False
 
 
+# --- Compiled path tables ---
+#
+# The XPath maps above are compiled once into a trie keyed by tag name.
+# _collect walks only the branches of the document the trie mentions, in
+# a single pass, recording the text of the first element at each target
+# path and gathering repeated record elements (people, grants). Tries are
+# qualified with the document namespace ("{ns}Tag" keys) so lxml's Clark
+# tag names match directly and the tree never has to be rewritten.
+
+
+class _PathNode:
+    __slots__ = ("children", "path", "repeated")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _PathNode] = {}
+        self.path: tuple[str, ...] | None = None
+        self.repeated = False
+
+
+def _path(xpath: str) -> tuple[str, ...]:
+    """Convert an XPath to a tag tuple relative to the Return element."""
+    return tuple(xpath.removeprefix("//Return/").split("/"))
+
+
+def _compile_trie(
+    targets: set[tuple[str, ...]], repeated: set[tuple[str, ...]] = frozenset()
+) -> _PathNode:
+    root = _PathNode()
+    for path in (*targets, *repeated):
+        node = root
+        for tag in path:
+            node = node.children.setdefault(tag, _PathNode())
+        node.path = path
+        node.repeated = path in repeated
+    return root
+
+
+def _compile_fields(xpath_map: dict[str, list[str]]) -> dict[str, tuple]:
+    return {
+        name: tuple(_path(xpath) for xpath in xpaths)
+        for name, xpaths in xpath_map.items()
+        if name != "container"
+    }
+
+
+_HEADER_FIELDS = _compile_fields(HEADER_XPATHS)
+_FORM_FIELDS = {form: _compile_fields(fm) for form, fm in FIELD_MAPS.items()}
+_PERSON_FIELDS = _compile_fields(PERSON_XPATHS)
+_GRANT_FIELDS = _compile_fields(GRANT_XPATHS)
+_PERSON_CONTAINERS = tuple(_path(x) for x in PERSON_XPATHS["container"])
+_GRANT_CONTAINERS = tuple(_path(x) for x in GRANT_XPATHS["container"])
+
+
+def _all_paths(*field_tables: dict[str, tuple]) -> set[tuple[str, ...]]:
+    return {
+        path for table in field_tables for paths in table.values() for path in paths
+    }
+
+
+_RETURN_TRIE = _compile_trie(
+    _all_paths(_HEADER_FIELDS, *_FORM_FIELDS.values()),
+    set(_PERSON_CONTAINERS + _GRANT_CONTAINERS),
+)
+_PERSON_TRIE = _compile_trie(_all_paths(_PERSON_FIELDS))
+_GRANT_TRIE = _compile_trie(_all_paths(_GRANT_FIELDS))
+
+
+def _qualify(node: _PathNode, namespace: str) -> _PathNode:
+    qualified = _PathNode()
+    qualified.path = node.path
+    qualified.repeated = node.repeated
+    qualified.children = {
+        f"{{{namespace}}}{tag}": _qualify(child, namespace)
+        for tag, child in node.children.items()
+    }
+    return qualified
+
+
+@functools.lru_cache(maxsize=8)
+def _tries(namespace: str | None) -> tuple[_PathNode, _PathNode, _PathNode]:
+    """Return (return, person, grant) tries for a document namespace."""
+    tries = (_RETURN_TRIE, _PERSON_TRIE, _GRANT_TRIE)
+    if namespace is None:
+        return tries
+    return tuple(_qualify(trie, namespace) for trie in tries)
+
+
+def _namespace(tag: str) -> str | None:
+    return tag[1 : tag.index("}")] if tag.startswith("{") else None
+
+
+_tries(IRS_EFILE_NS)
+
+
+def _collect(elem, node: _PathNode, found: dict, repeated: dict) -> None:
+    """Walk elem's children along the trie, filling found and repeated."""
+    for child in elem:
+        sub = node.children.get(child.tag)
+        if sub is None:
+            continue
+        if sub.repeated:
+            repeated.setdefault(sub.path, []).append(child)
+            continue
+        if sub.path is not None and sub.path not in found:
+            found[sub.path] = child.text
+        if sub.children:
+            _collect(child, sub, found, repeated)
+
+
 # --- Main parser ---
 
 
-def parse_filing(xml_bytes: bytes) -> ParsedFiling | None:
+def parse_filing(
+    xml_bytes: bytes,
+    streaming_threshold: int = STREAMING_PARSE_THRESHOLD_BYTES,
+) -> ParsedFiling | None:
     """Parse an IRS 990 XML filing into a ParsedFiling dataclass.
 
+    Filings larger than ``streaming_threshold`` bytes are parsed with
+    iterparse_filing so the whole tree is never held in memory.
+
     Returns None for malformed or unparseable XML.
     """
     if not xml_bytes:
         return None
 
     try:
+        if len(xml_bytes) > streaming_threshold:
+            return _parse_streaming(xml_bytes)
         root = _safe_fromstring(xml_bytes)
     except (XMLSyntaxError, ValueError) as exc:
         logger.warning("Failed to parse XML: %s", exc)
         return None
 
-    _strip_namespace(root)
+    if etree.QName(root).localname != "Return":
+        root = next(root.iter("{*}Return"), None)
+        if root is None:
+            logger.warning("Missing EIN or name in filing")
+            return None
+
+    return_trie, person_trie, grant_trie = _tries(_namespace(root.tag))
+    found: dict = {}
+    repeated: dict = {}
+    _collect(root, return_trie, found, repeated)
+
+    filing = _resolve_filing(found)
+    if filing is None:
+        return None
 
+    # Extract people (990 only)
+    if filing.form_type == "990":
+        filing.people = _extract_people(repeated, person_trie)
+
+    # Extract grants (990PF only)
+    if filing.form_type == "990PF":
+        filing.grants = _extract_grants(repeated, grant_trie)
+
+    return filing
+
+
+def _resolve_filing(found: dict) -> ParsedFiling | None:
+    """Build a ParsedFiling (without people/grants) from collected text."""
     # Extract header info
-    ein = _extract_text(root, HEADER_XPATHS["ein"])
-    name = _extract_text(root, HEADER_XPATHS["name"])
+    ein = _first_text(found, _HEADER_FIELDS["ein"])
+    name = _first_text(found, _HEADER_FIELDS["name"])
 
     if not ein or not name:
         logger.warning("Missing EIN or name in filing")
         return None
 
-    city = _extract_text(root, HEADER_XPATHS["city"])
-    state = _extract_text(root, HEADER_XPATHS["state"])
-    tax_year = _extract_int(root, HEADER_XPATHS["tax_year"])
-    form_type = _extract_text(root, HEADER_XPATHS["form_type"])
+    city = _first_text(found, _HEADER_FIELDS["city"])
+    state = _first_text(found, _HEADER_FIELDS["state"])
+    tax_year = _to_int(_first_text(found, _HEADER_FIELDS["tax_year"]))
+    form_type = _first_text(found, _HEADER_FIELDS["form_type"])
 
     # Determine which field map to use
     field_map_key = form_type if form_type in FIELD_MAPS else "990"
-    field_map = FIELD_MAPS[field_map_key]
+    field_map = _FORM_FIELDS[field_map_key]
 
     # Extract financial fields
     kwargs: dict = {}
-    for field_name, xpaths in field_map.items():
-        if field_name in INT_FIELDS:
-            kwargs[field_name] = _extract_int(root, xpaths)
-        else:
-            kwargs[field_name] = _extract_text(root, xpaths)
-
-    # Extract people (990 only)
-    people: list[ParsedPerson] = []
-    if form_type == "990":
-        people = _extract_people(root)
-
-    # Extract grants (990PF only)
-    grants: list[ParsedGrant] = []
-    if form_type == "990PF":
-        grants = _extract_grants(root)
+    for field_name, paths in field_map.items():
+        text = _first_text(found, paths)
+        kwargs[field_name] = _to_int(text) if field_name in INT_FIELDS else text
 
     return ParsedFiling(
         ein=ein,
@@ -373,98 +495,231 @@ def parse_filing(xml_bytes: bytes) -> ParsedFiling | None:
         state=state,
         tax_year=tax_year,
         form_type=form_type,
-        people=people,
-        grants=grants,
         **kwargs,
     )
 
 
-def _extract_people(root) -> list[ParsedPerson]:
-    """Extract officers/directors/key employees from a 990 filing."""
+# --- Streaming parser ---
+
+
+def iterparse_filing(
+    source,
+) -> Iterator[ParsedPerson | ParsedGrant | ParsedFiling]:
+    """Stream-parse a filing from a file-like object or path.
+
+    Yields ParsedPerson (990) and ParsedGrant (990PF) records as their
+    elements close, then the ParsedFiling itself (with empty people/grants)
+    once the document ends; nothing is yielded for it if EIN or name is
+    missing. Processed elements are cleared as the parse goes, so memory
+    stays flat no matter how many grants a return lists.
+
+    Unlike parse_filing, records come from whichever container tag appears
+    first rather than the first one in PERSON_XPATHS/GRANT_XPATHS order;
+    real returns only ever use one schema version's tags.
+
+    Raises XMLSyntaxError for malformed XML.
+    """
+    yield from _stream_records(
+        etree.iterparse(
+            source,
+            events=("start", "end"),
+            resolve_entities=False,
+            no_network=True,
+        )
+    )
+
+
+def feed_filing(chunks: Iterable[bytes]) -> ParsedFiling | None:
+    """Parse a filing fed to lxml in chunks, as they are read from a ZIP.
+
+    Gives the same result as :func:`parse_filing`, but the document is
+    neither held as bytes nor as a whole tree: elements are cleared as in
+    :func:`iterparse_filing` once they are processed. Exceptions raised by
+    ``chunks`` propagate.
+
+    Returns None for malformed or unparseable XML.
+    """
+    parser = etree.XMLPullParser(
+        events=("start", "end"), resolve_entities=False, no_network=True
+    )
+
+    def events() -> Iterator[tuple[str, etree._Element]]:
+        for chunk in chunks:
+            parser.feed(chunk)
+            yield from parser.read_events()
+        parser.close()
+        yield from parser.read_events()
+
+    try:
+        return _gather(_stream_records(events()))
+    except (XMLSyntaxError, ValueError) as exc:
+        logger.warning("Failed to parse XML: %s", exc)
+        return None
+
+
+def _stream_records(
+    events: Iterable[tuple[str, etree._Element]],
+) -> Iterator[ParsedPerson | ParsedGrant | ParsedFiling]:
+    """Records of a filing from its (event, element) start/end stream."""
+    found: dict = {}
+    stack: list[_PathNode | None] = []
+    record_depth = 0
+    tries: tuple | None = None
+    containers: dict[str, tuple] = {}
+    # Records held until the form type is known (header after data)
+    deferred: list[ParsedPerson | ParsedGrant] = []
+
+    for event, elem in events:
+        if event == "start":
+            parent = stack[-1] if stack else None
+            node = parent.children.get(elem.tag) if parent is not None else None
+            if tries is None and etree.QName(elem).localname == "Return":
+                tries = _tries(_namespace(elem.tag))
+                node = tries[0]
+            if node is not None and node.repeated:
+                record_depth += 1
+            stack.append(node)
+            continue
+
+        node = stack.pop()
+        if node is not None and node.repeated:
+            record_depth -= 1
+            form_type = _first_text(found, _HEADER_FIELDS["form_type"])
+            record = _stream_record(node.path, elem, form_type, tries, containers)
+            if record is not None:
+                deferred.append(record)
+            if form_type is not None:
+                yield from _wanted_records(deferred, form_type)
+                deferred.clear()
+        elif node is not None and node.path is not None and node.path not in found:
+            found[node.path] = elem.text
+
+        if record_depth == 0:
+            elem.clear()
+            # The root's siblings (comments, PIs) have no parent to go from
+            parent = elem.getparent()
+            if parent is not None:
+                while elem.getprevious() is not None:
+                    del parent[0]
+
+    filing = _resolve_filing(found)
+    if filing is not None:
+        yield from _wanted_records(deferred, filing.form_type)
+        yield filing
+
+
+def _wanted_records(
+    records: list[ParsedPerson | ParsedGrant], form_type: str | None
+) -> Iterator[ParsedPerson | ParsedGrant]:
+    """Filter records to the kind the form type carries (people on 990s)."""
+    wanted = {"990": ParsedPerson, "990PF": ParsedGrant}.get(form_type or "")
+    if wanted is not None:
+        yield from (r for r in records if isinstance(r, wanted))
+
+
+def _stream_record(
+    path: tuple,
+    elem,
+    form_type: str | None,
+    tries: tuple,
+    containers: dict,
+) -> ParsedPerson | ParsedGrant | None:
+    """Build a person/grant from a closed container element, if wanted."""
+    if path in _PERSON_CONTAINERS and form_type in (None, "990"):
+        kind, build, trie = "person", _build_person, tries[1]
+    elif path in _GRANT_CONTAINERS and form_type in (None, "990PF"):
+        kind, build, trie = "grant", _build_grant, tries[2]
+    else:
+        return None
+    # Stick to the first container tag seen for each record kind
+    if containers.setdefault(kind, path) != path:
+        return None
+    return build(elem, trie)
+
+
+def _parse_streaming(xml_bytes: bytes) -> ParsedFiling | None:
+    return _gather(iterparse_filing(io.BytesIO(xml_bytes)))
+
+
+def _gather(
+    records: Iterable[ParsedPerson | ParsedGrant | ParsedFiling],
+) -> ParsedFiling | None:
+    """Attach streamed people and grants to the filing they belong to."""
+    filing = None
     people: list[ParsedPerson] = []
+    grants: list[ParsedGrant] = []
+    for record in records:
+        if isinstance(record, ParsedPerson):
+            people.append(record)
+        elif isinstance(record, ParsedGrant):
+            grants.append(record)
+        else:
+            filing = record
+    if filing is not None:
+        filing.people = people
+        filing.grants = grants
+    return filing
+
 
-    for xpath in PERSON_XPATHS["container"]:
-        containers = root.xpath(xpath)
+def _extract_people(repeated: dict, trie: _PathNode) -> list[ParsedPerson]:
+    """Extract officers/directors/key employees from a 990 filing."""
+    for path in _PERSON_CONTAINERS:
+        containers = repeated.get(path)
         if containers:
-            for person_elem in containers:
-                person_name = _extract_text(
-                    person_elem, PERSON_XPATHS["name"]
-                )
-                if not person_name:
-                    continue
-
-                title = _extract_text(person_elem, PERSON_XPATHS["title"])
-
-                comp_text = _extract_text(
-                    person_elem, PERSON_XPATHS["compensation"]
-                )
-                compensation = None
-                if comp_text:
-                    with contextlib.suppress(ValueError, TypeError):
-                        compensation = int(comp_text)
-
-                people.append(
-                    ParsedPerson(
-                        name=person_name,
-                        title=title,
-                        compensation=compensation,
-                        is_officer=_extract_bool(
-                            person_elem, PERSON_XPATHS["is_officer"]
-                        ),
-                        is_director=_extract_bool(
-                            person_elem, PERSON_XPATHS["is_director"]
-                        ),
-                        is_key_employee=_extract_bool(
-                            person_elem, PERSON_XPATHS["is_key_employee"]
-                        ),
-                        is_highest_compensated=_extract_bool(
-                            person_elem,
-                            PERSON_XPATHS["is_highest_compensated"],
-                        ),
-                    )
-                )
-            break  # Use first matching container XPath
-
-    return people
-
-
-def _extract_grants(root) -> list[ParsedGrant]:
-    """Extract grants from a 990-PF filing."""
-    grants: list[ParsedGrant] = []
+            # Use first matching container path
+            return [
+                person
+                for person in (_build_person(elem, trie) for elem in containers)
+                if person is not None
+            ]
+    return []
+
+
+def _build_person(elem, trie: _PathNode) -> ParsedPerson | None:
+    found: dict = {}
+    _collect(elem, trie, found, {})
+    person_name = _first_text(found, _PERSON_FIELDS["name"])
+    if not person_name:
+        return None
+
+    return ParsedPerson(
+        name=person_name,
+        title=_first_text(found, _PERSON_FIELDS["title"]),
+        compensation=_to_int(_first_text(found, _PERSON_FIELDS["compensation"])),
+        is_officer=_first_bool(found, _PERSON_FIELDS["is_officer"]),
+        is_director=_first_bool(found, _PERSON_FIELDS["is_director"]),
+        is_key_employee=_first_bool(found, _PERSON_FIELDS["is_key_employee"]),
+        is_highest_compensated=_first_bool(
+            found, _PERSON_FIELDS["is_highest_compensated"]
+        ),
+    )
 
-    for xpath in GRANT_XPATHS["container"]:
-        containers = root.xpath(xpath)
+
+def _extract_grants(repeated: dict, trie: _PathNode) -> list[ParsedGrant]:
+    """Extract grants from a 990-PF filing."""
+    for path in _GRANT_CONTAINERS:
+        containers = repeated.get(path)
         if containers:
-            for grant_elem in containers:
-                recipient_name = _extract_text(
-                    grant_elem, GRANT_XPATHS["recipient_name"]
-                )
-                if not recipient_name:
-                    continue
-
-                amount_text = _extract_text(
-                    grant_elem, GRANT_XPATHS["amount"]
-                )
-                amount = None
-                if amount_text:
-                    with contextlib.suppress(ValueError, TypeError):
-                        amount = int(amount_text)
-
-                grants.append(
-                    ParsedGrant(
-                        recipient_name=recipient_name,
-                        recipient_city=_extract_text(
-                            grant_elem, GRANT_XPATHS["recipient_city"]
-                        ),
-                        recipient_state=_extract_text(
-                            grant_elem, GRANT_XPATHS["recipient_state"]
-                        ),
-                        amount=amount,
-                        purpose=_extract_text(
-                            grant_elem, GRANT_XPATHS["purpose"]
-                        ),
-                    )
-                )
-            break  # Use first matching container XPath
-
-    return grants
+            # Use first matching container path
+            return [
+                grant
+                for grant in (_build_grant(elem, trie) for elem in containers)
+                if grant is not None
+            ]
+    return []
+
+
+def _build_grant(elem, trie: _PathNode) -> ParsedGrant | None:
+    found: dict = {}
+    _collect(elem, trie, found, {})
+    recipient_name = _first_text(found, _GRANT_FIELDS["recipient_name"])
+    if not recipient_name:
+        return None
+
+    return ParsedGrant(
+        recipient_name=recipient_name,
+        recipient_city=_first_text(found, _GRANT_FIELDS["recipient_city"]),
+        recipient_state=_first_text(found, _GRANT_FIELDS["recipient_state"]),
+        amount=_to_int(_first_text(found, _GRANT_FIELDS["amount"])),
+        purpose=_first_text(found, _GRANT_FIELDS["purpose"]),
+    )
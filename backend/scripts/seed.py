@@ -11,6 +11,7 @@ from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.models import Filing, Organization, User, Watchlist, WatchlistItem
+from app.services.latest_financials import refresh_latest_financials
 
 
 def get_sync_url() -> str:
@@ -106,6 +107,8 @@ def seed():
                     net_assets=25_000_000,
                 )
                 session.add(filing)
+                session.flush()
+                session.execute(refresh_latest_financials([org.id]))
             else:
                 org_ids.append(existing.id)
                 print(f"Org already exists: {org_data['name']}, skipping")
@@ -284,3 +284,49 @@ def test_search_human_output(runner, mock_transport):
     result = runner.invoke(cli_app, ["search", "nothing"])
     assert result.exit_code == 0
     assert "0 result" in result.stdout
+
+
+def test_search_prints_next_cursor(runner, mock_transport):
+    mock_transport(
+        "GET",
+        "/api/v1/search",
+        httpx.Response(
+            200,
+            json={
+                "items": [],
+                "total": 3,
+                "page": 1,
+                "page_size": 2,
+                "total_pages": 2,
+                "next_cursor": "WyJuZXh0Il0",
+            },
+        ),
+    )
+    result = runner.invoke(
+        cli_app, ["search", "food bank", "--cursor", "WyJmaXJzdCJd"]
+    )
+    assert result.exit_code == 0
+    assert "3 result(s)" in result.stdout
+    assert "page" not in result.stdout
+    assert "--cursor WyJuZXh0Il0" in result.stdout
+
+
+def test_search_approximate_total(runner, mock_transport):
+    mock_transport(
+        "GET",
+        "/api/v1/search",
+        httpx.Response(
+            200,
+            json={
+                "items": [],
+                "total": 10000,
+                "total_is_exact": False,
+                "page": 1,
+                "page_size": 20,
+                "total_pages": 500,
+            },
+        ),
+    )
+    result = runner.invoke(cli_app, ["search", "food"])
+    assert result.exit_code == 0
+    assert "10,000+ result(s)" in result.stdout
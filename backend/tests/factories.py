@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.organization import Filing, FilingGrant, FilingPerson, Organization
 from app.models.user import User
+from app.services.latest_financials import refresh_latest_financials
 
 
 async def create_test_user(db: AsyncSession, **kwargs) -> User:
@@ -58,6 +59,8 @@ async def create_test_filing(db: AsyncSession, org: Organization, **kwargs) -> F
     filing = Filing(**defaults)
     db.add(filing)
     await db.flush()
+    # Search reads the latest filing from here, as after a real load
+    await db.execute(refresh_latest_financials([filing.organization_id]))
     return filing
 
 
@@ -0,0 +1,138 @@
+"""Tests for the on-disk download cache."""
+
+import os
+from unittest.mock import MagicMock, patch
+
+from scripts.ingest.cache import HttpCache
+
+URL = "https://example.test/2024/batch.zip"
+
+
+def _response(body: bytes = b"", status: int = 200, headers: dict | None = None):
+    resp = MagicMock()
+    resp.status_code = status
+    resp.headers = {"Content-Length": str(len(body)), **(headers or {})}
+    resp.iter_content.return_value = [body[:3], body[3:]]
+    return resp
+
+
+def _session(*responses):
+    session = MagicMock()
+    session.get.side_effect = list(responses)
+    return session
+
+
+class TestHttpCache:
+    def test_miss_downloads_and_stores(self, tmp_path):
+        cache = HttpCache(tmp_path)
+        session = _session(_response(b"zipdata", headers={"ETag": '"v1"'}))
+
+        path = cache.fetch(URL, session=session)
+
+        assert path.read_bytes() == b"zipdata"
+        assert session.get.call_args.kwargs["headers"] == {}
+        entry = cache.lookup(URL)
+        assert entry.size == 7
+        assert entry.etag == '"v1"'
+
+    def test_not_modified_serves_cached_copy(self, tmp_path):
+        cache = HttpCache(tmp_path)
+        cache.fetch(
+            URL,
+            session=_session(
+                _response(
+                    b"zipdata",
+                    headers={"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024"},
+                )
+            ),
+        )
+        session = _session(_response(status=304))
+
+        path = cache.fetch(URL, session=session)
+
+        assert path.read_bytes() == b"zipdata"
+        assert session.get.call_args.kwargs["headers"] == {
+            "If-None-Match": '"v1"',
+            "If-Modified-Since": "Mon, 01 Jan 2024",
+        }
+
+    def test_changed_body_replaces_cached_copy(self, tmp_path):
+        cache = HttpCache(tmp_path)
+        cache.fetch(URL, session=_session(_response(b"old", headers={"ETag": "1"})))
+
+        path = cache.fetch(
+            URL, session=_session(_response(b"newer", headers={"ETag": "2"}))
+        )
+
+        assert path.read_bytes() == b"newer"
+        assert cache.lookup(URL).etag == "2"
+
+    def test_corrupt_copy_is_downloaded_again(self, tmp_path):
+        cache = HttpCache(tmp_path)
+        path = cache.fetch(
+            URL, session=_session(_response(b"zipdata", headers={"ETag": "1"}))
+        )
+        path.write_bytes(b"zipdatX")
+        cache = HttpCache(tmp_path)
+        session = _session(_response(b"zipdata"))
+
+        assert cache.lookup(URL) is None
+        assert cache.fetch(URL, session=session).read_bytes() == b"zipdata"
+        assert session.get.call_args.kwargs["headers"] == {}
+
+    @patch("scripts.ingest.cache.time.sleep")
+    def test_truncated_download_is_not_cached(self, _sleep, tmp_path):
+        cache = HttpCache(tmp_path)
+        short = _response(b"zip", headers={"Content-Length": "7"})
+        session = MagicMock()
+        session.get.return_value = short
+
+        assert cache.fetch(URL, session=session) is None
+        assert cache.lookup(URL) is None
+        assert not list(tmp_path.glob("*.part"))
+
+    def test_offline_serves_cache_without_network(self, tmp_path):
+        HttpCache(tmp_path).fetch(URL, session=_session(_response(b"zipdata")))
+        cache = HttpCache(tmp_path, offline=True)
+        session = MagicMock()
+
+        assert cache.fetch(URL, session=session).read_bytes() == b"zipdata"
+        assert cache.fetch(URL + "?other", session=session) is None
+        session.get.assert_not_called()
+
+    def test_stored_file_is_served_offline(self, tmp_path):
+        part = tmp_path / "spool"
+        part.write_bytes(b"members")
+        path = HttpCache(tmp_path).store(URL, part, extra={"requested": ["a"]})
+        cache = HttpCache(tmp_path, offline=True)
+
+        assert not part.exists()
+        assert cache.lookup(URL).extra == {"requested": ["a"]}
+        assert cache.fetch(URL) == path
+        assert path.read_bytes() == b"members"
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = HttpCache(tmp_path, max_bytes=10)
+        urls = [f"{URL}?{i}" for i in range(3)]
+        for i, url in enumerate(urls):
+            cache.fetch(url, session=_session(_response(b"abcd")))
+            cache.release(url)
+            body = cache._paths(url)[0]
+            os.utime(body, ns=(i * 10**9, i * 10**9))
+
+        cache.fetch(urls[0], session=_session(_response(status=304)))
+        cache.release(urls[0])
+        cache.fetch(URL, session=_session(_response(b"abcd")))
+
+        assert cache.lookup(urls[0]) is not None
+        assert cache.lookup(urls[1]) is None
+        assert cache.lookup(URL) is not None
+
+    def test_pinned_entries_are_not_evicted(self, tmp_path):
+        cache = HttpCache(tmp_path, max_bytes=4)
+        cache.fetch(URL, session=_session(_response(b"abcd")))
+
+        cache.fetch(URL + "?2", session=_session(_response(b"efgh")))
+
+        assert cache.lookup(URL) is not None
+        assert cache.lookup(URL + "?2") is not None
@@ -0,0 +1,246 @@
+"""Tests for the ZIP batch downloader."""
+
+import io
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from contextlib import closing
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from scripts.ingest.downloader import _DiskBudget, _xml_entries, prefetch_zip_batches
+
+
+def _zip_bytes(members: dict[str, bytes]) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+
+def _corrupt_first_member(path: str) -> None:
+    """Flip a byte of the first member's data, so its CRC check fails."""
+    with zipfile.ZipFile(path) as zf:
+        info = zf.infolist()[0]
+    with open(path, "r+b") as f:
+        f.seek(info.header_offset + 26)
+        name_len = int.from_bytes(f.read(2), "little")
+        extra_len = int.from_bytes(f.read(2), "little")
+        f.seek(info.header_offset + 30 + name_len + extra_len)
+        byte = f.read(1)
+        f.seek(-1, 1)
+        f.write(bytes([byte[0] ^ 0xFF]))
+
+
+def _fake_session(zips: dict[str, bytes], fail: frozenset[str] = frozenset()):
+    """A session whose GET/HEAD serve ``zips`` keyed by batch id."""
+    requested: list[str] = []
+
+    def batch_of(url: str) -> str:
+        return url.rsplit("/", 1)[-1].removesuffix(".zip")
+
+    def head(url, **kwargs):
+        resp = MagicMock()
+        resp.headers = {"Content-Length": str(len(zips[batch_of(url)]))}
+        return resp
+
+    def get(url, **kwargs):
+        batch_id = batch_of(url)
+        requested.append(batch_id)
+        if batch_id in fail:
+            raise requests.ConnectionError("boom")
+        data = zips[batch_id]
+        resp = MagicMock()
+        resp.iter_content.return_value = [data[:10], data[10:]]
+        return resp
+
+    session = MagicMock()
+    session.head.side_effect = head
+    session.get.side_effect = get
+    return session, requested
+
+
+ZIPS = {
+    f"B{i}": _zip_bytes({f"{i}_public.xml": f"<x>{i}</x>".encode(), "README": b""})
+    for i in range(4)
+}
+
+
+class TestPrefetchZipBatches:
+    @patch("scripts.ingest.downloader.get_http_session")
+    def test_yields_batches_in_order(self, mock_session):
+        mock_session.return_value, _ = _fake_session(ZIPS)
+
+        with closing(prefetch_zip_batches(2024, list(ZIPS), depth=2)) as batches:
+            result = [(batch_id, list(xml_iter)) for batch_id, xml_iter in batches]
+
+        assert result == [
+            (f"B{i}", [(f"{i}_public.xml", f"<x>{i}</x>".encode())])
+            for i in range(4)
+        ]
+
+    @patch("scripts.ingest.downloader.time.sleep")
+    @patch("scripts.ingest.downloader.get_http_session")
+    def test_failed_download_yields_none(self, mock_session, _sleep):
+        mock_session.return_value, _ = _fake_session(ZIPS, fail=frozenset({"B1"}))
+
+        with closing(prefetch_zip_batches(2024, list(ZIPS), depth=2)) as batches:
+            result = {batch_id: xml_iter is None for batch_id, xml_iter in batches}
+
+        assert result == {"B0": False, "B1": True, "B2": False, "B3": False}
+
+    @patch("scripts.ingest.downloader.get_http_session")
+    def test_downloads_zip_over_disk_budget(self, mock_session):
+        session, requested = _fake_session(ZIPS)
+        session.head.side_effect = lambda url, **kw: MagicMock(
+            headers={"Content-Length": str(10 * 1024 * 1024 * 1024)}
+        )
+        mock_session.return_value = session
+
+        with closing(prefetch_zip_batches(2024, ["B0"])) as batches:
+            result = [(batch_id, list(xml_iter)) for batch_id, xml_iter in batches]
+
+        assert result == [("B0", [("0_public.xml", b"<x>0</x>")])]
+        assert requested == ["B0"]
+
+    @patch("scripts.ingest.downloader.get_http_session")
+    def test_temp_files_removed(self, mock_session):
+        mock_session.return_value, _ = _fake_session(ZIPS)
+        paths = []
+        real_mkstemp = tempfile.mkstemp
+
+        def tracking_mkstemp(*args, **kwargs):
+            fd, path = real_mkstemp(*args, **kwargs)
+            paths.append(path)
+            return fd, path
+
+        with patch(
+            "scripts.ingest.downloader.tempfile.mkstemp", tracking_mkstemp
+        ), closing(prefetch_zip_batches(2024, list(ZIPS), depth=1)) as batches:
+            next(batches)
+
+        assert paths
+        assert not any(os.path.exists(p) for p in paths)
+
+    @patch("scripts.ingest.downloader.get_http_session")
+    def test_depth_bounds_lookahead(self, mock_session):
+        mock_session.return_value, requested = _fake_session(ZIPS)
+
+        with closing(prefetch_zip_batches(2024, list(ZIPS), depth=1)) as batches:
+            next(batches)
+
+        assert requested[0] == "B0"
+        assert set(requested) <= {"B0", "B1"}
+
+    @patch("scripts.ingest.downloader.get_http_session")
+    def test_cancel_interrupts_wait(self, mock_session):
+        session, _ = _fake_session(ZIPS)
+
+        def endless_chunks(*args, **kwargs):
+            while True:
+                time.sleep(0.01)
+                yield b"x" * 10
+
+        session.get.side_effect = lambda url, **kw: MagicMock(
+            iter_content=endless_chunks
+        )
+        mock_session.return_value = session
+        cancel = threading.Event()
+        threading.Timer(0.2, cancel.set).start()
+
+        started = time.perf_counter()
+        with closing(
+            prefetch_zip_batches(2024, ["B0"], depth=1, cancel=cancel)
+        ) as batches:
+            assert list(batches) == [("B0", None)]
+        assert time.perf_counter() - started < 5
+
+
+class TestDiskBudget:
+    def test_grants_in_ticket_order(self):
+        budget = _DiskBudget(limit=100)
+        stop = threading.Event()
+        granted = []
+
+        def take(ticket):
+            budget.acquire(ticket, 10, stop)
+            granted.append(ticket)
+
+        later = threading.Thread(target=take, args=(1,))
+        later.start()
+        later.join(timeout=0.2)
+        assert granted == []
+
+        take(0)
+        later.join(timeout=5)
+        assert granted == [0, 1]
+
+    def test_admits_oversized_request_when_empty(self):
+        budget = _DiskBudget(limit=10)
+
+        assert budget.acquire(0, 50, threading.Event())
+        assert budget.reserved == 50
+
+    def test_stop_releases_waiter(self):
+        budget = _DiskBudget(limit=10)
+        stop = threading.Event()
+        budget.acquire(0, 10, stop)
+
+        stop.set()
+        assert budget.acquire(1, 10, stop) is False
+
+
+class TestXmlEntries:
+    def _zip(self, tmp_path, members: dict[str, bytes]) -> str:
+        path = tmp_path / "batch.zip"
+        path.write_bytes(_zip_bytes(members))
+        return str(path)
+
+    def test_members_within_budget_are_bytes(self, tmp_path):
+        path = self._zip(tmp_path, {"1_public.xml": b"<x>1</x>", "README": b""})
+
+        assert list(_xml_entries(path, "batch")) == [("1_public.xml", b"<x>1</x>")]
+
+    def test_members_over_budget_are_streamed(self, tmp_path):
+        big = b"<x>" + b"y" * 100_000 + b"</x>"
+        path = self._zip(tmp_path, {"1_public.xml": b"<x>1</x>", "2_public.xml": big})
+
+        entries = _xml_entries(path, "batch", budget=1000)
+        small, large = next(entries), next(entries)
+
+        assert small == ("1_public.xml", b"<x>1</x>")
+        assert large[0] == "2_public.xml"
+        assert not isinstance(large[1], bytes)
+        assert b"".join(large[1]) == big
+
+    def test_corrupt_member_is_yielded_as_error(self, tmp_path):
+        path = self._zip(
+            tmp_path,
+            {
+                "1_public.xml": b"<x>1</x>",
+                "2_public.xml": b"<x>2</x>",
+                "3_public.xml": b"<x>3</x>",
+            },
+        )
+        _corrupt_first_member(path)
+
+        (name, error), *rest = _xml_entries(path, "batch")
+
+        assert name == "1_public.xml"
+        assert isinstance(error, zipfile.BadZipFile)
+        assert rest == [
+            ("2_public.xml", b"<x>2</x>"),
+            ("3_public.xml", b"<x>3</x>"),
+        ]
+
+    def test_unreadable_zip_raises(self, tmp_path):
+        path = tmp_path / "batch.zip"
+        path.write_bytes(b"not a zip")
+
+        with pytest.raises(zipfile.BadZipFile):
+            list(_xml_entries(str(path), "batch"))
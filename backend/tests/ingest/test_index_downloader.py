@@ -2,7 +2,13 @@
 
 from unittest.mock import MagicMock, patch
 
-from scripts.ingest.index_downloader import IndexEntry, download_index
+from scripts.ingest.cache import HttpCache
+from scripts.ingest.index_downloader import (
+    IndexEntry,
+    download_index,
+    index_batches,
+    iter_index,
+)
 
 SAMPLE_CSV = (
     "RETURN_ID,FILING_TYPE,EIN,TAX_PERIOD,SUB_DATE,"
@@ -22,7 +28,7 @@ class TestDownloadIndex:
     @patch("scripts.ingest.index_downloader.requests.get")
     def test_parses_valid_entries(self, mock_get):
         mock_resp = MagicMock()
-        mock_resp.text = SAMPLE_CSV
+        mock_resp.iter_content.return_value = [SAMPLE_CSV.encode()]
         mock_resp.raise_for_status = MagicMock()
         mock_get.return_value = mock_resp
 
@@ -34,7 +40,7 @@ class TestDownloadIndex:
     @patch("scripts.ingest.index_downloader.requests.get")
     def test_filters_invalid_return_types(self, mock_get):
         mock_resp = MagicMock()
-        mock_resp.text = SAMPLE_CSV
+        mock_resp.iter_content.return_value = [SAMPLE_CSV.encode()]
         mock_resp.raise_for_status = MagicMock()
         mock_get.return_value = mock_resp
 
@@ -46,7 +52,7 @@ class TestDownloadIndex:
     @patch("scripts.ingest.index_downloader.requests.get")
     def test_entry_fields_populated(self, mock_get):
         mock_resp = MagicMock()
-        mock_resp.text = SAMPLE_CSV
+        mock_resp.iter_content.return_value = [SAMPLE_CSV.encode()]
         mock_resp.raise_for_status = MagicMock()
         mock_get.return_value = mock_resp
 
@@ -82,7 +88,7 @@ class TestDownloadIndex:
     @patch("scripts.ingest.index_downloader.requests.get")
     def test_uses_correct_url(self, mock_get):
         mock_resp = MagicMock()
-        mock_resp.text = SAMPLE_CSV
+        mock_resp.iter_content.return_value = [SAMPLE_CSV.encode()]
         mock_resp.raise_for_status = MagicMock()
         mock_get.return_value = mock_resp
 
@@ -91,3 +97,73 @@ class TestDownloadIndex:
         call_url = mock_get.call_args[0][0]
         assert "index_2023.csv" in call_url
         assert "apps.irs.gov" in call_url
+
+    def test_offline_cache_serves_index(self, tmp_path):
+        online = HttpCache(tmp_path)
+        mock_resp = MagicMock()
+        mock_resp.status_code = 200
+        mock_resp.headers = {}
+        mock_resp.iter_content.return_value = [SAMPLE_CSV.encode()]
+        with patch("scripts.ingest.cache.requests.get", return_value=mock_resp):
+            assert len(download_index(2022, cache=online)) == 3
+
+        with patch("scripts.ingest.cache.requests.get") as mock_get:
+            entries = download_index(2022, cache=HttpCache(tmp_path, offline=True))
+
+        mock_get.assert_not_called()
+        assert len(entries) == 3
+
+
+def _chunked(data: bytes, size: int) -> list[bytes]:
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+class TestStreaming:
+    @patch("scripts.ingest.index_downloader.requests.get")
+    def test_rows_split_across_chunks(self, mock_get):
+        csv_text = SAMPLE_CSV.replace("Test Org", '"Café\nOrg"')
+        mock_resp = MagicMock()
+        mock_resp.iter_content.return_value = _chunked(csv_text.encode(), 7)
+        mock_get.return_value = mock_resp
+
+        entries = download_index(2022)
+
+        assert [e.object_id for e in entries] == [
+            "201900001",
+            "201900002",
+            "201900003",
+        ]
+        assert entries[0].taxpayer_name == "Café\nOrg"
+        assert mock_get.call_args.kwargs["stream"] is True
+
+    @patch("scripts.ingest.index_downloader.requests.get")
+    def test_grouped_by_batch(self, mock_get):
+        mock_resp = MagicMock()
+        mock_resp.iter_content.return_value = [SAMPLE_CSV.encode()]
+        mock_get.return_value = mock_resp
+
+        groups = [
+            (batch_id, [e.object_id for e in entries])
+            for batch_id, entries in index_batches(2022)
+        ]
+
+        assert groups == [
+            ("2023_TEOS_XML_01A", ["201900001", "201900002"]),
+            ("2023_TEOS_XML_02A", ["201900003"]),
+        ]
+
+
+class TestIterIndex:
+    def test_repeated_values_are_shared(self):
+        first, second, _ = iter_index(SAMPLE_CSV.splitlines(keepends=True))
+
+        assert first.xml_batch_id is second.xml_batch_id
+        assert first.tax_period is second.tax_period
+        assert not hasattr(first, "__dict__")
+
+    def test_missing_columns_read_empty(self):
+        lines = ["OBJECT_ID,RETURN_TYPE\n", "201900001,990\n", "201900002\n"]
+
+        entries = list(iter_index(lines))
+
+        assert [(e.object_id, e.xml_batch_id) for e in entries] == [("201900001", "")]
@@ -1,6 +1,7 @@
 """Tests for the database loader."""
 
 import os
+import uuid
 
 import pytest
 from sqlalchemy import create_engine, select
@@ -9,8 +10,20 @@ from sqlalchemy.orm import Session
 # Import all models so SQLAlchemy knows about them
 import app.models  # noqa: F401
 from app.models.base import Base
-from app.models.organization import Filing, FilingGrant, FilingPerson, Organization
-from scripts.ingest.loader import load_filing
+from app.models.organization import (
+    Filing,
+    FilingGrant,
+    FilingPerson,
+    Organization,
+    OrgLatestFinancials,
+)
+from scripts.ingest.loader import (
+    CachedOrg,
+    OrganizationCache,
+    known_object_ids,
+    load_filing,
+    load_filings_bulk,
+)
 from scripts.ingest.xml_parser import ParsedFiling, ParsedGrant, ParsedPerson
 
 TEST_DB_URL = os.environ.get(
@@ -173,3 +186,357 @@ class TestLoadFiling:
             select(Filing).where(Filing.object_id == "obj-007")
         ).scalar_one()
         assert filing.raw_xml_url is None
+
+
+class TestLoadFilingsBulk:
+    def test_creates_orgs_and_filings(self, session):
+        batch = [
+            (_make_parsed_filing(ein="200000001", name="Bulk A"), "bulk-001"),
+            (_make_parsed_filing(ein="200000002", name="Bulk B"), "bulk-002"),
+        ]
+        inserted = load_filings_bulk(session, batch)
+
+        assert inserted == 2
+        org = session.execute(
+            select(Organization).where(Organization.ein == "200000002")
+        ).scalar_one()
+        assert org.name == "Bulk B"
+        assert org.city == "New York"
+
+        filing = session.execute(
+            select(Filing).where(Filing.object_id == "bulk-002")
+        ).scalar_one()
+        assert filing.organization_id == org.id
+        assert filing.tax_year == 2022
+        assert filing.total_revenue == 5_000_000
+        assert filing.raw_xml_url is None
+
+    def test_skips_existing_and_in_batch_duplicates(self, session):
+        load_filing(session, _make_parsed_filing(ein="200000003"), "bulk-003")
+
+        parsed = _make_parsed_filing(ein="200000003")
+        batch = [(parsed, "bulk-003"), (parsed, "bulk-004"), (parsed, "bulk-004")]
+        inserted = load_filings_bulk(session, batch)
+
+        assert inserted == 1
+        filings = session.execute(
+            select(Filing).where(Filing.object_id.in_(["bulk-003", "bulk-004"]))
+        ).scalars().all()
+        assert len(filings) == 2
+
+    def test_latest_filing_updates_org(self, session):
+        load_filing(
+            session,
+            _make_parsed_filing(ein="200000005", name="Old", city="Boston"),
+            "bulk-005",
+        )
+
+        batch = [
+            (_make_parsed_filing(ein="200000005", name="Mid"), "bulk-006"),
+            (
+                _make_parsed_filing(ein="200000005", name="New", city=None),
+                "bulk-007",
+            ),
+        ]
+        load_filings_bulk(session, batch)
+
+        org = session.execute(
+            select(Organization).where(Organization.ein == "200000005")
+        ).scalar_one()
+        session.refresh(org)
+        assert org.name == "New"
+        assert org.city == "New York"
+
+    def test_creates_people_and_grants(self, session):
+        batch = [
+            (
+                _make_parsed_filing(
+                    ein="200000008",
+                    people=[
+                        ParsedPerson(name="Jane Smith", is_officer=True),
+                        ParsedPerson(name="John Doe", is_director=True),
+                    ],
+                ),
+                "bulk-008",
+            ),
+            (
+                _make_parsed_filing(
+                    ein="200000009",
+                    form_type="990PF",
+                    grants=[
+                        ParsedGrant(recipient_name="Local School", amount=100),
+                    ],
+                ),
+                "bulk-009",
+            ),
+        ]
+        load_filings_bulk(session, batch)
+
+        people_filing = session.execute(
+            select(Filing).where(Filing.object_id == "bulk-008")
+        ).scalar_one()
+        people = session.execute(
+            select(FilingPerson).where(FilingPerson.filing_id == people_filing.id)
+        ).scalars().all()
+        assert {p.name for p in people} == {"Jane Smith", "John Doe"}
+
+        grant_filing = session.execute(
+            select(Filing).where(Filing.object_id == "bulk-009")
+        ).scalar_one()
+        grants = session.execute(
+            select(FilingGrant).where(FilingGrant.filing_id == grant_filing.id)
+        ).scalars().all()
+        assert len(grants) == 1
+        assert grants[0].amount == 100
+
+    def test_duplicate_filing_children_not_inserted(self, session):
+        parsed = _make_parsed_filing(
+            ein="200000010", people=[ParsedPerson(name="Only Once")]
+        )
+        load_filings_bulk(session, [(parsed, "bulk-010")])
+        load_filings_bulk(session, [(parsed, "bulk-010")])
+
+        filing = session.execute(
+            select(Filing).where(Filing.object_id == "bulk-010")
+        ).scalar_one()
+        people = session.execute(
+            select(FilingPerson).where(FilingPerson.filing_id == filing.id)
+        ).scalars().all()
+        assert len(people) == 1
+
+    def test_empty_batch(self, session):
+        assert load_filings_bulk(session, []) == 0
+
+
+def _latest(session, ein: str) -> tuple | None:
+    row = session.execute(
+        select(
+            Filing.object_id,
+            OrgLatestFinancials.tax_year,
+            OrgLatestFinancials.total_revenue,
+        )
+        .join(Filing, Filing.id == OrgLatestFinancials.filing_id)
+        .join(Organization, Organization.id == OrgLatestFinancials.organization_id)
+        .where(Organization.ein == ein)
+    ).one_or_none()
+    return tuple(row) if row is not None else None
+
+
+class TestLatestFinancials:
+    def test_load_filing_keeps_latest_year(self, session):
+        load_filing(session, _make_parsed_filing(tax_year=2021), "latest-001")
+        assert _latest(session, "123456789") == ("latest-001", 2021, 5_000_000)
+
+        newer = _make_parsed_filing(tax_year=2022, total_revenue=7)
+        load_filing(session, newer, "latest-002")
+        older = _make_parsed_filing(tax_year=2020, total_revenue=9)
+        load_filing(session, older, "latest-003")
+
+        assert _latest(session, "123456789") == ("latest-002", 2022, 7)
+
+    def test_amended_return_wins_its_year(self, session):
+        load_filing(session, _make_parsed_filing(), "202301")
+        amended = _make_parsed_filing(total_revenue=6_000_000)
+        load_filing(session, amended, "202302")
+
+        assert _latest(session, "123456789") == ("202302", 2022, 6_000_000)
+
+    def test_bulk_loader_refreshes_touched_orgs(self, session):
+        load_filing(
+            session, _make_parsed_filing(ein="200000010", tax_year=2021), "bulk-010"
+        )
+
+        batch = [
+            (_make_parsed_filing(ein="200000010", tax_year=2023), "bulk-011"),
+            (_make_parsed_filing(ein="200000010", tax_year=2022), "bulk-012"),
+            (_make_parsed_filing(ein="200000011", total_revenue=1), "bulk-013"),
+        ]
+        load_filings_bulk(session, batch)
+
+        assert _latest(session, "200000010") == ("bulk-011", 2023, 5_000_000)
+        assert _latest(session, "200000011") == ("bulk-013", 2022, 1)
+
+    def test_skipped_filings_change_nothing(self, session):
+        load_filing(session, _make_parsed_filing(ein="200000012"), "bulk-014")
+
+        stale = _make_parsed_filing(ein="200000012", tax_year=2030)
+        assert load_filings_bulk(session, [(stale, "bulk-014")]) == 0
+
+        assert _latest(session, "200000012") == ("bulk-014", 2022, 5_000_000)
+
+
+class TestKnownObjectIds:
+    def test_returns_only_loaded_ids(self, session):
+        load_filing(session, _make_parsed_filing(ein="300000001"), "known-001")
+        load_filing(session, _make_parsed_filing(ein="300000002"), "known-002")
+
+        known = known_object_ids(session, ["known-001", "known-002", "new-003"])
+
+        assert known == {"known-001", "known-002"}
+
+    def test_queries_in_chunks(self, session, monkeypatch):
+        monkeypatch.setattr("scripts.ingest.loader.KNOWN_IDS_CHUNK_SIZE", 2)
+        for i in range(5):
+            load_filing(
+                session, _make_parsed_filing(ein=f"30000001{i}"), f"chunk-{i}"
+            )
+
+        known = known_object_ids(session, [f"chunk-{i}" for i in range(7)])
+
+        assert known == {f"chunk-{i}" for i in range(5)}
+
+    def test_empty_input(self, session):
+        assert known_object_ids(session, []) == set()
+
+
+def _org(session, ein: str) -> Organization:
+    org = session.execute(
+        select(Organization).where(Organization.ein == ein)
+    ).scalar_one()
+    session.refresh(org)
+    return org
+
+
+class TestOrganizationCache:
+    def test_evicts_least_recently_used(self):
+        cache = OrganizationCache(max_size=2)
+        for ein in ("a", "b"):
+            cache.put(ein, CachedOrg(None, ein, None, None))
+        cache.get("a")
+        cache.put("c", CachedOrg(None, "c", None, None))
+
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+
+    def test_load_filing_reuses_cached_org(self, session):
+        cache = OrganizationCache()
+        load_filing(session, _make_parsed_filing(ein="400000001"), "cache-001", cache)
+        load_filing(session, _make_parsed_filing(ein="400000001"), "cache-002", cache)
+
+        assert (cache.stats.inserts, cache.stats.updates) == (1, 0)
+        assert cache.stats.unchanged == 1
+        assert cache.stats.hits == 1
+        org = _org(session, "400000001")
+        assert cache.get("400000001").id == org.id
+        filings = session.execute(
+            select(Filing).where(Filing.organization_id == org.id)
+        ).scalars().all()
+        assert len(filings) == 2
+
+    def test_load_filing_updates_only_changed_org(self, session):
+        load_filing(
+            session,
+            _make_parsed_filing(ein="400000002", name="Old", city="Boston"),
+            "cache-003",
+        )
+        cache = OrganizationCache()
+
+        load_filing(
+            session,
+            _make_parsed_filing(ein="400000002", name="New", city=None),
+            "cache-004",
+            cache,
+        )
+
+        assert (cache.stats.inserts, cache.stats.updates) == (0, 1)
+        org = _org(session, "400000002")
+        assert (org.name, org.city) == ("New", "Boston")
+
+    def test_bulk_writes_only_new_or_changed_orgs(self, session):
+        load_filing(session, _make_parsed_filing(ein="400000003"), "cache-005")
+        load_filing(
+            session, _make_parsed_filing(ein="400000004", name="Old"), "cache-006"
+        )
+        cache = OrganizationCache()
+        batch = [
+            (_make_parsed_filing(ein="400000003"), "cache-007"),
+            (_make_parsed_filing(ein="400000004", name="Mid"), "cache-008"),
+            (_make_parsed_filing(ein="400000004", name="New"), "cache-009"),
+            (_make_parsed_filing(ein="400000005", name="Fresh"), "cache-010"),
+        ]
+
+        inserted = load_filings_bulk(session, batch, cache)
+
+        assert inserted == 4
+        assert (cache.stats.inserts, cache.stats.updates) == (1, 1)
+        assert cache.stats.unchanged == 1
+        assert _org(session, "400000004").name == "New"
+        fresh = _org(session, "400000005")
+        assert cache.get("400000005").id == fresh.id
+        filing = session.execute(
+            select(Filing).where(Filing.object_id == "cache-010")
+        ).scalar_one()
+        assert filing.organization_id == fresh.id
+
+    def test_bulk_ignores_orgs_of_skipped_filings(self, session):
+        load_filing(
+            session, _make_parsed_filing(ein="400000006", name="Kept"), "cache-011"
+        )
+        cache = OrganizationCache()
+
+        inserted = load_filings_bulk(
+            session,
+            [(_make_parsed_filing(ein="400000006", name="Ignored"), "cache-011")],
+            cache,
+        )
+
+        assert inserted == 0
+        assert _org(session, "400000006").name == "Kept"
+
+    def test_bulk_forgets_orgs_written_elsewhere(self, session):
+        load_filing(
+            session, _make_parsed_filing(ein="400000007", name="Same"), "cache-012"
+        )
+        cache = OrganizationCache()
+        # Stale entry: the database already holds the values being staged
+        cache.put("400000007", CachedOrg(uuid.uuid4(), "Stale", None, None))
+
+        load_filings_bulk(
+            session,
+            [(_make_parsed_filing(ein="400000007", name="Same"), "cache-013")],
+            cache,
+        )
+
+        assert cache.get("400000007") is None
+        assert _org(session, "400000007").name == "Same"
+
+    def test_load_filing_merges_org_inserted_elsewhere(self, session):
+        load_filing(
+            session,
+            _make_parsed_filing(ein="400000008", name="Old", city="Boston"),
+            "cache-014",
+        )
+        cache = OrganizationCache()
+        # Warmed before another worker inserted the org
+        cache.put("400000008", None)
+
+        load_filing(
+            session,
+            _make_parsed_filing(ein="400000008", name="New", city=None),
+            "cache-015",
+            cache,
+        )
+
+        assert (cache.stats.inserts, cache.stats.updates) == (0, 1)
+        org = _org(session, "400000008")
+        assert (org.name, org.city) == ("New", "Boston")
+        assert cache.get("400000008").id == org.id
+
+    def test_load_filing_reuses_current_org_inserted_elsewhere(self, session):
+        load_filing(
+            session, _make_parsed_filing(ein="400000009", name="Same"), "cache-016"
+        )
+        cache = OrganizationCache()
+        cache.put("400000009", None)
+
+        load_filing(
+            session,
+            _make_parsed_filing(ein="400000009", name="Same"),
+            "cache-017",
+            cache,
+        )
+
+        assert (cache.stats.inserts, cache.stats.updates) == (0, 0)
+        assert cache.stats.unchanged == 1
+        assert cache.get("400000009").id == _org(session, "400000009").id
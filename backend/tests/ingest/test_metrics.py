@@ -0,0 +1,94 @@
+"""Tests for ingestion stage metrics."""
+
+import json
+import logging
+
+import pytest
+
+from scripts.ingest import metrics
+from scripts.ingest.metrics import Metrics, Reporter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("scripts.ingest.metrics.time.monotonic", lambda: now[0])
+    return now
+
+
+class TestMetrics:
+    def test_snapshot_covers_only_the_window(self, clock):
+        m = Metrics(window=10)
+        m.record("parse", 5.0)
+        clock[0] += 20
+        for seconds in (0.01, 0.02, 0.03, 0.04):
+            m.record("parse", seconds)
+
+        parse = m.snapshot()["stages"]["parse"]
+
+        assert parse["count"] == 4
+        assert parse["per_sec"] == 0.4
+        assert parse["p50_ms"] == 30.0
+        assert parse["p95_ms"] == 40.0
+
+    def test_report_covers_the_whole_run(self, clock):
+        m = Metrics(window=10)
+        m.record("download", 2.0, nbytes=4 * 1024 * 1024)
+        clock[0] += 20
+        m.record("download", 2.0, nbytes=4 * 1024 * 1024)
+        m.add_rows("filings", 30)
+        m.add_rows("filings", 10)
+
+        report = m.report()
+
+        download = report["stages"]["download"]
+        assert download["count"] == 2
+        assert download["busy_sec"] == 4.0
+        assert download["mb_per_sec"] == 0.4
+        assert download["utilization"] == 0.2
+        assert report["rows"]["filings"] == {"rows": 40, "per_sec": 2.0}
+
+    def test_byte_rate_only_for_stages_moving_bytes(self):
+        m = Metrics()
+        m.record("write", 0.1)
+
+        assert "mb_per_sec" not in m.report()["stages"]["write"]
+
+
+class TestModuleHooks:
+    def test_record_without_installed_metrics_is_noop(self):
+        metrics.install(None)
+        metrics.record("parse", 1.0)
+        metrics.add_rows("filings", 1)
+
+    def test_timed_iter_records_each_item(self):
+        m = Metrics()
+        metrics.install(m)
+        try:
+            items = list(metrics.timed_iter("unzip", [("a", b"12"), ("b", b"345")]))
+        finally:
+            metrics.install(None)
+
+        assert items == [("a", b"12"), ("b", b"345")]
+        unzip = m.report()["stages"]["unzip"]
+        assert unzip["count"] == 2
+
+    def test_timed_call_returns_result_and_duration(self):
+        result, seconds = metrics.timed_call(sum, [1, 2, 3])
+
+        assert result == 6
+        assert seconds >= 0
+
+
+class TestReporter:
+    def test_logs_json_line_with_extra_fields(self, caplog):
+        m = Metrics()
+        m.record("parse", 0.01)
+        reporter = Reporter(m, lambda: {"processed": 7})
+
+        with caplog.at_level(logging.INFO, logger="scripts.ingest.metrics"):
+            reporter.log()
+
+        line = json.loads(caplog.records[-1].getMessage().removeprefix("metrics "))
+        assert line["processed"] == 7
+        assert line["stages"]["parse"]["count"] == 1
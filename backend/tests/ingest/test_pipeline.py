@@ -0,0 +1,486 @@
+"""Tests for the ingestion pipeline orchestration helpers."""
+
+import threading
+import zipfile
+import zlib
+from collections import Counter
+from dataclasses import replace
+from itertools import islice
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from scripts.ingest import checkpoint, dead_letters
+from scripts.ingest.downloader import _xml_entries
+from scripts.ingest.index_downloader import IndexEntry
+from scripts.ingest.pipeline import (
+    BatchEnd,
+    BatchStart,
+    Streamed,
+    Unread,
+    _interleave,
+    _make_parse_executor,
+    _matched,
+    _MemoryGate,
+    _parse_stream,
+    _produce,
+    _replay,
+)
+from scripts.ingest.xml_parser import parse_filing
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+def _entry(object_id: str) -> IndexEntry:
+    return IndexEntry(
+        object_id=object_id,
+        ein="",
+        taxpayer_name="",
+        return_type="990",
+        tax_period="",
+        sub_date="",
+        xml_batch_id="batch",
+    )
+
+
+def _fixture_items() -> list[tuple[IndexEntry, bytes]]:
+    return [
+        (_entry(path.stem), path.read_bytes())
+        for path in sorted(FIXTURES_DIR.glob("*.xml"))
+    ]
+
+
+class TestMatched:
+    def test_yields_only_indexed_members(self):
+        lookup = {"1_public.xml": _entry("1"), "3_public.xml": _entry("3")}
+        xml_iter = iter(
+            [("1_public.xml", b"a"), ("2_public.xml", b"b"), ("3_public.xml", b"c")]
+        )
+
+        result = [(e.object_id, xml) for e, xml in _matched(xml_iter, lookup)]
+
+        assert result == [("1", b"a"), ("3", b"c")]
+
+    def test_limit_stops_reading_members(self):
+        lookup = {f"{i}_public.xml": _entry(str(i)) for i in range(5)}
+        consumed = []
+
+        def xml_iter():
+            for i in range(5):
+                consumed.append(i)
+                yield f"{i}_public.xml", b"x"
+
+        result = list(islice(_matched(xml_iter(), lookup), 2))
+
+        assert len(result) == 2
+        assert consumed == [0, 1]
+
+    def test_streamed_members_are_parsed_before_the_next_is_read(self):
+        entry, xml = _fixture_items()[0]
+        consumed = []
+
+        def chunks():
+            for i in range(0, len(xml), 100):
+                consumed.append(i)
+                yield xml[i : i + 100]
+
+        def xml_iter():
+            yield "1_public.xml", chunks()
+            assert consumed, "member was not read before the next one"
+            yield "2_public.xml", b"<nope"
+
+        lookup = {"1_public.xml": entry, "2_public.xml": _entry("2")}
+        streamed, small = list(_matched(xml_iter(), lookup))
+
+        assert isinstance(streamed, Streamed)
+        assert streamed.result == parse_filing(xml)
+        assert zlib.decompress(streamed.xml.compressed) == xml
+        assert small == (lookup["2_public.xml"], b"<nope")
+
+    def test_streamed_read_error_is_unread(self):
+        def chunks():
+            yield b"<Return>"
+            raise zipfile.BadZipFile("Bad CRC-32")
+
+        lookup = {"1_public.xml": _entry("1")}
+        (unread,) = _matched(iter([("1_public.xml", chunks())]), lookup)
+
+        assert isinstance(unread, Unread)
+        assert isinstance(unread.error, zipfile.BadZipFile)
+
+    def test_unreadable_member_is_unread(self):
+        lookup = {"1_public.xml": _entry("1"), "2_public.xml": _entry("2")}
+        error = zipfile.BadZipFile("Bad CRC-32")
+        xml_iter = iter([("1_public.xml", error), ("2_public.xml", b"b")])
+
+        unread, small = _matched(xml_iter, lookup)
+
+        assert unread == Unread(lookup["1_public.xml"], error)
+        assert small == (lookup["2_public.xml"], b"b")
+
+    def test_members_not_reached_in_unreadable_zip_are_unread(self):
+        lookup = {f"{i}_public.xml": _entry(str(i)) for i in range(3)}
+
+        def xml_iter():
+            yield "0_public.xml", b"a"
+            raise zipfile.BadZipFile("Truncated file header")
+
+        first, *rest = _matched(xml_iter(), lookup)
+
+        assert first == (lookup["0_public.xml"], b"a")
+        assert [item.entry.object_id for item in rest] == ["1", "2"]
+        assert all(isinstance(item.error, zipfile.BadZipFile) for item in rest)
+
+
+class TestParseStream:
+    def test_in_process_matches_parse_filing(self):
+        items = _fixture_items()
+
+        results = list(_parse_stream(items, None, 1))
+
+        assert [e.object_id for e, _, _ in results] == [
+            e.object_id for e, _ in items
+        ]
+        for (_, xml_bytes), (_, parsed, kept) in zip(items, results, strict=True):
+            assert parsed == parse_filing(xml_bytes)
+            assert kept is xml_bytes
+
+    def test_process_pool_preserves_order_and_results(self):
+        items = _fixture_items() * 3
+        executor = _make_parse_executor(2)
+        try:
+            results = list(_parse_stream(items, executor, 2))
+        finally:
+            executor.shutdown()
+
+        assert [e.object_id for e, _, _ in results] == [
+            e.object_id for e, _ in items
+        ]
+        for (_, xml_bytes), (_, parsed, kept) in zip(items, results, strict=True):
+            assert parsed == parse_filing(xml_bytes)
+            assert kept is xml_bytes
+
+    def test_unparseable_xml_yields_none(self):
+        results = list(_parse_stream([(_entry("bad"), b"<nope")], None, 1))
+
+        assert results[0][1] is None
+        # The XML stays with the result for the dead-letter store
+        assert results[0][2] == b"<nope"
+
+    def test_single_worker_uses_no_pool(self):
+        assert _make_parse_executor(1) is None
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_markers_pass_through_in_order(self, workers):
+        start = BatchStart(2024, "batch", set())
+        end = BatchEnd(2024, "batch", 2, checkpoint.COMPLETED)
+        items = [start, *_fixture_items()[:2], end]
+        executor = _make_parse_executor(workers)
+        try:
+            results = list(_parse_stream(items, executor, workers))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        assert results[0] is start
+        assert results[-1] is end
+        assert [e.object_id for e, _, _ in results[1:-1]] == [
+            e.object_id for e, _ in items[1:-1]
+        ]
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_streamed_filings_keep_their_place(self, workers):
+        items = _fixture_items()[:3]
+        streamed = Streamed(_entry("streamed"), None, dead_letters.XmlSpool())
+        executor = _make_parse_executor(workers)
+        try:
+            results = list(
+                _parse_stream([*items[:2], streamed, items[2]], executor, workers)
+            )
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        assert [e.object_id for e, _, _ in results] == [
+            items[0][0].object_id,
+            items[1][0].object_id,
+            "streamed",
+            items[2][0].object_id,
+        ]
+        assert results[2] == (streamed.entry, None, streamed.xml)
+
+
+class TestMemoryGate:
+    def test_waits_while_over_budget_and_busy(self):
+        queued = [1, 2]
+
+        def busy():
+            # The downstream stages drain a filing per poll
+            queued and queued.pop()
+            return bool(queued)
+
+        gate = _MemoryGate(0, busy)
+        with patch("scripts.ingest.pipeline.RSS_POLL_SECONDS", 0.01):
+            gate.wait(threading.Event())
+
+        assert queued == []
+
+    def test_goes_on_when_nothing_is_queued(self):
+        gate = _MemoryGate(0, lambda: False)
+        gate.wait(threading.Event())
+
+    def test_goes_on_under_budget(self):
+        polls = Counter()
+
+        def busy():
+            polls["busy"] += 1
+            return True
+
+        gate = _MemoryGate(1 << 60, busy)
+        gate.wait(threading.Event())
+
+        assert polls["busy"] == 1
+
+    def test_stop_ends_wait(self):
+        stop = threading.Event()
+        stop.set()
+        _MemoryGate(0, lambda: True).wait(stop)
+
+
+def _fake_prefetch(zips: dict[str, list[str] | None]):
+    """prefetch_batches stand-in serving member names per batch."""
+
+    def prefetch(batches, **kwargs):
+        for year, batch_id in batches:
+            names = zips[batch_id]
+            if names is None:
+                yield year, batch_id, None
+            else:
+                yield year, batch_id, iter((name, b"<x/>") for name in names)
+
+    return prefetch
+
+
+def _batches(sizes: dict[str, int]) -> dict[str, list[IndexEntry]]:
+    return {
+        batch_id: [_entry(f"{batch_id}-{i}") for i in range(size)]
+        for batch_id, size in sizes.items()
+    }
+
+
+def _produced(batches, zips, limit=None, stop=None, counts=None):
+    with patch("scripts.ingest.pipeline.prefetch_batches", _fake_prefetch(zips)):
+        return list(
+            _produce(
+                [2024],
+                lambda year: batches,
+                0,
+                None,
+                limit,
+                stop or threading.Event(),
+                counts if counts is not None else Counter(),
+            )
+        )
+
+
+class TestProduce:
+    def test_batches_are_framed_by_markers(self):
+        batches = _batches({"A": 2, "B": 1})
+        zips = {
+            batch_id: [f"{e.object_id}_public.xml" for e in entries] + ["x.xml"]
+            for batch_id, entries in batches.items()
+        }
+
+        items = _produced(batches, zips)
+
+        kinds = [type(item).__name__ for item in items]
+        assert kinds == [
+            "BatchStart", "tuple", "tuple", "BatchEnd",
+            "BatchStart", "tuple", "BatchEnd",
+        ]
+        assert items[3].status == checkpoint.COMPLETED
+
+    def test_limit_ends_batch_as_partial(self):
+        batches = _batches({"A": 3, "B": 3})
+        zips = {
+            batch_id: [f"{e.object_id}_public.xml" for e in entries]
+            for batch_id, entries in batches.items()
+        }
+
+        items = _produced(batches, zips, limit=2)
+
+        assert sum(isinstance(item, tuple) for item in items) == 2
+        assert items[-1] == BatchEnd(2024, "A", 3, checkpoint.PARTIAL)
+
+    def test_corrupt_member_fails_batch(self, tmp_path):
+        batches = _batches({"A": 3})
+        names = [f"{e.object_id}_public.xml" for e in batches["A"]]
+        path = tmp_path / "A.zip"
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as zf:
+            for i, name in enumerate(names):
+                zf.writestr(name, f"<x>{i}</x>")
+        # Flip the first member's stored data so its CRC check fails
+        path.write_bytes(path.read_bytes().replace(b"<x>0</x>", b"<x>9</x>"))
+
+        def prefetch(order, **kwargs):
+            for year, batch_id in order:
+                yield year, batch_id, _xml_entries(str(path), batch_id)
+
+        with patch("scripts.ingest.pipeline.prefetch_batches", prefetch):
+            items = list(
+                _produce(
+                    [2024],
+                    lambda year: batches,
+                    0,
+                    None,
+                    None,
+                    threading.Event(),
+                    Counter(),
+                )
+            )
+
+        unread = items[1]
+        assert isinstance(unread, Unread)
+        assert unread.entry == batches["A"][0]
+        assert isinstance(unread.error, zipfile.BadZipFile)
+        assert items[2:4] == [
+            (batches["A"][1], b"<x>1</x>"),
+            (batches["A"][2], b"<x>2</x>"),
+        ]
+        assert items[-1] == BatchEnd(2024, "A", 3, checkpoint.READ_FAILED)
+
+    def test_failed_download_is_reported(self):
+        items = _produced(_batches({"A": 2}), {"A": None})
+
+        assert items == [BatchEnd(2024, "A", 2, checkpoint.DOWNLOAD_FAILED)]
+
+    def test_stop_ends_current_batch(self):
+        batches = _batches({"A": 3, "B": 3})
+        zips = {
+            batch_id: [f"{e.object_id}_public.xml" for e in entries]
+            for batch_id, entries in batches.items()
+        }
+        stop = threading.Event()
+        counts = Counter()
+        items = []
+        with patch(
+            "scripts.ingest.pipeline.prefetch_batches", _fake_prefetch(zips)
+        ):
+            for item in _produce(
+                [2024], lambda year: batches, 0, None, None, stop, counts
+            ):
+                items.append(item)
+                if isinstance(item, tuple):
+                    stop.set()
+
+        assert sum(isinstance(item, tuple) for item in items) == 1
+        assert items[-1] == BatchEnd(2024, "A", 3, checkpoint.PARTIAL)
+        assert counts["stopped"] == 1
+
+
+
+class TestInterleave:
+    def test_years_loaded_side_by_side(self):
+        plans = {
+            2022: _batches({"A": 1, "B": 1, "C": 1}),
+            2023: _batches({"D": 1}),
+            2024: _batches({"E": 1, "F": 1}),
+        }
+        events = []
+        planned = {}
+
+        def plan(year):
+            events.append(year)
+            return plans[year]
+
+        for key in _interleave(list(plans), plan, 2, planned):
+            events.append(key)
+
+        order = [e for e in events if isinstance(e, tuple)]
+        assert sorted(order) == [
+            (year, batch_id) for year in plans for batch_id in plans[year]
+        ]
+        for year, batches in plans.items():
+            assert [b for y, b in order if y == year] == list(batches)
+        # The third year is only planned once one of the first two is done
+        assert events.index(2024) > min(
+            events.index((2022, "C")), events.index((2023, "D"))
+        )
+        assert planned[(2023, "D")] == plans[2023]["D"]
+
+    def test_one_year_at_a_time(self):
+        plans = {2023: _batches({"A": 1, "B": 1}), 2024: _batches({"C": 1})}
+
+        order = list(_interleave(list(plans), plans.__getitem__, 1, {}))
+
+        assert order == [(2023, "A"), (2023, "B"), (2024, "C")]
+
+    def test_limit_is_exact_across_years(self):
+        plans = {2023: _batches({"A": 3}), 2024: _batches({"B": 3})}
+        zips = {
+            batch_id: [f"{e.object_id}_public.xml" for e in entries]
+            for batches in plans.values()
+            for batch_id, entries in batches.items()
+        }
+        with patch(
+            "scripts.ingest.pipeline.prefetch_batches", _fake_prefetch(zips)
+        ):
+            items = list(
+                _produce(
+                    list(plans),
+                    plans.__getitem__,
+                    0,
+                    None,
+                    4,
+                    threading.Event(),
+                    Counter(),
+                    parallel_years=2,
+                )
+            )
+
+        assert sum(isinstance(item, tuple) for item in items) == 4
+        assert items[-1] == BatchEnd(2024, "B", 3, checkpoint.PARTIAL)
+
+class _DeadLetters:
+    """DeadLetters stand-in serving (year, entry, xml_bytes) rows."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def pending(self):
+        return iter(self.rows)
+
+
+def _dead_letter(year: int, batch_id: str, object_id: str):
+    return year, replace(_entry(object_id), xml_batch_id=batch_id), b"<x/>"
+
+
+class TestReplay:
+    def test_dead_letters_are_framed_by_batch(self):
+        dead = _DeadLetters(
+            [
+                _dead_letter(2023, "A", "1"),
+                _dead_letter(2023, "A", "2"),
+                _dead_letter(2024, "A", "3"),
+            ]
+        )
+
+        items = list(_replay(dead, None, threading.Event(), Counter()))
+
+        kinds = [type(item).__name__ for item in items]
+        assert kinds == [
+            "BatchStart", "tuple", "tuple", "BatchEnd",
+            "BatchStart", "tuple", "BatchEnd",
+        ]
+        # Replayed batches are not checkpointed
+        assert items[3] == BatchEnd(2023, "A", 2, None)
+        assert items[-1] == BatchEnd(2024, "A", 1, None)
+
+    def test_limit(self):
+        dead = _DeadLetters([_dead_letter(2024, "A", str(i)) for i in range(3)])
+
+        items = list(_replay(dead, 2, threading.Event(), Counter()))
+
+        assert sum(isinstance(item, tuple) for item in items) == 2
+        assert items[-1] == BatchEnd(2024, "A", 2, None)
@@ -0,0 +1,243 @@
+"""Tests for reading ZIP members over HTTP Range requests."""
+
+import io
+import re
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from scripts.ingest.cache import HttpCache
+from scripts.ingest.downloader import open_zip_batch
+from scripts.ingest.remote_zip import RemoteZip, RemoteZipError, read_fetched
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+def _fixture_members() -> dict[str, bytes]:
+    members = {}
+    for i in range(3):
+        for path in sorted(FIXTURES_DIR.glob("*.xml")):
+            members[f"{i}{path.stem}_public.xml"] = path.read_bytes()
+    return members
+
+
+def _zip_bytes(members: dict[str, bytes], compression: int) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+
+def _zip64_bytes(members: dict[str, bytes]) -> bytes:
+    """A ZIP whose offsets and end record use the ZIP64 extensions."""
+    with patch.object(zipfile, "ZIP64_LIMIT", 16), patch.object(
+        zipfile, "ZIP_FILECOUNT_LIMIT", 1
+    ):
+        return _zip_bytes(members, zipfile.ZIP_DEFLATED)
+
+
+MEMBERS = _fixture_members()
+ARCHIVES = {
+    "deflated": _zip_bytes(MEMBERS, zipfile.ZIP_DEFLATED),
+    "stored": _zip_bytes(MEMBERS, zipfile.ZIP_STORED),
+    "zip64": _zip64_bytes(MEMBERS),
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    requests_seen: list[str | None] = []
+
+    def log_message(self, *args):
+        pass
+
+    def _archive(self) -> bytes | None:
+        return ARCHIVES.get(self.path.rsplit("/", 1)[-1].removesuffix(".zip"))
+
+    def do_HEAD(self):
+        body = self._archive()
+        self.send_response(200 if body is not None else 404)
+        self.send_header("Content-Length", str(len(body or b"")))
+        self.end_headers()
+
+    def do_GET(self):
+        body = self._archive()
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        spec = self.headers.get("Range")
+        self.requests_seen.append(spec)
+        if spec is None or "norange" in self.path:
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        start, end = re.fullmatch(r"bytes=(\d*)-(\d*)", spec).groups()
+        if not start:
+            start, end = max(0, len(body) - int(end)), len(body) - 1
+        else:
+            start, end = int(start), min(int(end), len(body) - 1)
+        part = body[start : end + 1]
+        self.send_response(206)
+        self.send_header("Content-Range", f"bytes {start}-{end}/{len(body)}")
+        self.send_header("Content-Length", str(len(part)))
+        self.end_headers()
+        self.wfile.write(part)
+
+
+@pytest.fixture(scope="module")
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def _clear_requests():
+    _Handler.requests_seen.clear()
+
+
+def _read(remote: RemoteZip, names, tmp_path) -> dict[str, bytes]:
+    path = tmp_path / "members"
+    with open(path, "wb") as f:
+        fetched = remote.fetch(remote.plan(names), f)
+    return dict(read_fetched(str(path), fetched, "batch"))
+
+
+class TestRemoteZip:
+    @pytest.mark.parametrize("archive", sorted(ARCHIVES))
+    def test_lists_members(self, server_url, archive):
+        remote = RemoteZip(f"{server_url}/{archive}.zip")
+
+        members = remote.members()
+
+        assert set(members) == set(MEMBERS)
+        assert all(m.size == len(MEMBERS[n]) for n, m in members.items())
+
+    @pytest.mark.parametrize("archive", sorted(ARCHIVES))
+    def test_fetches_only_wanted_members(self, server_url, archive, tmp_path):
+        remote = RemoteZip(f"{server_url}/{archive}.zip")
+        wanted = sorted(MEMBERS)[::3] + ["missing_public.xml"]
+
+        result = _read(remote, wanted, tmp_path)
+
+        assert result == {n: MEMBERS[n] for n in wanted if n in MEMBERS}
+
+    def test_coalesces_adjacent_members(self, server_url, tmp_path):
+        remote = RemoteZip(f"{server_url}/deflated.zip")
+        remote.members()
+        _Handler.requests_seen.clear()
+
+        _read(remote, list(MEMBERS), tmp_path)
+
+        assert len(_Handler.requests_seen) == 1
+
+    def test_splits_distant_members(self, server_url, tmp_path):
+        remote = RemoteZip(f"{server_url}/deflated.zip")
+        members = remote.members()
+        names = sorted(members, key=lambda n: members[n].header_offset)
+        _Handler.requests_seen.clear()
+
+        with patch("scripts.ingest.remote_zip.RANGE_COALESCE_GAP_BYTES", 0):
+            result = _read(remote, [names[0], names[-1]], tmp_path)
+
+        assert set(result) == {names[0], names[-1]}
+        assert len(_Handler.requests_seen) == 2
+
+    def test_server_without_range_support(self, server_url):
+        remote = RemoteZip(f"{server_url}/norange/deflated.zip")
+
+        with pytest.raises(RemoteZipError):
+            remote.members()
+
+    def test_crc_mismatch_is_yielded_as_error(self, server_url, tmp_path):
+        remote = RemoteZip(f"{server_url}/deflated.zip")
+        first, second = sorted(MEMBERS)[:2]
+        path = tmp_path / "members"
+        with open(path, "wb") as f:
+            fetched = remote.fetch(remote.plan([first, second]), f)
+        next(item for item in fetched if item.member.name == first).member.crc32 ^= 1
+
+        result = dict(read_fetched(str(path), fetched, "batch"))
+
+        assert isinstance(result[first], RemoteZipError)
+        assert result[second] == MEMBERS[second]
+
+    @pytest.mark.parametrize("archive", ["deflated", "stored"])
+    def test_members_over_budget_are_streamed(self, server_url, archive, tmp_path):
+        remote = RemoteZip(f"{server_url}/{archive}.zip")
+        path = tmp_path / "members"
+        with open(path, "wb") as f:
+            fetched = remote.fetch(remote.plan(list(MEMBERS)), f)
+
+        result = {
+            name: b"".join(chunks)
+            for name, chunks in read_fetched(str(path), fetched, "batch", budget=0)
+        }
+
+        assert result == MEMBERS
+
+    def test_crc_mismatch_of_streamed_member_raises(self, server_url, tmp_path):
+        remote = RemoteZip(f"{server_url}/deflated.zip")
+        name = next(iter(MEMBERS))
+        path = tmp_path / "members"
+        with open(path, "wb") as f:
+            fetched = remote.fetch(remote.plan([name]), f)
+        fetched[0].member.crc32 ^= 1
+
+        members = read_fetched(str(path), fetched, "batch", budget=0)
+        _, chunks = next(members)
+        with pytest.raises(RemoteZipError):
+            b"".join(chunks)
+
+
+class TestOpenZipBatchByRange:
+    @pytest.fixture(autouse=True)
+    def _serve_batches(self, server_url, monkeypatch):
+        monkeypatch.setattr(
+            "scripts.ingest.downloader.IRS_ZIP_TEMPLATE",
+            server_url + "/{batch_id}.zip",
+        )
+
+    def test_oversized_zip_is_read_by_range(self, monkeypatch):
+        monkeypatch.setattr("scripts.ingest.downloader.RANGE_FETCH_ALWAYS_BYTES", 1024)
+        wanted = sorted(MEMBERS)[:2]
+
+        with open_zip_batch(2024, "deflated", members=wanted) as xml_iter:
+            result = dict(xml_iter)
+
+        assert result == {n: MEMBERS[n] for n in wanted}
+
+    def test_mostly_wanted_zip_is_downloaded_whole(self):
+        with open_zip_batch(2024, "deflated", members=list(MEMBERS)) as xml_iter:
+            result = dict(xml_iter)
+
+        assert result == MEMBERS
+        assert None in _Handler.requests_seen
+
+    def test_members_read_by_range_are_served_offline(self, monkeypatch, tmp_path):
+        monkeypatch.setattr("scripts.ingest.downloader.RANGE_FETCH_ALWAYS_BYTES", 1024)
+        wanted = sorted(MEMBERS)[:2]
+        with open_zip_batch(2024, "deflated", HttpCache(tmp_path), wanted) as xml_iter:
+            dict(xml_iter)
+        _Handler.requests_seen.clear()
+        offline = HttpCache(tmp_path, offline=True)
+
+        with open_zip_batch(2024, "deflated", offline, wanted[1:]) as xml_iter:
+            result = dict(xml_iter)
+        with open_zip_batch(2024, "deflated", offline, sorted(MEMBERS)[:3]) as missing:
+            pass
+
+        assert result == {wanted[1]: MEMBERS[wanted[1]]}
+        assert missing is None
+        assert _Handler.requests_seen == []
+        assert not list(tmp_path.glob("*.members"))
@@ -0,0 +1,135 @@
+"""Tests for the queues and threads connecting pipeline stages."""
+
+import itertools
+import queue
+import threading
+
+import pytest
+
+from scripts.ingest.stages import DONE, Stage, drain, join_all, put
+
+
+class TestQueues:
+    def test_drain_stops_at_done(self):
+        q = queue.Queue()
+        for item in (1, 2, DONE, 3):
+            q.put(item)
+
+        assert list(drain(q, threading.Event())) == [1, 2]
+
+    def test_put_gives_up_when_aborted(self):
+        q = queue.Queue(maxsize=1)
+        q.put("full")
+        abort = threading.Event()
+        abort.set()
+
+        assert put(q, "more", abort) is False
+
+
+class TestStage:
+    def test_forwards_items_then_done(self):
+        out = queue.Queue()
+        stage = Stage("test", iter([1, 2, 3]), out, threading.Event())
+
+        stage.start()
+        stage.join()
+
+        assert list(drain(out, threading.Event())) == [1, 2, 3]
+        assert stage.error is None
+
+    def test_full_queue_blocks_producer(self):
+        out = queue.Queue(maxsize=2)
+        produced = []
+
+        def items():
+            for i in range(10):
+                produced.append(i)
+                yield i
+
+        abort = threading.Event()
+        stage = Stage("test", items(), out, abort)
+        stage.start()
+        stage.join(timeout=0.5)
+
+        assert stage.is_alive()
+        assert len(produced) <= 3
+        assert list(drain(out, abort)) == list(range(10))
+        stage.join()
+
+    def test_error_is_kept_and_stream_ended(self):
+        def items():
+            yield 1
+            raise ValueError("boom")
+
+        out = queue.Queue()
+        stage = Stage("test", items(), out, threading.Event())
+
+        stage.start()
+        stage.join()
+
+        assert list(drain(out, threading.Event())) == [1]
+        with pytest.raises(ValueError):
+            raise stage.error
+
+    def test_abort_closes_items(self):
+        closed = threading.Event()
+
+        def items():
+            try:
+                while True:
+                    yield 1
+            finally:
+                closed.set()
+
+        abort = threading.Event()
+        stage = Stage("test", items(), queue.Queue(maxsize=1), abort)
+        stage.start()
+        abort.set()
+        stage.join(timeout=5)
+
+        assert not stage.is_alive()
+        assert closed.is_set()
+
+
+class TestJoinAll:
+    def test_failed_stage_aborts_stages_upstream(self):
+        def parse(items):
+            for n, item in enumerate(items):
+                if n == 2:
+                    raise ValueError("boom")
+                yield item
+
+        abort = threading.Event()
+        unzipped = queue.Queue(maxsize=1)
+        parsed = queue.Queue()
+        source = Stage("source", itertools.count(), unzipped, abort)
+        stages = [source, Stage("parse", parse(drain(unzipped, abort)), parsed, abort)]
+        for stage in stages:
+            stage.start()
+
+        assert list(drain(parsed, threading.Event())) == [0, 1]
+        # The source is blocked on its full queue until aborted
+        with pytest.raises(ValueError):
+            join_all(stages, abort)
+        assert abort.is_set()
+        assert not source.is_alive()
+
+    def test_failed_source_lets_the_rest_finish(self):
+        def items():
+            yield from range(3)
+            raise ValueError("boom")
+
+        abort = threading.Event()
+        unzipped = queue.Queue(maxsize=1)
+        parsed = queue.Queue()
+        stages = [
+            Stage("source", items(), unzipped, abort),
+            Stage("parse", drain(unzipped, abort), parsed, abort),
+        ]
+        for stage in stages:
+            stage.start()
+
+        with pytest.raises(ValueError):
+            join_all(stages, abort)
+        assert not abort.is_set()
+        assert list(drain(parsed, abort)) == [0, 1, 2]
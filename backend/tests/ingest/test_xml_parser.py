@@ -2,7 +2,15 @@
 
 from pathlib import Path
 
-from scripts.ingest.xml_parser import parse_filing
+import pytest
+
+from scripts.ingest.xml_parser import (
+    ParsedFiling,
+    ParsedGrant,
+    feed_filing,
+    iterparse_filing,
+    parse_filing,
+)
 
 FIXTURES_DIR = Path(__file__).parent / "fixtures"
 
@@ -11,6 +19,12 @@ def _read_fixture(filename: str) -> bytes:
     return (FIXTURES_DIR / filename).read_bytes()
 
 
+def _with_prolog_nodes(xml: bytes) -> bytes:
+    """``xml`` with a comment and a PI between declaration and root."""
+    declaration, rest = xml.split(b"?>", 1)
+    return declaration + b"?>\n<!-- prepared by -->\n<?software v1?>" + rest
+
+
 # --- 990 Tests ---
 
 
@@ -305,6 +319,115 @@ class TestForm990PF_MissingFields:
         assert self.result.grants == []
 
 
+# --- Namespaces ---
+
+
+class TestNamespaces:
+    def setup_method(self):
+        self.xml = _read_fixture("form_990_2014plus.xml")
+        self.expected = parse_filing(self.xml)
+
+    def test_document_without_namespace(self):
+        xml = self.xml.replace(b' xmlns="http://www.irs.gov/efile"', b"")
+        assert parse_filing(xml) == self.expected
+
+    def test_prefixed_namespace(self):
+        xml = (
+            self.xml.replace(b"<", b"<efile:")
+            .replace(b"<efile:/", b"</efile:")
+            .replace(b"<efile:?xml", b"<?xml")
+            .replace(b'xmlns="', b'xmlns:efile="')
+        )
+        assert parse_filing(xml) == self.expected
+
+    def test_other_default_namespace(self):
+        xml = self.xml.replace(
+            b"http://www.irs.gov/efile", b"urn:example:efile"
+        )
+        assert parse_filing(xml) == self.expected
+
+
+# --- Streaming parser ---
+
+
+class TestStreamingParser:
+    @pytest.mark.parametrize(
+        "filename", sorted(p.name for p in FIXTURES_DIR.glob("*.xml"))
+    )
+    def test_matches_tree_parser(self, filename):
+        xml = _read_fixture(filename)
+        assert parse_filing(xml, streaming_threshold=0) == parse_filing(xml)
+
+    def test_yields_grants_then_filing(self):
+        with open(FIXTURES_DIR / "form_990pf_2014plus.xml", "rb") as f:
+            records = list(iterparse_filing(f))
+
+        assert [type(r) for r in records] == [ParsedGrant, ParsedGrant, ParsedFiling]
+        assert records[0].recipient_name == "Local School District"
+        assert records[-1].grants == []
+
+    def test_many_grants(self):
+        xml = _read_fixture("form_990pf_2014plus.xml").decode()
+        start = xml.index("<GrantOrContributionPdDurYrGrp>")
+        end = xml.index("</SupplementaryInformationGrp>")
+        big = (xml[:start] + xml[start:end] * 500 + xml[end:]).encode()
+
+        result = parse_filing(big, streaming_threshold=0)
+
+        assert len(result.grants) == 1000
+        assert result.total_revenue == 10_000_000
+
+    @pytest.mark.parametrize(
+        "filename", sorted(p.name for p in FIXTURES_DIR.glob("*.xml"))
+    )
+    def test_nodes_before_root(self, filename):
+        xml = _with_prolog_nodes(_read_fixture(filename))
+
+        assert parse_filing(xml, streaming_threshold=0) == parse_filing(xml)
+        assert parse_filing(xml) == parse_filing(_read_fixture(filename))
+
+    def test_malformed_xml_returns_none(self):
+        assert parse_filing(b"<Return><unclosed>", streaming_threshold=0) is None
+
+    def test_missing_ein_returns_none(self):
+        xml = _read_fixture("form_990_2014plus.xml").replace(
+            b"<EIN>123456789</EIN>", b""
+        )
+        assert parse_filing(xml, streaming_threshold=0) is None
+
+
+class TestFeedParser:
+    @pytest.mark.parametrize(
+        "filename", sorted(p.name for p in FIXTURES_DIR.glob("*.xml"))
+    )
+    def test_matches_tree_parser(self, filename):
+        xml = _read_fixture(filename)
+        chunks = (xml[i : i + 100] for i in range(0, len(xml), 100))
+
+        assert feed_filing(chunks) == parse_filing(xml)
+
+    @pytest.mark.parametrize(
+        "filename", sorted(p.name for p in FIXTURES_DIR.glob("*.xml"))
+    )
+    def test_nodes_before_root(self, filename):
+        xml = _with_prolog_nodes(_read_fixture(filename))
+        chunks = (xml[i : i + 100] for i in range(0, len(xml), 100))
+
+        assert feed_filing(chunks) == parse_filing(_read_fixture(filename))
+
+    def test_truncated_xml_returns_none(self):
+        xml = _read_fixture("form_990_2014plus.xml")
+        assert feed_filing([xml[: len(xml) // 2]]) is None
+
+    def test_read_errors_propagate(self):
+        def chunks():
+            yield b"<Return>"
+            raise OSError("member unreadable")
+
+        with pytest.raises(OSError):
+            feed_filing(chunks())
+
+
 # --- Edge Cases ---
 
 
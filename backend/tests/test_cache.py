@@ -0,0 +1,160 @@
+"""Tests for the search result cache, against a fake Redis."""
+
+import pytest
+import redis
+from pydantic import TypeAdapter
+
+from app.core import cache as cache_module
+from app.core.cache import GENERATION_KEY, ResultCache, bump_generation
+
+INT = TypeAdapter(int)
+
+
+class FakeRedis:
+    """The redis.asyncio commands the cache uses, kept in a dict."""
+
+    def __init__(self):
+        self.data: dict[str, bytes] = {}
+        self.down = False
+
+    def _check(self):
+        if self.down:
+            raise redis.ConnectionError("connection refused")
+
+    async def mget(self, *keys):
+        self._check()
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key, value, ex=None):
+        self._check()
+        self.data[key] = value
+
+    async def incr(self, key):
+        self._check()
+        value = int(self.data.get(key, b"0")) + 1
+        self.data[key] = str(value).encode()
+        return value
+
+    async def aclose(self):
+        pass
+
+
+class Computed:
+    """A compute callback that counts its calls."""
+
+    def __init__(self, value=1):
+        self.value = value
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+@pytest.fixture
+def fake():
+    return FakeRedis()
+
+
+@pytest.mark.asyncio
+async def test_hit_after_miss(fake):
+    cache = ResultCache(fake)
+    compute = Computed(42)
+
+    assert await cache.cached("search", "k", 60, INT, compute) == 42
+    assert await cache.cached("search", "k", 60, INT, compute) == 42
+
+    assert compute.calls == 1
+    assert cache.stats == {"search_hits": 1, "search_misses": 1}
+    assert cache.backend == "redis"
+
+
+@pytest.mark.asyncio
+async def test_zero_ttl_is_not_cached(fake):
+    cache = ResultCache(fake)
+    compute = Computed()
+
+    await cache.cached("search", "k", 0, INT, compute)
+    await cache.cached("search", "k", 0, INT, compute)
+
+    assert compute.calls == 2
+    assert fake.data == {}
+
+
+@pytest.mark.asyncio
+async def test_new_generation_misses(fake):
+    cache = ResultCache(fake)
+    compute = Computed()
+    await cache.cached("search", "k", 60, INT, compute)
+
+    await cache.invalidate()
+    await cache.cached("search", "k", 60, INT, compute)
+
+    assert compute.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_result_computed_across_invalidation_not_served(fake):
+    cache = ResultCache(fake)
+
+    async def racing():
+        # Ingestion lands new filings while the search runs
+        await fake.incr(GENERATION_KEY)
+        return 1
+
+    await cache.cached("search", "k", 60, INT, racing)
+    compute = Computed()
+    await cache.cached("search", "k", 60, INT, compute)
+
+    assert compute.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_local_lru(fake):
+    fake.down = True
+    cache = ResultCache(fake, local_size=2)
+    compute = Computed()
+
+    for key in ("a", "b", "a", "c", "a", "b"):
+        await cache.cached("search", key, 60, INT, compute)
+
+    # "b" was the least recently used when "c" came in
+    assert compute.calls == 4
+    assert cache.stats["redis_errors"] == 1
+    assert cache.backend == "local"
+
+
+@pytest.mark.asyncio
+async def test_retries_redis_after_a_while(fake, monkeypatch):
+    fake.down = True
+    cache = ResultCache(fake)
+    await cache.cached("search", "k", 60, INT, Computed())
+    fake.down = False
+
+    monkeypatch.setattr(cache_module, "REDIS_RETRY_SECONDS", 0)
+    cache._redis_down(redis.ConnectionError("once more"))
+    await cache.cached("search", "k", 60, INT, Computed())
+
+    assert cache.backend == "redis"
+    assert any(key != GENERATION_KEY for key in fake.data)
+
+
+def test_bump_generation(monkeypatch):
+    class SyncFake:
+        value = 0
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            pass
+
+        def incr(self, key):
+            assert key == GENERATION_KEY
+            self.value += 1
+            return self.value
+
+    monkeypatch.setattr(redis.Redis, "from_url", lambda url, **kw: SyncFake())
+
+    assert bump_generation("redis://cache") == 1
+    assert bump_generation("") is None
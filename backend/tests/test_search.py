@@ -1,6 +1,8 @@
 import pytest
 from httpx import ASGITransport, AsyncClient
 
+from app.core.cache import cache
+from app.core.config import settings
 from app.main import app
 from tests.factories import create_test_filing, create_test_org, create_test_user
 
@@ -31,6 +33,12 @@ async def auth_client(db, test_engine):
     app.dependency_overrides.clear()
 
 
+@pytest.fixture(autouse=True)
+async def clear_cache():
+    # Each test rolls its rows back, so cached results would go stale
+    await cache.invalidate()
+
+
 @pytest.fixture
 async def unauth_client(db, test_engine):
     """Create an unauthenticated test client."""
@@ -143,6 +151,198 @@ class TestSearchEndpoint:
         assert data["total"] >= 5
         assert data["page"] == 1
 
+    @pytest.mark.asyncio
+    async def test_search_cursor_pagination(self, auth_client, db):
+        for i in range(5):
+            org = await create_test_org(
+                db, name=f"Cursor Paged Org {i}", ein=f"45454545{i}"
+            )
+            await create_test_filing(db, org)
+        await db.flush()
+
+        params = {"q": "Cursor Paged Org", "page_size": 2}
+        first = (await auth_client.get("/api/v1/search", params=params)).json()
+        offset = (
+            await auth_client.get("/api/v1/search", params={**params, "page": 2})
+        ).json()
+        second = (
+            await auth_client.get(
+                "/api/v1/search",
+                params={**params, "cursor": first["next_cursor"]},
+            )
+        ).json()
+
+        assert first["next_cursor"]
+        assert [i["id"] for i in second["items"]] == [
+            i["id"] for i in offset["items"]
+        ]
+        assert second["total"] == first["total"]
+
+    @pytest.mark.asyncio
+    async def test_search_cursor_walks_every_row(self, auth_client, db):
+        for i in range(5):
+            org = await create_test_org(
+                db, name="Same Name Cursor Org", ein=f"46464646{i}", state="WY"
+            )
+            await create_test_filing(db, org)
+        await db.flush()
+
+        seen, cursor = [], None
+        while True:
+            params = {"state": "WY", "page_size": 2, "cursor": cursor}
+            response = await auth_client.get(
+                "/api/v1/search", params={k: v for k, v in params.items() if v}
+            )
+            data = response.json()
+            seen += [item["id"] for item in data["items"]]
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+
+        assert len(seen) == len(set(seen)) == data["total"]
+
+    @pytest.mark.asyncio
+    async def test_search_invalid_cursor(self, auth_client):
+        response = await auth_client.get(
+            "/api/v1/search", params={"q": "anything", "cursor": "not-a-cursor"}
+        )
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_search_total_capped(self, auth_client, db, monkeypatch):
+        monkeypatch.setattr(settings, "SEARCH_COUNT_CAP", 3)
+        for i in range(5):
+            org = await create_test_org(db, name=f"Capped Org {i}", ein=f"47474747{i}")
+            await create_test_filing(db, org)
+        await db.flush()
+
+        params = {"q": "Capped Org", "page_size": 2}
+        capped = (await auth_client.get("/api/v1/search", params=params)).json()
+        exact = (
+            await auth_client.get(
+                "/api/v1/search", params={**params, "count": "exact"}
+            )
+        ).json()
+
+        assert (capped["total"], capped["total_is_exact"]) == (3, False)
+        assert exact["total_is_exact"] is True
+        assert exact["total"] >= 5
+
+    @pytest.mark.asyncio
+    async def test_search_total_estimated(self, auth_client, db, monkeypatch):
+        monkeypatch.setattr(settings, "SEARCH_COUNT_CAP", 1)
+        for i in range(3):
+            org = await create_test_org(
+                db, name=f"Estimated Org {i}", ein=f"48484848{i}"
+            )
+            await create_test_filing(db, org)
+        await db.flush()
+
+        response = await auth_client.get(
+            "/api/v1/search",
+            params={"q": "Estimated Org", "page_size": 2, "count": "estimate"},
+        )
+
+        # The planner expects at least one row, so nothing is counted
+        data = response.json()
+        assert (data["total"], data["total_is_exact"]) == (1, False)
+
+    @pytest.mark.asyncio
+    async def test_search_total_from_last_page(self, auth_client, db):
+        for i in range(3):
+            org = await create_test_org(
+                db, name=f"Last Page Org {i}", ein=f"49494949{i}"
+            )
+            await create_test_filing(db, org)
+        await db.flush()
+
+        response = await auth_client.get(
+            "/api/v1/search", params={"q": "Last Page Org", "page_size": 20}
+        )
+
+        data = response.json()
+        assert data["total"] == len(data["items"])
+        assert data["total_is_exact"] is True
+
+    @pytest.mark.asyncio
+    async def test_search_total_cached(self, auth_client, db):
+        for i in range(3):
+            org = await create_test_org(db, name=f"Cached Org {i}", ein=f"50505050{i}")
+            await create_test_filing(db, org)
+        await db.flush()
+        params = {"q": "Cached Org", "page_size": 1}
+        first = (await auth_client.get("/api/v1/search", params=params)).json()
+
+        org = await create_test_org(db, name="Cached Org 3", ein="505050503")
+        await create_test_filing(db, org)
+        await db.flush()
+        again = (
+            await auth_client.get(
+                "/api/v1/search", params={**params, "q": " cached  ORG", "page": 2}
+            )
+        ).json()
+
+        assert again["total"] == first["total"]
+
+    @pytest.mark.asyncio
+    async def test_search_results_cached(self, auth_client, db):
+        org = await create_test_org(db, name="Cached Result Org", ein="515151510")
+        await create_test_filing(db, org)
+        await db.flush()
+        first = (
+            await auth_client.get("/api/v1/search", params={"q": "Cached Result"})
+        ).json()
+
+        org = await create_test_org(db, name="Cached Result Org Two", ein="515151511")
+        await create_test_filing(db, org)
+        await db.flush()
+        again = (
+            await auth_client.get("/api/v1/search", params={"q": "cached  RESULT"})
+        ).json()
+        await cache.invalidate()
+        fresh = (
+            await auth_client.get("/api/v1/search", params={"q": "Cached Result"})
+        ).json()
+
+        assert again == first
+        assert fresh["total"] == first["total"] + 1
+
+    @pytest.mark.asyncio
+    async def test_search_blank_query_is_no_query(self, auth_client, db):
+        org = await create_test_org(db, name="Blank Query Org", ein="525252520")
+        await create_test_filing(db, org)
+        await db.flush()
+
+        blank = (await auth_client.get("/api/v1/search", params={"q": "  "})).json()
+        empty = (await auth_client.get("/api/v1/search", params={"q": ""})).json()
+
+        assert blank["total"] >= 1
+        assert empty == blank
+
+    @pytest.mark.asyncio
+    async def test_search_filters_on_latest_filing(self, auth_client, db):
+        org = await create_test_org(db, name="Latest Filing Org", ein="777777777")
+        await create_test_filing(db, org, tax_year=2021, total_revenue=9_000_000)
+        await create_test_filing(db, org, tax_year=2023, total_revenue=2_000_000)
+        await db.flush()
+
+        response = await auth_client.get(
+            "/api/v1/search",
+            params={"q": "Latest Filing Org", "min_revenue": 5_000_000},
+        )
+        assert response.status_code == 200
+        assert response.json()["total"] == 0
+
+        response = await auth_client.get(
+            "/api/v1/search",
+            params={"q": "Latest Filing Org", "filing_year": 2023},
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 1
+        assert data["items"][0]["latest_revenue"] == 2_000_000
+        assert data["items"][0]["latest_tax_year"] == 2023
+
     @pytest.mark.asyncio
     async def test_search_empty_query(self, auth_client, db):
         response = await auth_client.get("/api/v1/search")
@@ -0,0 +1,149 @@
+"""Tests for the in-process typeahead index."""
+
+import uuid
+from datetime import UTC, datetime, timedelta
+from typing import NamedTuple
+
+import pytest
+
+from app.services import typeahead_index
+from app.services.typeahead_index import (
+    IndexBudgetError,
+    TypeaheadIndex,
+    TypeaheadRow,
+    trigrams,
+)
+
+T0 = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+class Row(NamedTuple):
+    id: uuid.UUID
+    ein: str
+    name: str
+    city: str | None
+    state: str | None
+    updated_at: datetime
+
+
+def _row(name: str, ein: str = "000000000", updated_at: datetime = T0) -> Row:
+    return Row(uuid.uuid4(), ein, name, "Columbus", "OH", updated_at)
+
+
+def _index(*names: str) -> TypeaheadIndex:
+    index = TypeaheadIndex(max_bytes=2**30)
+    index.add_rows(_row(name, f"{i:09d}") for i, name in enumerate(names))
+    index.seal()
+    return index
+
+
+def _names(index: TypeaheadIndex, q: str, limit: int = 10) -> list[str]:
+    return [row.name for row in index.search(q, limit)]
+
+
+def test_trigrams_like_pg_trgm():
+    assert trigrams("Cat") == {"  c", " ca", "cat", "at "}
+    assert trigrams("a-b") == {"  a", " a ", "  b", " b "}
+    assert trigrams("!!") == set()
+
+
+def test_prefix_matches_in_name_order():
+    index = _index("Red Cross Ohio", "Redwood Trust", "red cross america", "Bred")
+
+    assert _names(index, "red", limit=3) == [
+        "red cross america",
+        "Red Cross Ohio",
+        "Redwood Trust",
+    ]
+
+
+def test_prefix_matches_before_similar():
+    index = _index("Ohio Food Bank", "Food Bank of Ohio", "Foodies")
+
+    names = _names(index, "food bank")
+
+    assert names == ["Food Bank of Ohio", "Ohio Food Bank"]
+
+
+def test_similar_names_by_similarity():
+    index = _index("American Red Cross", "Red Cross", "Blue Shield")
+
+    assert _names(index, "cross red") == ["Red Cross", "American Red Cross"]
+
+
+def test_similarity_threshold():
+    index = _index("Habitat for Humanity")
+
+    # Only "hab" is shared: 1 / (5 + 20 - 1) is under the threshold
+    assert _names(index, "xhab") == []
+    assert _names(index, "habitat humanity") == ["Habitat for Humanity"]
+
+
+def test_row_fields():
+    row = _row("Columbus Museum", ein="123456789")
+    index = TypeaheadIndex(max_bytes=2**30)
+    index.add_rows([row])
+    index.seal()
+
+    assert index.search("col") == [
+        TypeaheadRow(row.id, "123456789", "Columbus Museum", "Columbus", "OH")
+    ]
+
+
+def test_update_adds_and_replaces():
+    renamed = _row("Old Name Society")
+    index = TypeaheadIndex(max_bytes=2**30)
+    index.add_rows([renamed, _row("Oldtown Library")])
+    index.seal()
+    later = T0 + timedelta(hours=1)
+
+    changed = index.update(
+        [
+            renamed._replace(name="New Name Society", updated_at=later),
+            _row("Old Mill Museum", updated_at=later),
+        ]
+    )
+
+    assert changed == 2
+    assert len(index) == 3
+    assert index.watermark == later
+    assert _names(index, "old") == ["Old Mill Museum", "Oldtown Library"]
+    assert _names(index, "new") == ["New Name Society"]
+
+
+def test_update_skips_unchanged():
+    row = _row("Trinity Church")
+    index = TypeaheadIndex(max_bytes=2**30)
+    index.add_rows([row])
+    index.seal()
+
+    assert index.update([row._replace(updated_at=T0 + timedelta(days=1))]) == 0
+    assert len(index) == 1
+    assert index.watermark == T0 + timedelta(days=1)
+
+
+def test_needs_rebuild_once_mostly_replaced():
+    rows = [_row(f"Org {i}") for i in range(10)]
+    index = TypeaheadIndex(max_bytes=2**30)
+    index.add_rows(rows)
+    index.seal()
+    assert not index.needs_rebuild
+
+    index.update([rows[0]._replace(name="Renamed 0"), rows[1]._replace(name="R 1")])
+
+    assert index.needs_rebuild
+
+
+def test_over_budget():
+    index = TypeaheadIndex(max_bytes=1024)
+
+    with pytest.raises(IndexBudgetError):
+        index.add_rows(_row(f"Organization {i}") for i in range(100))
+
+
+def test_search_without_index(monkeypatch):
+    monkeypatch.setattr(typeahead_index, "index", None)
+    assert typeahead_index.search("red", 10) is None
+
+    monkeypatch.setattr(typeahead_index, "index", _index("Red Cross"))
+    assert [row.name for row in typeahead_index.search("red", 10)] == ["Red Cross"]
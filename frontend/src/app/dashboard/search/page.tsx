@@ -76,7 +76,10 @@ export default function SearchPage() {
       {!loading && results && results.items.length > 0 && (
         <>
           <div className="text-sm text-muted-foreground">
-            {results.total} result{results.total !== 1 ? "s" : ""} found
+            {results.total_is_exact === false
+              ? `${results.total.toLocaleString()}+`
+              : results.total}{" "}
+            result{results.total !== 1 ? "s" : ""} found
           </div>
           <SearchResults results={results.items} />
           <SearchPagination
@@ -14,6 +14,7 @@ export interface OrganizationSearchResult {
 export interface PaginatedResults<T> {
   items: T[];
   total: number;
+  total_is_exact?: boolean;
   page: number;
   page_size: number;
   total_pages: number;